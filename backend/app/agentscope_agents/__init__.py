@@ -1,6 +1,13 @@
 """AgentScope-based Multi-Agent Travel Planning System"""
 
 from .mcp_config import create_amap_mcp_client, MCP_SERVERS
+from .mcp_pool import MCPSessionPool, PooledMCPClient
 from .coordinator import AgentCoordinator
 
-__all__ = ["create_amap_mcp_client", "MCP_SERVERS", "AgentCoordinator"]
+__all__ = [
+    "create_amap_mcp_client",
+    "MCP_SERVERS",
+    "MCPSessionPool",
+    "PooledMCPClient",
+    "AgentCoordinator",
+]
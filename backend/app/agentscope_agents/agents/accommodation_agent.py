@@ -3,10 +3,8 @@ Accommodation Agent - Specializes in hotel/accommodation recommendations
 """
 
 from typing import Dict, Any, Optional
-from agentscope.agent import ReActAgent
-from agentscope.model import OpenAIChatModel, AnthropicChatModel, DashScopeChatModel
-from agentscope.formatter import OpenAIChatFormatter
-import os
+from app.agentscope_agents.model_registry import create_chat_model
+from app.agentscope_agents.agents.base_agent import BoundedReActAgent
 import logging
 
 logger = logging.getLogger(__name__)
@@ -42,27 +40,10 @@ def create_accommodation_agent(model_config: Dict[str, str], toolkit: Any = None
     Returns:
         ReActAgent configured for accommodation recommendations
     """
-    base_url = model_config.get("base_url", "https://api.openai.com/v1")
-    model_name = model_config.get("model", "gpt-4")
-    api_key = model_config.get("api_key") or os.getenv("OPENAI_API_KEY")
+    # Shared model client from the process-wide registry
+    model, formatter = create_chat_model(model_config)
 
-    if "anthropic" in base_url.lower():
-        model = AnthropicChatModel(model_name=model_name, api_key=api_key)
-        formatter = None
-    elif "tongyi" in base_url.lower() or "qwen" in model_name.lower():
-        model = DashScopeChatModel(model_name=model_name, api_key=api_key)
-        formatter = None
-    else:
-        client_kwargs = {}
-        if base_url != "https://api.openai.com/v1":
-            client_kwargs["base_url"] = base_url
-
-        model = OpenAIChatModel(
-            model_name=model_name, api_key=api_key, client_kwargs=client_kwargs
-        )
-        formatter = OpenAIChatFormatter()
-
-    agent = ReActAgent(
+    agent = BoundedReActAgent(
         name="AccommodationAgent",
         sys_prompt=ACCOMMODATION_PROMPT,
         model=model,
@@ -3,11 +3,58 @@ Base Agent Factory Functions
 """
 
 from agentscope.agent import ReActAgent
-from agentscope.formatter import OpenAIChatFormatter
-from agentscope.model import OpenAIChatModel, AnthropicChatModel, DashScopeChatModel
+from agentscope.message import Msg
 from agentscope.tool import Toolkit
-from typing import Dict, Any, Optional
-import os
+from typing import AsyncGenerator, Dict, Any, Optional
+from app.agentscope_agents.model_registry import create_chat_model
+from app.agentscope_agents.usage import current_usage
+
+FINAL_ANSWER_HINT = (
+    "已达到推理步数上限，不能再调用工具。"
+    "请基于目前已获得的信息，直接按系统提示要求的格式输出最终的纯JSON结果。"
+)
+
+
+class BoundedReActAgent(ReActAgent):
+    """
+    ReActAgent that answers with what it has once max_iters is reached.
+
+    The stock agent ends an exhausted loop with a free-form summary; this one
+    asks for the final answer in the format of its system prompt, so a capped
+    run still yields a usable result (see iteration_control.py).
+    """
+
+    async def _summarizing(self) -> Msg:
+        usage = current_usage()
+        if usage is not None:
+            usage.cap_hits += 1
+
+        prompt = await self.formatter.format(
+            [
+                Msg("system", self.sys_prompt, "system"),
+                *await self.memory.get_memory(),
+                Msg("user", FINAL_ANSWER_HINT, "user"),
+            ]
+        )
+        res = await self.model(prompt)
+
+        res_msg = Msg(self.name, [], "assistant")
+        if isinstance(res, AsyncGenerator):
+            async for chunk in res:
+                res_msg.content = chunk.content
+        else:
+            res_msg.content = res.content
+        await self.print(res_msg, True)
+        return res_msg
+
+    async def handle_interrupt(self, *args: Any, **kwargs: Any) -> Msg:
+        """
+        Handle a cancelled reply.
+
+        AgentBase.__call__ forwards every reply() argument here, including
+        structured_model, which the stock handler does not accept.
+        """
+        return await super().handle_interrupt(*args[:1])
 
 
 def create_react_agent(
@@ -30,31 +77,11 @@ def create_react_agent(
     Returns:
         Configured ReActAgent instance
     """
-    # Extract configuration
-    base_url = model_config.get("base_url", "https://api.openai.com/v1")
-    model_name = model_config.get("model", "gpt-4")
-    api_key = model_config.get("api_key") or os.getenv("OPENAI_API_KEY")
-
-    # Select appropriate model based on base_url
-    if "anthropic" in base_url.lower():
-        model = AnthropicChatModel(model_name=model_name, api_key=api_key)
-        formatter = None
-    elif "tongyi" in base_url.lower() or "qwen" in model_name.lower():
-        model = DashScopeChatModel(model_name=model_name, api_key=api_key)
-        formatter = None
-    else:
-        # Default to OpenAI-compatible
-        client_kwargs = {}
-        if base_url != "https://api.openai.com/v1":
-            client_kwargs["base_url"] = base_url
-
-        model = OpenAIChatModel(
-            model_name=model_name, api_key=api_key, client_kwargs=client_kwargs
-        )
-        formatter = OpenAIChatFormatter()
+    # Shared model client from the process-wide registry
+    model, formatter = create_chat_model(model_config)
 
     # Create ReActAgent with toolkit injection
-    agent = ReActAgent(
+    agent = BoundedReActAgent(
         name=name,
         sys_prompt=sys_prompt,
         model=model,
@@ -3,10 +3,8 @@ Budget Agent - Specializes in budget analysis and optimization
 """
 
 from typing import Dict, Any, Optional
-from agentscope.agent import ReActAgent
-from agentscope.model import OpenAIChatModel, AnthropicChatModel, DashScopeChatModel
-from agentscope.formatter import OpenAIChatFormatter
-import os
+from app.agentscope_agents.model_registry import create_chat_model
+from app.agentscope_agents.agents.base_agent import BoundedReActAgent
 
 BUDGET_PROMPT = """你是专业的预算分析专家。
 
@@ -28,6 +26,8 @@ BUDGET_PROMPT = """你是专业的预算分析专家。
 
 输出要求：
 - 返回 JSON 格式
+- 包含 budget 对象：total_budget（总预算）、total_spent（预计总花费）、
+  transport_spent、accommodation_spent、food_spent、activities_spent（均为整数，单位元）
 - 包含预算分析报告
 - 提供优化建议
 """
@@ -44,27 +44,10 @@ def create_budget_agent(model_config: Dict[str, str], toolkit: Any = None):
     Returns:
         ReActAgent configured for budget analysis
     """
-    base_url = model_config.get("base_url", "https://api.openai.com/v1")
-    model_name = model_config.get("model", "gpt-4")
-    api_key = model_config.get("api_key") or os.getenv("OPENAI_API_KEY")
+    # Shared model client from the process-wide registry
+    model, formatter = create_chat_model(model_config)
 
-    if "anthropic" in base_url.lower():
-        model = AnthropicChatModel(model_name=model_name, api_key=api_key)
-        formatter = None
-    elif "tongyi" in base_url.lower() or "qwen" in model_name.lower():
-        model = DashScopeChatModel(model_name=model_name, api_key=api_key)
-        formatter = None
-    else:
-        client_kwargs = {}
-        if base_url != "https://api.openai.com/v1":
-            client_kwargs["base_url"] = base_url
-
-        model = OpenAIChatModel(
-            model_name=model_name, api_key=api_key, client_kwargs=client_kwargs
-        )
-        formatter = OpenAIChatFormatter()
-
-    agent = ReActAgent(
+    agent = BoundedReActAgent(
         name="BudgetAgent",
         sys_prompt=BUDGET_PROMPT,
         model=model,
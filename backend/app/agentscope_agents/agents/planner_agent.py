@@ -3,10 +3,8 @@ Planner Agent - Specializes in integrating all recommendations into itinerary
 """
 
 from typing import Dict, Any, Optional
-from agentscope.agent import ReActAgent
-from agentscope.model import OpenAIChatModel, AnthropicChatModel, DashScopeChatModel
-from agentscope.formatter import OpenAIChatFormatter
-import os
+from app.agentscope_agents.model_registry import create_chat_model
+from app.agentscope_agents.agents.base_agent import BoundedReActAgent
 
 PLANNER_PROMPT = """你是专业的行程规划专家。
 
@@ -37,7 +35,8 @@ PLANNER_PROMPT = """你是专业的行程规划专家。
 - 返回 JSON 格式的完整行程
 - 包含 days 字段（按天组织的行程）
 - 每天包含：日期、天气、景点、交通、住宿、美食、详细行程
-- 每个活动包含时间、地点、活动类型、费用估算
+- 每个活动包含时间、地点、活动类型、费用估算，字段为 day、time（HH:MM）、
+  type（transport/accommodation/attraction/food/custom）、title、location、cost（元）、duration（分钟）
 - 根据天气情况调整户外活动时间
 """
 
@@ -53,27 +52,10 @@ def create_planner_agent(model_config: Dict[str, str], toolkit: Any = None):
     Returns:
         ReActAgent configured for itinerary planning
     """
-    base_url = model_config.get("base_url", "https://api.openai.com/v1")
-    model_name = model_config.get("model", "gpt-4")
-    api_key = model_config.get("api_key") or os.getenv("OPENAI_API_KEY")
+    # Shared model client from the process-wide registry
+    model, formatter = create_chat_model(model_config)
 
-    if "anthropic" in base_url.lower():
-        model = AnthropicChatModel(model_name=model_name, api_key=api_key)
-        formatter = None
-    elif "tongyi" in base_url.lower() or "qwen" in model_name.lower():
-        model = DashScopeChatModel(model_name=model_name, api_key=api_key)
-        formatter = None
-    else:
-        client_kwargs = {}
-        if base_url != "https://api.openai.com/v1":
-            client_kwargs["base_url"] = base_url
-
-        model = OpenAIChatModel(
-            model_name=model_name, api_key=api_key, client_kwargs=client_kwargs
-        )
-        formatter = OpenAIChatFormatter()
-
-    agent = ReActAgent(
+    agent = BoundedReActAgent(
         name="PlannerAgent",
         sys_prompt=PLANNER_PROMPT,
         model=model,
@@ -1,13 +1,18 @@
 """
 Weather Agent - Specializes in weather information and forecasting
+
+WEATHER_PIPELINE answers it from the amap forecast without the LLM when the
+forecast covers the trip dates (see direct_mode.py).
 """
 
-from typing import Dict, Any, Optional
-from agentscope.agent import ReActAgent
-from agentscope.model import OpenAIChatModel, AnthropicChatModel, DashScopeChatModel
-from agentscope.formatter import OpenAIChatFormatter
-import os
+from datetime import date, timedelta
+from typing import Dict, Any, List, Optional
+from app.models import Weather
+from app.agentscope_agents.model_registry import create_chat_model
+from app.agentscope_agents.agents.base_agent import BoundedReActAgent
+from app.agentscope_agents.direct_mode import DirectPipeline, ToolStep, task_trip
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
@@ -42,27 +47,10 @@ def create_weather_agent(model_config: Dict[str, str], toolkit: Any = None):
     Returns:
         ReActAgent configured for weather information
     """
-    base_url = model_config.get("base_url", "https://api.openai.com/v1")
-    model_name = model_config.get("model", "gpt-4")
-    api_key = model_config.get("api_key") or os.getenv("OPENAI_API_KEY")
-
-    if "anthropic" in base_url.lower():
-        model = AnthropicChatModel(model_name=model_name, api_key=api_key)
-        formatter = None
-    elif "tongyi" in base_url.lower() or "qwen" in model_name.lower():
-        model = DashScopeChatModel(model_name=model_name, api_key=api_key)
-        formatter = None
-    else:
-        client_kwargs = {}
-        if base_url != "https://api.openai.com/v1":
-            client_kwargs["base_url"] = base_url
-
-        model = OpenAIChatModel(
-            model_name=model_name, api_key=api_key, client_kwargs=client_kwargs
-        )
-        formatter = OpenAIChatFormatter()
+    # Shared model client from the process-wide registry
+    model, formatter = create_chat_model(model_config)
 
-    agent = ReActAgent(
+    agent = BoundedReActAgent(
         name="WeatherAgent",
         sys_prompt=WEATHER_PROMPT,
         model=model,
@@ -73,3 +61,96 @@ def create_weather_agent(model_config: Dict[str, str], toolkit: Any = None):
 
     return agent
 
+
+# Upper wind speed (km/h) of each Beaufort force, as reported by amap ("1-3")
+BEAUFORT_KMH = [1, 5, 11, 19, 28, 38, 49, 61, 74, 88, 102, 117, 133]
+
+
+def _trip_dates(trip: Dict[str, Any]) -> List[str]:
+    try:
+        start = date.fromisoformat(str(trip["start_date"])[:10])
+        end = date.fromisoformat(str(trip.get("end_date") or start)[:10])
+    except (KeyError, ValueError):
+        return []
+    days = (end - start).days + 1
+    return [(start + timedelta(days=n)).isoformat() for n in range(days)]
+
+
+def _weather_targets(task_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """One target per destination, if the trip has valid dates"""
+    trip = task_trip(task_data)
+    dates = _trip_dates(trip)
+    if not dates:
+        return []
+    return [
+        {"city": city, "dates": dates}
+        for city in trip.get("destinations") or []
+        if isinstance(city, str) and city
+    ]
+
+
+def _wind_kmh(power: Any) -> Optional[int]:
+    levels = [int(level) for level in re.findall(r"\d+", str(power))]
+    if not levels:
+        return None
+    return BEAUFORT_KMH[min(max(levels), len(BEAUFORT_KMH) - 1)]
+
+
+def _weather_tips(low: int, high: int, condition: str) -> str:
+    tips = []
+    if high >= 30:
+        tips.append("天气炎热，注意防晒补水")
+    elif low <= 5:
+        tips.append("气温较低，注意保暖")
+    elif high - low >= 10:
+        tips.append("昼夜温差大，建议带件外套")
+    if "雨" in condition:
+        tips.append("有降雨，记得带伞")
+    if "雪" in condition:
+        tips.append("有降雪，注意防滑")
+    return "；".join(tips) or "天气舒适，适合出行"
+
+
+def map_amap_forecast(
+    target: Dict[str, Any], responses: Dict[str, Any], task_data: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """
+    Weather records for the trip dates covered by the amap forecast.
+
+    amap forecasts four days ahead; later trip dates get no record.
+    """
+    dates = set(target["dates"])
+    records = []
+    for cast in responses["maps_weather"].get("forecasts") or []:
+        if cast.get("date") not in dates:
+            continue
+        try:
+            high, low = int(cast["daytemp"]), int(cast["nighttemp"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        condition = cast.get("dayweather") or ""
+        night = cast.get("nightweather")
+        if night and night != condition:
+            condition = f"{condition}转{night}"
+        records.append(
+            {
+                "location": target["city"],
+                "date": cast["date"],
+                "temperature_min": min(low, high),
+                "temperature_max": max(low, high),
+                "weather_condition": condition,
+                "wind_speed": _wind_kmh(cast.get("daypower")),
+                "tips": _weather_tips(min(low, high), max(low, high), condition),
+            }
+        )
+    return records
+
+
+# Direct mode (see direct_mode.py): the amap forecast of every destination
+WEATHER_PIPELINE = DirectPipeline(
+    section="weather",
+    model=Weather,
+    targets=_weather_targets,
+    steps=[ToolStep("maps_weather", lambda target: {"city": target["city"]})],
+    mapper=map_amap_forecast,
+)
@@ -0,0 +1,150 @@
+"""
+Benchmark mode for per-agent model tiers
+
+Sends every agent's system prompt and a sample task straight to the model of
+its tier (see settings.agent_models) and reports latency, token usage and
+estimated cost per agent and per tier. Tools and ReAct iterations are left
+out, so the numbers compare the models themselves.
+
+Usage:
+    python -m app.agentscope_agents.benchmark --runs 3
+"""
+
+from typing import Any, AsyncGenerator, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from agentscope.message import Msg
+
+from app.agentscope_agents.agents.accommodation_agent import ACCOMMODATION_PROMPT
+from app.agentscope_agents.agents.attraction_agent import ATTRACTION_PROMPT
+from app.agentscope_agents.agents.budget_agent import BUDGET_PROMPT
+from app.agentscope_agents.agents.food_agent import FOOD_PROMPT
+from app.agentscope_agents.agents.planner_agent import PLANNER_PROMPT
+from app.agentscope_agents.agents.transport_agent import TRANSPORT_PROMPT
+from app.agentscope_agents.agents.weather_agent import WEATHER_PROMPT
+from app.agentscope_agents.model_registry import get_model_registry
+from app.agentscope_agents.pricing import model_cost
+from app.agentscope_agents.scheduler import build_planning_graph
+
+AGENT_PROMPTS = {
+    "transport": TRANSPORT_PROMPT,
+    "accommodation": ACCOMMODATION_PROMPT,
+    "attraction": ATTRACTION_PROMPT,
+    "food": FOOD_PROMPT,
+    "weather": WEATHER_PROMPT,
+    "budget": BUDGET_PROMPT,
+    "planner": PLANNER_PROMPT,
+}
+
+SAMPLE_TRIP = {
+    "title": "北京三日游",
+    "destinations": ["北京"],
+    "start_date": "2026-05-01",
+    "end_date": "2026-05-03",
+    "travelers": 2,
+    "budget": {"total": 6000},
+    "preferences": {"interests": ["历史", "美食"]},
+}
+
+
+async def _timed_call(model: Any, messages: List[dict]) -> Dict[str, Any]:
+    started = time.monotonic()
+    response = await model(messages)
+    if isinstance(response, AsyncGenerator):
+        last = None
+        async for chunk in response:
+            last = chunk
+        response = last
+    latency = time.monotonic() - started
+
+    usage = getattr(response, "usage", None)
+    input_tokens = usage.input_tokens if usage else 0
+    output_tokens = usage.output_tokens if usage else 0
+    return {
+        "latency": latency,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "cost": model_cost(model.model_name, input_tokens, output_tokens),
+    }
+
+
+async def benchmark_agent_models(
+    runs: int = 3,
+    trip_data: Optional[Dict[str, Any]] = None,
+    registry: Any = None,
+) -> Dict[str, Any]:
+    """
+    Benchmark every agent's tier.
+
+    Args:
+        runs: Calls per agent
+        trip_data: Sample trip (defaults to SAMPLE_TRIP)
+        registry: Model registry to take models from (defaults to the shared one)
+
+    Returns:
+        {"agents": {name: stats}, "tiers": {"provider/model": stats}}
+    """
+    from app.ai_providers import get_agent_model_config
+
+    registry = registry or get_model_registry()
+    trip_data = trip_data or SAMPLE_TRIP
+    graph = build_planning_graph()
+    placeholder_results = {name: {} for name in graph.nodes}
+
+    agents: Dict[str, Dict[str, Any]] = {}
+    for name, prompt in AGENT_PROMPTS.items():
+        config = get_agent_model_config(name)
+        model, formatter = registry.get(config)
+        task = graph.nodes[name].build_payload(trip_data, placeholder_results)
+        messages = await formatter.format(
+            [
+                Msg("system", prompt, "system"),
+                Msg("user", json.dumps(task, ensure_ascii=False), "user"),
+            ]
+        )
+
+        samples = [await _timed_call(model, messages) for _ in range(runs)]
+        costs = [s["cost"] for s in samples if s["cost"] is not None]
+        agents[name] = {
+            "tier": f"{config.get('provider')}/{config.get('model')}",
+            "runs": runs,
+            "p50_latency_ms": round(
+                statistics.median(s["latency"] for s in samples) * 1000, 1
+            ),
+            "avg_input_tokens": statistics.mean(s["input_tokens"] for s in samples),
+            "avg_output_tokens": statistics.mean(s["output_tokens"] for s in samples),
+            "avg_cost_usd": round(statistics.mean(costs), 6) if costs else None,
+        }
+
+    tiers: Dict[str, Dict[str, Any]] = {}
+    for name, stats in agents.items():
+        tier = tiers.setdefault(
+            stats["tier"], {"agents": [], "_latency": [], "_cost": []}
+        )
+        tier["agents"].append(name)
+        tier["_latency"].append(stats["p50_latency_ms"])
+        if stats["avg_cost_usd"] is not None:
+            tier["_cost"].append(stats["avg_cost_usd"])
+    for tier in tiers.values():
+        latencies, costs = tier.pop("_latency"), tier.pop("_cost")
+        tier["avg_latency_ms"] = round(statistics.mean(latencies), 1)
+        tier["avg_cost_usd"] = round(statistics.mean(costs), 6) if costs else None
+
+    return {"agents": agents, "tiers": tiers}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-agent model tiers")
+    parser.add_argument("--runs", type=int, default=3, help="calls per agent")
+    args = parser.parse_args()
+
+    report = asyncio.run(benchmark_agent_models(runs=args.runs))
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Compaction of specialist results before they reach the budget and planner agents
+
+Specialists answer in free-form JSON: verbose prose, duplicated fields and,
+when a reply could not be parsed, failure blobs such as {"content": ...}. The
+planner prompt carries all of them and is the largest in the pipeline.
+
+Compaction projects every record of a specialist result onto its pydantic
+model in app/models.py (Transport, Hotel, Attraction, Food, Weather), drops
+fields the downstream agents do not use, deduplicates POIs and then trims the
+section to its token budget. Values are kept as given; projection does not
+validate them.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple, Type
+import json
+import logging
+
+from pydantic import BaseModel
+
+from config import settings
+from app.models import (
+    Attraction,
+    Food,
+    Hotel,
+    ItineraryItem,
+    Transport,
+    TripBudget,
+    Weather,
+)
+from app.agentscope_agents.rate_limiter import CHARS_PER_TOKEN
+
+logger = logging.getLogger(__name__)
+
+SECTION_MODELS: Dict[str, Type[BaseModel]] = {
+    "transport": Transport,
+    "accommodation": Hotel,
+    "attraction": Attraction,
+    "food": Food,
+    "weather": Weather,
+}
+
+# Models of every agent's records: the specialist sections plus the budget and
+# planner results, which are validated (structured_output.py) but not compacted
+RESULT_MODELS: Dict[str, Type[BaseModel]] = {
+    **SECTION_MODELS,
+    "budget": TripBudget,
+    "planner": ItineraryItem,
+}
+
+# Field that identifies a record of the section; dicts without it are containers
+IDENTITY_FIELDS = {
+    "transport": "type",
+    "accommodation": "name",
+    "attraction": "name",
+    "food": "name",
+    "weather": "date",
+    "budget": "total_budget",
+    "planner": "title",
+}
+
+# Common names agents use for model fields
+FIELD_ALIASES: Dict[str, Dict[str, str]] = {
+    "transport": {
+        "transport": "type",
+        "mode": "type",
+        "cost": "price",
+        "from": "from_location",
+        "origin": "from_location",
+        "to": "to_location",
+        "destination": "to_location",
+    },
+    "accommodation": {
+        "price": "price_per_night",
+        "cost": "price_per_night",
+        "stars": "star_rating",
+        "address": "location",
+        "facilities": "amenities",
+    },
+    "attraction": {
+        "price": "ticket_price",
+        "cost": "ticket_price",
+        "type": "category",
+        "duration": "recommended_duration",
+        "address": "location",
+    },
+    "food": {
+        "price": "avg_price_per_person",
+        "cost": "avg_price_per_person",
+        "avg_price": "avg_price_per_person",
+        "dishes": "signature_dishes",
+        "recommended_dishes": "signature_dishes",
+        "address": "location",
+    },
+    "weather": {
+        "weather": "weather_condition",
+        "condition": "weather_condition",
+        "temp_min": "temperature_min",
+        "temp_max": "temperature_max",
+        "low": "temperature_min",
+        "high": "temperature_max",
+        "advice": "tips",
+        "suggestion": "tips",
+        "city": "location",
+    },
+    "budget": {
+        "total": "total_budget",
+        "budget_total": "total_budget",
+        "total_estimate": "total_spent",
+        "estimated_total": "total_spent",
+    },
+    "planner": {
+        "activity": "title",
+        "price": "cost",
+    },
+}
+
+EMPTY_VALUES = (None, "", [], {})
+
+# Result keys added by the coordinator rather than the agent
+METADATA_KEYS = ("degraded", "fallback", "validation_errors")
+
+# Model fields the budget and planner agents never use
+DROPPED_FIELDS = {"id", "image_url", "booking_url", "weather_icon", "contact"}
+
+
+def estimate_section_tokens(value: Any) -> int:
+    return len(json.dumps(value, ensure_ascii=False, default=str)) // CHARS_PER_TOKEN
+
+
+def _shorten(value: Any, max_chars: int) -> Any:
+    if isinstance(value, str) and len(value) > max_chars:
+        return value[:max_chars] + "…"
+    return value
+
+
+def project_record(
+    section: str, record: Dict[str, Any], max_chars: int
+) -> Dict[str, Any]:
+    """Keep the fields of a record that the section's model defines"""
+    model = RESULT_MODELS[section]
+    aliases = FIELD_ALIASES.get(section, {})
+    identity = IDENTITY_FIELDS[section]
+    projected: Dict[str, Any] = {}
+    for key, value in record.items():
+        field = key if key in model.model_fields else aliases.get(key)
+        if (
+            field is None
+            or field in DROPPED_FIELDS
+            or field in projected
+            or value in EMPTY_VALUES
+        ):
+            continue
+        if field == identity and isinstance(value, (list, dict)):
+            # A container such as {"transport": [...]}, not a record's identity
+            continue
+        projected[field] = _shorten(value, max_chars)
+    return projected
+
+
+def find_records(
+    section: str, result: Any, max_chars: int = 10_000
+) -> List[Dict[str, Any]]:
+    """
+    Project every record found in an arbitrarily nested agent result
+
+    A dict is a record when its identity field is a scalar; other dicts are
+    containers and their values are searched in turn.
+    """
+    identity = IDENTITY_FIELDS[section]
+    records = []
+    stack = [result]
+    while stack:
+        item = stack.pop(0)
+        if isinstance(item, dict):
+            projected = project_record(section, item, max_chars)
+            if identity in projected:
+                records.append(projected)
+            else:
+                stack.extend(item.values())
+        elif isinstance(item, list):
+            stack.extend(item)
+    return records
+
+
+def _dedupe_key(section: str, record: Dict[str, Any]) -> Tuple:
+    if section == "transport":
+        return (
+            str(record.get("type")),
+            json.dumps(record.get("from_location"), ensure_ascii=False, default=str),
+            json.dumps(record.get("to_location"), ensure_ascii=False, default=str),
+        )
+    if section == "weather":
+        return (str(record.get("location")), str(record.get("date")))
+    return ("".join(str(record.get("name")).split()).lower(),)
+
+
+def _dedupe(section: str, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Drop repeated records, filling missing fields of the first from the rest"""
+    merged: Dict[Tuple, Dict[str, Any]] = {}
+    for record in records:
+        key = _dedupe_key(section, record)
+        if key in merged:
+            for field, value in record.items():
+                merged[key].setdefault(field, value)
+        else:
+            merged[key] = record
+    return list(merged.values())
+
+
+def compact_section(
+    section: str,
+    result: Any,
+    token_budget: Optional[int] = None,
+    max_chars: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Compact one specialist result.
+
+    Args:
+        section: Specialist agent name (a key of SECTION_MODELS)
+        result: The agent's result
+        token_budget: Maximum estimated tokens of the compacted section
+        max_chars: Maximum length of free-text values
+
+    Returns:
+        {"items": [...]} with the projected records in the agent's order, plus
+        "dropped" (records cut by the budget), "degraded" (fallback result),
+        "summary" (text of a result without recognizable records) or "error"
+    """
+    if token_budget is None:
+        token_budget = settings.planning_compaction_section_tokens.get(section, 800)
+    if max_chars is None:
+        max_chars = settings.planning_compaction_max_text_chars
+    budget_chars = token_budget * CHARS_PER_TOKEN
+
+    compacted: Dict[str, Any] = {"items": []}
+    if isinstance(result, dict):
+        if result.get("degraded"):
+            compacted["degraded"] = True
+        if "error" in result:
+            compacted["error"] = _shorten(str(result["error"]), max_chars)
+            return compacted
+        if set(result) - set(METADATA_KEYS) == {"content"}:
+            # Reply that was not valid JSON: keep its text within the budget
+            compacted["summary"] = _shorten(str(result["content"]), budget_chars)
+            return compacted
+
+        # Coordinator metadata and empty values carry nothing for the summary
+        result = {
+            key: value
+            for key, value in result.items()
+            if key not in METADATA_KEYS and value not in EMPTY_VALUES
+        }
+
+    items = _dedupe(section, find_records(section, result, max_chars))
+    if not items and result:
+        text = json.dumps(result, ensure_ascii=False, default=str)
+        compacted["summary"] = _shorten(text, budget_chars)
+        return compacted
+
+    kept = len(items)
+    while kept and estimate_section_tokens(items[:kept]) > token_budget:
+        kept -= 1
+    compacted["items"] = items[:kept]
+    if kept < len(items):
+        compacted["dropped"] = len(items) - kept
+    return compacted
+
+
+def compact_results(results: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compact the specialist results of a planning run.
+
+    Results of other agents are passed through unchanged, and so is everything
+    when settings.planning_compaction_enabled is off.
+    """
+    if not settings.planning_compaction_enabled:
+        return results
+
+    compacted = dict(results)
+    for section in SECTION_MODELS:
+        if section not in results:
+            continue
+        compacted[section] = compact_section(section, results[section])
+        logger.debug(
+            f"Compacted {section}: {estimate_section_tokens(results[section])} -> "
+            f"{estimate_section_tokens(compacted[section])} tokens"
+        )
+    return compacted
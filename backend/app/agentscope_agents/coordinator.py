@@ -1,37 +1,94 @@
 """
-AgentCoordinator - Manages multi-agent collaboration using MsgHub
+AgentCoordinator - Manages multi-agent collaboration as a dependency graph
 """
 
-from agentscope.pipeline import MsgHub
 from agentscope.message import Msg
 from agentscope.agent import ReActAgent
+from agentscope.mcp import StatefulClientBase
 from agentscope.tool import Toolkit
-from typing import Dict, Any, List, Optional
+from pydantic import BaseModel
+from typing import Dict, Any, AsyncIterator, Optional, Type
 import asyncio
+import copy
 import json
 import logging
+import time
 
 # Import agent factories directly
 from app.agentscope_agents.agents.transport_agent import create_transport_agent
 from app.agentscope_agents.agents.accommodation_agent import create_accommodation_agent
 from app.agentscope_agents.agents.attraction_agent import create_attraction_agent
 from app.agentscope_agents.agents.food_agent import create_food_agent
+from app.agentscope_agents.agents.weather_agent import (
+    WEATHER_PIPELINE,
+    create_weather_agent,
+)
 from app.agentscope_agents.agents.budget_agent import create_budget_agent
 from app.agentscope_agents.agents.planner_agent import create_planner_agent
-from app.models import Attraction, Food, Hotel, Transport, TripBudget
+from config import settings
+from app.agentscope_agents.deadline import (
+    PlanningDeadline,
+    fallback_cache_args,
+    heuristic_fallback,
+)
+from app.agentscope_agents.direct_mode import DirectModeUnavailable, DirectPipeline
+from app.agentscope_agents.result_cache import recommendation_cache_args
+from app.agentscope_agents.tool_cache import ToolResultCache
+from app.agentscope_agents.iteration_control import get_iteration_controller
+from app.agentscope_agents.structured_output import parse_agent_output, reask_prompt
+from app.agentscope_agents.usage import (
+    AgentUsage,
+    count_reasoning_step,
+    current_usage,
+    record_tool_step,
+    summarize_usage,
+    track_usage,
+)
+from app.agentscope_agents.scheduler import (
+    AgentGraph,
+    AgentGraphExecutor,
+    SPECIALIST_AGENTS,
+    build_planning_graph,
+)
 
 
 logger = logging.getLogger(__name__)
 
+AGENT_NAMES = [
+    "transport",
+    "accommodation",
+    "attraction",
+    "food",
+    "weather",
+    "budget",
+    "planner",
+]
+
+# Agents that can be answered by tool calls alone (see direct_mode.py)
+DIRECT_PIPELINES: Dict[str, DirectPipeline] = {"weather": WEATHER_PIPELINE}
+
+
+def _cancel_requested() -> bool:
+    """Whether the current task has a pending cancellation request"""
+    task = asyncio.current_task()
+    cancelling = getattr(task, "cancelling", None)  # Python 3.11+
+    return bool(task and cancelling and cancelling())
+
 
 class AgentCoordinator:
     """
     Coordinates multiple specialized agents for travel planning.
 
-    Uses MsgHub for inter-agent communication and Toolkit for MCP integration.
+    Agents run as a dependency graph (see scheduler.py) and share a Toolkit
+    for MCP integration.
     """
 
-    def __init__(self, model_configs: Dict[str, Dict[str, str]]):
+    def __init__(
+        self,
+        model_configs: Dict[str, Dict[str, str]],
+        result_cache: Optional[ToolResultCache] = None,
+        fallback_cache: Optional[ToolResultCache] = None,
+    ):
         """
         Initialize coordinator with model configurations for each agent.
 
@@ -42,12 +99,26 @@ class AgentCoordinator:
                     "accommodation": {...},
                     "attraction": {...},
                     "food": {...},
+                    "weather": {...},
                     "budget": {...},
                     "planner": {...}
                 }
+            result_cache: Optional cache of agent results (see result_cache.py)
+            fallback_cache: Optional store of last-good specialist results, used
+                when an agent overruns its time budget (see deadline.py)
         """
         self.model_configs = model_configs
+        self.result_cache = result_cache
+        self.fallback_cache = fallback_cache
         self._agents = {}
+        self._cached_agents = set()
+        self._degraded_agents = set()
+        self._direct_agents = set()
+        self._direct: Dict[str, DirectPipeline] = {}
+        self._tool_client = None
+        self._usage: Dict[str, AgentUsage] = {}
+        self._max_iters: Dict[str, int] = {}
+        self._deadline: Optional[PlanningDeadline] = None
         self._is_initialized = False
 
     async def initialize(self, mcp_clients: Dict[str, Any] = None):
@@ -63,32 +134,60 @@ class AgentCoordinator:
 
         logger.info("Initializing multi-agent system...")
 
-        # Create Toolkit with MCP tools if provided
-        amap_toolkit = None
+        # Connect the MCP client if provided (pooled clients lease sessions per call)
+        amap_client = None
         if mcp_clients and "amap" in mcp_clients:
-            amap_toolkit = Toolkit()
+            amap_client = mcp_clients["amap"]
+            try:
+                # 先连接MCP客户端（池化客户端按调用租用会话，无需连接）
+                if (
+                    isinstance(amap_client, StatefulClientBase)
+                    and not amap_client.is_connected
+                ):
+                    await amap_client.connect()
+            except Exception as e:
+                logger.warning(f"Failed to connect MCP client: {e}")
+                logger.warning(f"Agents will run without MCP tools")
+                amap_client = None
+
+        if amap_client is not None:
+            self._tool_client = amap_client
+            self._direct = {
+                name: DIRECT_PIPELINES[name]
+                for name in settings.agent_direct_mode_agents
+                if name in DIRECT_PIPELINES
+            }
+
+        async def amap_toolkit() -> Optional[Toolkit]:
+            # ReActAgent registers its own generate_response tool in the toolkit,
+            # so every agent needs a Toolkit of its own
+            if amap_client is None:
+                return None
+            toolkit = Toolkit()
             try:
-                # 先连接MCP客户端
-                await mcp_clients["amap"].connect()
                 # 然后注册到toolkit
-                await amap_toolkit.register_mcp_client(mcp_clients["amap"])
-                logger.info("Injected Amap MCP tools into specialized agents")
+                await toolkit.register_mcp_client(amap_client)
             except Exception as e:
                 logger.warning(f"Failed to register MCP client: {e}")
                 logger.warning(f"Agents will run without MCP tools")
+                return None
+            return toolkit
 
         # Create all specialized agents with toolkit injection
         self._agents["transport"] = create_transport_agent(
-            self.model_configs.get("transport", {}), toolkit=amap_toolkit
+            self.model_configs.get("transport", {}), toolkit=await amap_toolkit()
         )
         self._agents["accommodation"] = create_accommodation_agent(
-            self.model_configs.get("accommodation", {}), toolkit=amap_toolkit
+            self.model_configs.get("accommodation", {}), toolkit=await amap_toolkit()
         )
         self._agents["attraction"] = create_attraction_agent(
-            self.model_configs.get("attraction", {}), toolkit=amap_toolkit
+            self.model_configs.get("attraction", {}), toolkit=await amap_toolkit()
         )
         self._agents["food"] = create_food_agent(
-            self.model_configs.get("food", {}), toolkit=amap_toolkit
+            self.model_configs.get("food", {}), toolkit=await amap_toolkit()
+        )
+        self._agents["weather"] = create_weather_agent(
+            self.model_configs.get("weather", {}), toolkit=await amap_toolkit()
         )
         self._agents["budget"] = create_budget_agent(
             self.model_configs.get("budget", {}), toolkit=None
@@ -97,100 +196,219 @@ class AgentCoordinator:
             self.model_configs.get("planner", {}), toolkit=None
         )
 
+        for name, agent in self._agents.items():
+            agent.register_instance_hook(
+                "pre_reasoning", "count_reasoning_step", count_reasoning_step
+            )
+            agent.register_instance_hook(
+                "pre_acting", "record_tool_step", record_tool_step
+            )
+            # Factory values bound the adaptive caps (see iteration_control.py)
+            self._max_iters[name] = agent.max_iters
+
         self._is_initialized = True
         logger.info("All specialized agents initialized with MCP tools")
 
-    async def plan_trip(self, trip_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def reset(self):
         """
-        Execute multi-agent collaborative trip planning.
+        Clear per-request state so the coordinator can be reused.
 
-        Workflow:
-        1. Broadcast task to all agents via MsgHub
-        2. Agents automatically call MCP tools via ReAct reasoning
-        3. Collect results from all agents
-        4. Send to PlannerAgent for final itinerary generation
+        Agents keep their model clients and toolkit; only conversation memory,
+        subscribers and pending structured-output requirements are dropped.
+        """
+        self._cached_agents.clear()
+        self._degraded_agents.clear()
+        self._direct_agents.clear()
+        self._usage = {}
+        self._deadline = None
+        for agent in self._agents.values():
+            await agent.memory.clear()
+            agent.reset_subscribers([])
+            agent._required_structured_model = None
+
+    async def run_graph(
+        self,
+        trip_data: Dict[str, Any],
+        graph: Optional[AgentGraph] = None,
+        deadline: Optional[PlanningDeadline] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run the agent dependency graph and stream progress events.
+
+        Independent agents run concurrently; dependents start as soon as their
+        inputs are ready. Events are yielded in completion order, see
+        AgentGraphExecutor for the event format. Completed events also carry
+        "cached": True when the result was served from the result cache and
+        "degraded": True when the agent overran its time budget and a fallback
+        result was used instead, and "direct": True when the agent's direct tool
+        pipeline answered without the LLM. They also carry the agent's "usage" (tokens,
+        ReAct iterations, LLM/tool/wall time and estimated cost, see usage.py).
 
         Args:
             trip_data: Trip information including destinations, dates, budget, etc.
-
-        Returns:
-            Complete planning result with all agent recommendations
+            graph: Agent graph to run (defaults to build_planning_graph())
+            deadline: Optional latency budget split across the agents
         """
         if not self._is_initialized:
             await self.initialize()
 
-        logger.info(f"Starting multi-agent planning: {trip_data.get('title')}")
+        self._deadline = deadline
+        executor = AgentGraphExecutor(graph or build_planning_graph(), self._run_agent)
+        async for event in executor.run(trip_data):
+            if event["event"] == "completed":
+                event["cached"] = event["agent"] in self._cached_agents
+                event["degraded"] = event["agent"] in self._degraded_agents
+                event["direct"] = event["agent"] in self._direct_agents
+                event["usage"] = self._usage[event["agent"]].to_dict()
+            yield event
+
+    async def _run_agent(self, name: str, task_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute an agent and account its token, latency and cost usage"""
+        usage = self._usage[name] = AgentUsage()
+        started = time.monotonic()
+        with track_usage(usage):
+            try:
+                return await self._run_agent_cached(name, task_data)
+            finally:
+                usage.wall_time = time.monotonic() - started
+                logger.info(f"[{name}] usage: {usage.to_dict()}")
 
-        try:
-            # Create MsgHub for agent communication
-            participants = list(self._agents.values())
-
-            async with MsgHub(participants=participants) as hub:
-                # Broadcast task to all agents
-                task_msg = Msg(
-                    name="Coordinator",
-                    content=json.dumps(
-                        {"action": "recommend", "trip_data": trip_data},
-                        ensure_ascii=False,
-                    ),
-                    role="coordinator",
-                )
+    async def _run_agent_cached(
+        self, name: str, task_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Execute an agent, serving equivalent earlier requests from the result cache"""
+        agent = self._agents[name]
+        cache_args = None
+        if self.result_cache is not None:
+            cache_args = recommendation_cache_args(
+                name,
+                agent.sys_prompt,
+                agent.model.model_name,
+                task_data,
+                date_bucket_days=settings.recommendation_cache_date_bucket_days,
+                budget_bucket=settings.recommendation_cache_budget_bucket,
+            )
+            cached = await self.result_cache.get(name, cache_args)
+            if cached is not None:
+                logger.info(f"[{name}] served from recommendation cache")
+                self._cached_agents.add(name)
+                return copy.deepcopy(cached)
+
+        result = await self._execute_within_budget(agent, task_data, name)
+        # Failed and invalid replies are never cached, so the next identical
+        # request gets a fresh attempt instead of the broken reply
+        if name in self._degraded_agents or (
+            isinstance(result, dict)
+            and ("error" in result or "validation_errors" in result)
+        ):
+            return result
+
+        if cache_args is not None:
+            await self.result_cache.set(name, cache_args, result)
+        if self.fallback_cache is not None and name in SPECIALIST_AGENTS:
+            await self.fallback_cache.set(
+                name, fallback_cache_args(name, task_data), result
+            )
+        return result
 
-                hub.broadcast(task_msg)
-                logger.info("Task broadcasted to all agents")
-
-                # Collect results from all agents
-                transport_agent = self._agents["transport"]
-                accommodation_agent = self._agents["accommodation"]
-                attraction_agent = self._agents["attraction"]
-                food_agent = self._agents["food"]
-                budget_agent = self._agents["budget"]
-                planner_agent = self._agents["planner"]
-
-                # Parallel execution - agents call MCP tools automatically
-                results = await asyncio.gather(
-                    self._execute_agent(transport_agent, trip_data, "transport",Transport),
-                    self._execute_agent(accommodation_agent, trip_data, "accommodation",Hotel),
-                    self._execute_agent(attraction_agent, trip_data, "attraction",Attraction),
-                    self._execute_agent(food_agent, trip_data, "food",Food),
-                    self._execute_agent(budget_agent, trip_data, "budget",TripBudget),
-                    return_exceptions=True,
-                )
+    async def _execute_within_budget(
+        self, agent: ReActAgent, task_data: Dict[str, Any], name: str
+    ) -> Dict[str, Any]:
+        """
+        Execute an agent within its slice of the planning deadline.
 
-                transport_result = results[0]
-                accommodation_result = results[1]
-                attraction_result = results[2]
-                food_result = results[3]
-                budget_result = results[4]
-
-                logger.info("All specialized agents completed recommendations")
-
-                # Send to PlannerAgent for integration
-                planner_content = {
-                    "action": "generate_itinerary",
-                    "trip_data": trip_data,
-                    "transport_recommendations": transport_result,
-                    "accommodation_recommendations": accommodation_result,
-                    "attraction_recommendations": attraction_result,
-                    "food_recommendations": food_result,
-                    "budget_analysis": budget_result,
-                }
+        An agent that overruns is cancelled and replaced by a fallback result.
+        The agent runs in its own task and is judged on wall time, because
+        ReActAgent turns cancellation into an "interrupted" reply instead of
+        raising.
+        """
+        if self._deadline is None:
+            return await self._execute_agent(agent, task_data, name)
 
-                final_result = await self._execute_agent(
-                    planner_agent, planner_content, "planner"
-                )
+        timeout = self._deadline.budget_for(name)
+        if timeout > 0:
+            task = asyncio.create_task(self._execute_agent(agent, task_data, name))
+            try:
+                done, _ = await asyncio.wait({task}, timeout=timeout)
+            finally:
+                if not task.done():
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+            if task in done:
+                return task.result()
+
+        logger.warning(f"[{name}] exceeded its {timeout:.1f}s budget, using fallback")
+        self._degraded_agents.add(name)
+        return await self._fallback(name, task_data)
+
+    async def _fallback(self, name: str, task_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Last-good result for the same destination, else a heuristic result"""
+        if self.fallback_cache is not None and name in SPECIALIST_AGENTS:
+            cached = await self.fallback_cache.get(
+                name, fallback_cache_args(name, task_data)
+            )
+            if isinstance(cached, dict):
+                result = copy.deepcopy(cached)
+                result["degraded"] = True
+                result["fallback"] = "cached"
+                return result
+        return heuristic_fallback(name, task_data)
+
+    async def plan_trip(
+        self,
+        trip_data: Dict[str, Any],
+        deadline: Optional[PlanningDeadline] = None,
+    ) -> Dict[str, Any]:
+        """
+        Execute multi-agent collaborative trip planning.
 
-                logger.info("PlannerAgent generated final itinerary")
+        Workflow:
+        1. Transport, accommodation, attraction, food and weather agents run concurrently
+        2. Agents automatically call MCP tools via ReAct reasoning
+        3. BudgetAgent analyzes the specialist results
+        4. PlannerAgent integrates everything into the final itinerary
 
-                return {
-                    "success": True,
-                    "transport": transport_result,
-                    "accommodation": accommodation_result,
-                    "attractions": attraction_result,
-                    "food": food_result,
-                    "budget": budget_result,
-                    "final_itinerary": final_result,
-                }
+        Args:
+            trip_data: Trip information including destinations, dates, budget, etc.
+            deadline: Optional latency budget; agents that overrun their slice
+                are replaced by fallbacks and listed in "degraded_agents"
+
+        Returns:
+            Complete planning result with all agent recommendations and the
+            run's "usage" summary
+        """
+        logger.info(f"Starting multi-agent planning: {trip_data.get('title')}")
+
+        try:
+            results = {}
+            cached_agents = []
+            degraded_agents = []
+            usage = {}
+            started = time.monotonic()
+            async for event in self.run_graph(trip_data, deadline=deadline):
+                if event["event"] == "completed":
+                    results[event["agent"]] = event["result"]
+                    usage[event["agent"]] = event["usage"]
+                    if event["cached"]:
+                        cached_agents.append(event["agent"])
+                    if event["degraded"]:
+                        degraded_agents.append(event["agent"])
+
+            logger.info("PlannerAgent generated final itinerary")
+
+            return {
+                "success": True,
+                "transport": results["transport"],
+                "accommodation": results["accommodation"],
+                "attractions": results["attraction"],
+                "food": results["food"],
+                "weather": results["weather"],
+                "budget": results["budget"],
+                "final_itinerary": results["planner"],
+                "cached_agents": cached_agents,
+                "degraded_agents": degraded_agents,
+                "usage": summarize_usage(usage, time.monotonic() - started),
+            }
 
         except Exception as e:
             logger.error(f"Multi-agent planning failed: {e}")
@@ -202,7 +420,8 @@ class AgentCoordinator:
         """
         Execute a single agent's task.
 
-        The agent automatically calls MCP tools via ReAct reasoning.
+        The agent automatically calls MCP tools via ReAct reasoning. Agents
+        with a direct tool pipeline are answered by it where it applies.
 
         Args:
             agent: ReActAgent instance
@@ -212,6 +431,16 @@ class AgentCoordinator:
         Returns:
             Agent's response as dictionary
         """
+        pipeline = self._direct.get(task_name)
+        if pipeline is not None:
+            try:
+                result = await pipeline.run(self._tool_client, task_data)
+                self._direct_agents.add(task_name)
+                logger.info(f"[{task_name}] answered by direct tool pipeline")
+                return result
+            except DirectModeUnavailable as e:
+                logger.info(f"[{task_name}] direct mode not applicable, running agent: {e}")
+
         try:
             msg = Msg(
                 name="Coordinator",
@@ -223,19 +452,55 @@ class AgentCoordinator:
             logger.info(f"[{task_name}] 发送消息给Agent")
             logger.debug(f"[{task_name}] 消息内容: {msg.content[:200]}..." if len(msg.content) > 200 else msg.content)
             
-            response = await agent(msg,structured_model = structured_model)
+            controller = get_iteration_controller()
+            adaptive = settings.agent_iteration_cap_enabled and task_name in self._max_iters
+            if adaptive:
+                agent.max_iters = controller.cap_for(task_name, self._max_iters[task_name])
+
+            # AgentBase passes reply()'s arguments on to handle_interrupt() when
+            # cancelled, so only pass structured_model when there is one
+            if structured_model is None:
+                response = await agent(msg)
+            else:
+                response = await agent(msg, structured_model=structured_model)
+            if _cancel_requested():
+                # ReActAgent swallows cancellation and replies "interrupted";
+                # re-raise so callers never cache or use that reply
+                raise asyncio.CancelledError()
+
+            usage = current_usage()
+            if adaptive and usage is not None:
+                controller.record(
+                    task_name, usage.iterations, usage.tool_sequence, usage.cap_hits > 0
+                )
             
             # 记录LLM原始响应
 
 
             logger.info(f"[{task_name}] LLM响应: {response.content[:300]}..." if len(response.content) > 300 else response.content)
 
-            try:
-                result = json.loads(response.content)
+            output = parse_agent_output(task_name, response.get_text_content())
+            for _ in range(settings.agent_output_max_reasks):
+                if not output.invalid:
+                    break
+                # Only unusable replies cost another round-trip
+                logger.warning(f"[{task_name}] unusable reply, re-asking: {output.errors[:3]}")
+                if usage is not None:
+                    usage.reasks += 1
+                response = await agent(
+                    Msg(name="Coordinator", content=reask_prompt(output.errors), role="user")
+                )
+                if _cancel_requested():
+                    raise asyncio.CancelledError()
+                output = parse_agent_output(task_name, response.get_text_content())
+
+            result = output.result
+            if output.errors:
+                logger.warning(f"[{task_name}] output validation errors: {output.errors[:5]}")
+                result["validation_errors"] = output.errors
+            if not output.invalid:
                 logger.info(f"{task_name} completed successfully")
-                return result
-            except json.JSONDecodeError:
-                return {"content": response.content}
+            return result
 
         except Exception as e:
             logger.error(f"{task_name} failed: {e}",exc_info=True)
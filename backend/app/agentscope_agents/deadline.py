@@ -0,0 +1,185 @@
+"""
+Deadline-aware planning: per-agent time budgets and degraded fallbacks
+
+Every planning request carries a latency budget. Each agent gets a slice of it
+(capped by the time that is actually left), and an agent that overruns its
+slice is cancelled and replaced by the last good result for the same
+destination or, failing that, a heuristic result built from the inputs at hand.
+Slices are fractions of the whole budget. The planner's slice must still fit
+once the specialist and budget stages have used theirs.
+"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+import time
+
+from config import settings
+from app.agentscope_agents.tool_cache import ToolResultCache
+
+
+class PlanningDeadline:
+    """
+    Latency budget for one planning run.
+
+    Usage:
+        deadline = PlanningDeadline(90, {"planner": 0.35})
+        timeout = deadline.budget_for("planner")
+    """
+
+    def __init__(
+        self,
+        total_seconds: float,
+        shares: Optional[Dict[str, float]] = None,
+        default_share: float = 0.5,
+    ):
+        """
+        Args:
+            total_seconds: Wall-clock budget for the whole run
+            shares: Fraction of total_seconds each agent may use
+            default_share: Fraction for agents missing from shares
+        """
+        if total_seconds <= 0:
+            raise ValueError("Planning deadline must be positive")
+
+        self.total_seconds = total_seconds
+        self.shares = shares or {}
+        self.default_share = default_share
+        self.started_at = time.monotonic()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def remaining(self) -> float:
+        return max(0.0, self.total_seconds - self.elapsed())
+
+    @property
+    def expires_at(self) -> float:
+        """time.monotonic() at which the budget runs out"""
+        return self.started_at + self.total_seconds
+
+    def budget_for(self, agent_name: str) -> float:
+        """Seconds the agent may run: its slice, capped by the time left"""
+        share = self.shares.get(agent_name, self.default_share)
+        return min(share * self.total_seconds, self.remaining())
+
+
+def planning_deadline(requested_seconds: Optional[float] = None) -> PlanningDeadline:
+    """
+    Deadline for a planning request, configured from settings.
+
+    A budget requested by the client is honoured but clamped to
+    planning_deadline_max_seconds.
+
+    Raises:
+        ValueError: The requested budget is not a positive number
+    """
+    total = settings.planning_deadline_seconds
+    if requested_seconds is not None:
+        try:
+            requested = float(requested_seconds)
+        except (TypeError, ValueError):
+            raise ValueError("deadline_seconds must be a number")
+        if not requested > 0:
+            raise ValueError("deadline_seconds must be positive")
+        total = min(requested, settings.planning_deadline_max_seconds)
+    return PlanningDeadline(total, settings.planning_agent_time_shares)
+
+
+def fallback_cache_args(agent_name: str, task_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Looser cache key for last-good results: agent, action and destinations"""
+    trip_data = task_data.get("trip_data") or {}
+    return {
+        "agent": agent_name,
+        "action": task_data.get("action"),
+        "destinations": [str(d).strip() for d in trip_data.get("destinations", [])],
+    }
+
+
+def _named_items(value: Any, limit: int = 20) -> List[Dict[str, Any]]:
+    """Collect dicts with a "name" from an arbitrarily nested agent result"""
+    found: List[Dict[str, Any]] = []
+    stack = [value]
+    while stack and len(found) < limit:
+        item = stack.pop(0)
+        if isinstance(item, dict):
+            if isinstance(item.get("name"), str):
+                found.append(item)
+            else:
+                stack.extend(item.values())
+        elif isinstance(item, list):
+            stack.extend(item)
+    return found
+
+
+def _trip_dates(trip_data: Dict[str, Any]) -> List[str]:
+    try:
+        start = date.fromisoformat(str(trip_data["start_date"])[:10])
+        end = date.fromisoformat(str(trip_data["end_date"])[:10])
+    except (KeyError, ValueError):
+        return []
+    return [
+        (start + timedelta(days=offset)).isoformat()
+        for offset in range((end - start).days + 1)
+    ]
+
+
+def _heuristic_itinerary(task_data: Dict[str, Any]) -> Dict[str, Any]:
+    trip_data = task_data.get("trip_data") or {}
+    attractions = _named_items(task_data.get("attraction_recommendations"))
+    restaurants = _named_items(task_data.get("food_recommendations"))
+    hotels = _named_items(task_data.get("accommodation_recommendations"), limit=1)
+    dates = _trip_dates(trip_data) or [trip_data.get("start_date")]
+    per_day = max(1, -(-len(attractions) // len(dates)))
+
+    itinerary = []
+    for index, day in enumerate(dates):
+        activities = [
+            {"type": "attraction", "name": item["name"]}
+            for item in attractions[index * per_day : (index + 1) * per_day]
+        ]
+        if index < len(restaurants):
+            activities.append({"type": "food", "name": restaurants[index]["name"]})
+        itinerary.append(
+            {
+                "day": index + 1,
+                "date": day,
+                "accommodation": hotels[0]["name"] if hotels else None,
+                "activities": activities,
+            }
+        )
+    return {"itinerary": itinerary}
+
+
+def heuristic_fallback(agent_name: str, task_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Best-effort result for an agent that ran out of time.
+
+    The planner gets a day-by-day itinerary spreading the recommended
+    attractions and restaurants over the trip dates; the budget agent echoes
+    the requested budget; other agents return an empty recommendation list.
+    """
+    if agent_name == "planner":
+        result = _heuristic_itinerary(task_data)
+    elif agent_name == "budget":
+        result = {"budget": task_data.get("budget", {}), "suggestions": []}
+    else:
+        result = {"recommendations": []}
+
+    result["degraded"] = True
+    result["fallback"] = "heuristic"
+    return result
+
+
+_fallback_cache: Optional[ToolResultCache] = None
+
+
+def get_fallback_cache() -> ToolResultCache:
+    """Get the process-wide store of last-good specialist results"""
+    global _fallback_cache
+
+    if _fallback_cache is None:
+        _fallback_cache = ToolResultCache(
+            max_entries=settings.planning_fallback_cache_max_entries,
+            default_ttl=settings.planning_fallback_cache_ttl,
+        )
+    return _fallback_cache
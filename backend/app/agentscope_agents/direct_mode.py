@@ -0,0 +1,157 @@
+"""
+Direct tool mode - agents whose job is a fixed sequence of tool calls
+
+Some agents only call MCP tools and reformat the structured responses, e.g.
+WeatherAgent fetches the amap forecast of every destination and maps it onto
+the Weather model. Running them as a ReAct loop costs several LLM round-trips
+per plan for data the tools already return in structured form.
+
+A DirectPipeline declares the calls instead: one ToolStep per target (e.g.
+per destination) and a mapper from the tool responses to model records. The
+coordinator runs the pipeline in place of the agent where it applies and
+falls back to the ReAct agent when it raises DirectModeUnavailable.
+"""
+
+from typing import Any, Callable, Dict, List, Type
+import asyncio
+import itertools
+import json
+import logging
+
+from pydantic import BaseModel, ValidationError
+
+from app.agentscope_agents.usage import current_usage
+
+logger = logging.getLogger(__name__)
+
+
+class DirectModeUnavailable(Exception):
+    """The pipeline does not apply to the task; run the agent instead"""
+
+
+class ToolStep:
+    """One tool call per pipeline target"""
+
+    def __init__(
+        self,
+        tool: str,
+        arguments: Callable[[Dict[str, Any]], Dict[str, Any]],
+    ):
+        """
+        Args:
+            tool: MCP tool name
+            arguments: Target -> tool arguments
+        """
+        self.tool = tool
+        self.arguments = arguments
+
+
+class DirectPipeline:
+    """
+    Declarative tool pipeline producing the result of an agent.
+
+    Usage:
+        pipeline = DirectPipeline(
+            section="weather",
+            model=Weather,
+            targets=lambda task: [{"city": city} for city in ...],
+            steps=[ToolStep("maps_weather", lambda target: {"city": target["city"]})],
+            mapper=lambda target, responses, task: [...],
+        )
+        result = await pipeline.run(amap_client, task_data)
+
+    Targets run concurrently and each target's steps in order; the mapper gets the parsed JSON
+    responses by tool name and returns records of the model, which are
+    validated. The result is {section: [records]} like the agent's reply.
+    """
+
+    def __init__(
+        self,
+        section: str,
+        model: Type[BaseModel],
+        targets: Callable[[Dict[str, Any]], List[Dict[str, Any]]],
+        steps: List[ToolStep],
+        mapper: Callable[
+            [Dict[str, Any], Dict[str, Any], Dict[str, Any]], List[Dict[str, Any]]
+        ],
+    ):
+        """
+        Args:
+            section: Result key of the records
+            model: Pydantic model every record is validated against
+            targets: Task payload -> targets; empty when the pipeline does not
+                apply to the task
+            steps: Tool calls made for every target
+            mapper: (target, responses by tool name, task payload) -> records
+        """
+        self.section = section
+        self.model = model
+        self.targets = targets
+        self.steps = steps
+        self.mapper = mapper
+
+    async def _call(self, client: Any, tool: str, arguments: Dict[str, Any]) -> Any:
+        """Parsed JSON response of a tool call, recorded into the current usage"""
+        usage = current_usage()
+        if usage is not None:
+            usage.tool_sequence.append(tool)
+        try:
+            function = await client.get_callable_function(tool, wrap_tool_result=False)
+            res = await function(**arguments)
+        except Exception as e:
+            raise DirectModeUnavailable(f"{tool} failed: {e}") from e
+
+        text = "".join(getattr(block, "text", "") for block in res.content)
+        if res.isError:
+            raise DirectModeUnavailable(f"{tool} failed: {text[:200]}")
+        try:
+            data = json.loads(text)
+        except ValueError as e:
+            raise DirectModeUnavailable(f"{tool} returned no JSON: {text[:200]}") from e
+        if isinstance(data, dict) and "error" in data:
+            raise DirectModeUnavailable(f"{tool} failed: {data['error']}")
+        return data
+
+    async def _run_target(
+        self, client: Any, target: Dict[str, Any], task_data: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        responses = {}
+        for step in self.steps:
+            responses[step.tool] = await self._call(
+                client, step.tool, step.arguments(target)
+            )
+        return self.mapper(target, responses, task_data)
+
+    async def run(self, client: Any, task_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Result of the pipeline for a task payload.
+
+        Raises:
+            DirectModeUnavailable: No targets, a failed tool call, or no
+                valid record (e.g. dates outside the forecast range)
+        """
+        targets = self.targets(task_data)
+        if not targets:
+            raise DirectModeUnavailable("no targets in the task")
+
+        mapped = await asyncio.gather(
+            *(self._run_target(client, target, task_data) for target in targets)
+        )
+        records = []
+        for record in itertools.chain.from_iterable(mapped):
+            try:
+                records.append(
+                    self.model.model_validate(record).model_dump(exclude_none=True)
+                )
+            except ValidationError as e:
+                logger.warning(f"Dropping invalid {self.section} record: {e}")
+
+        if not records:
+            raise DirectModeUnavailable(f"no {self.section} records produced")
+        return {self.section: records}
+
+
+def task_trip(task_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Trip data of a task payload built by scheduler.py"""
+    trip = task_data.get("trip_data", task_data)
+    return trip if isinstance(trip, dict) else {}
@@ -0,0 +1,518 @@
+"""
+Stand-in amap MCP server backed by a synthetic dataset
+
+The real server (``uvx amap-mcp-server``) needs network access and an
+AMAP_API_KEY, so benchmarks and load tests could not exercise tool calls.
+This stdio MCP server implements the amap tools the agents use with the same
+names, arguments and response shapes, answered from a synthetic dataset:
+
+    python -m app.agentscope_agents.fake_amap_server
+
+Answers depend only on the seed and the arguments, so every server process
+of a session pool returns the same data. Calls sleep for a log-normal latency
+and fail at a configured rate. Select it with settings.amap_mcp_server =
+"fake_amap" (see mcp_config.MCP_SERVERS), which also passes the settings
+below through the environment:
+
+    FAKE_AMAP_SEED, FAKE_AMAP_LATENCY_MEDIAN_MS, FAKE_AMAP_LATENCY_P95_MS,
+    FAKE_AMAP_ERROR_RATE
+"""
+
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import math
+import os
+import random
+
+from mcp.server.fastmcp import FastMCP
+
+from app.agentscope_agents.fake_model import LatencyProfile
+
+# name -> (lng, lat, province, adcode, citycode)
+CITIES: Dict[str, Tuple[float, float, str, str, str]] = {
+    "北京": (116.407387, 39.904179, "北京市", "110000", "010"),
+    "上海": (121.473667, 31.230525, "上海市", "310000", "021"),
+    "广州": (113.264499, 23.130061, "广东省", "440100", "020"),
+    "深圳": (114.057939, 22.543527, "广东省", "440300", "0755"),
+    "杭州": (120.155070, 30.274084, "浙江省", "330100", "0571"),
+    "成都": (104.066301, 30.572961, "四川省", "510100", "028"),
+    "西安": (108.939645, 34.343207, "陕西省", "610100", "029"),
+    "南京": (118.796877, 32.060255, "江苏省", "320100", "025"),
+    "重庆": (106.551556, 29.563009, "重庆市", "500000", "023"),
+    "厦门": (118.089425, 24.479833, "福建省", "350200", "0592"),
+}
+
+# (search keywords, amap typecode, POI name suffixes)
+POI_CATEGORIES: List[Tuple[Tuple[str, ...], str, Tuple[str, ...]]] = [
+    (
+        ("酒店", "宾馆", "住宿", "民宿"),
+        "100100",
+        ("大酒店", "宾馆", "精品酒店", "民宿"),
+    ),
+    (
+        ("美食", "餐", "小吃", "菜", "咖啡"),
+        "050000",
+        ("餐厅", "老字号", "小吃店", "食府"),
+    ),
+    (
+        ("景点", "景区", "公园", "博物馆", "古镇"),
+        "110000",
+        ("公园", "博物馆", "古街", "景区"),
+    ),
+    (("站", "机场", "地铁"), "150200", ("火车站", "地铁站", "机场", "客运站")),
+]
+DEFAULT_CATEGORY = ("060000", ("广场", "中心", "大厦", "街区"))
+
+NAME_PREFIXES = "东方 锦江 如意 长安 金桥 华府 悦来 云栖 和平 南山".split()
+ROADS = "人民路 解放路 中山路 建设路 长江路 滨江大道 学府路 文化路".split()
+WEATHERS = ("晴", "多云", "阴", "小雨", "阵雨", "晴")
+WINDS = ("东", "南", "西", "北", "东北", "西南")
+
+# Detour factor over straight-line distance and speed in m/s per travel mode
+ROUTE_MODES = {"driving": (1.3, 8.0), "walking": (1.2, 1.2), "transit": (1.4, 5.5)}
+
+
+def _distance(origin: str, destination: str) -> float:
+    """Great-circle distance in meters between two "lng,lat" strings"""
+    lng1, lat1 = (math.radians(float(v)) for v in origin.split(","))
+    lng2, lat2 = (math.radians(float(v)) for v in destination.split(","))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * 6371000 * math.asin(math.sqrt(min(1.0, a)))
+
+
+class SyntheticAmap:
+    """
+    Deterministic amap responses for a seed.
+
+    Usage:
+        amap = SyntheticAmap(seed=7)
+        amap.geo("故宫博物院", "北京")["return"][0]["location"]
+    """
+
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+        # POIs handed out by searches, for maps_search_detail
+        self._pois: Dict[str, Dict[str, Any]] = {}
+
+    def _rng(self, *parts: Any) -> random.Random:
+        return random.Random("|".join(str(part) for part in (self.seed, *parts)))
+
+    def city(
+        self, name: Optional[str]
+    ) -> Tuple[str, Tuple[float, float, str, str, str]]:
+        """Known city matching a name, or a synthetic one"""
+        name = (name or "北京").strip()
+        for known, info in CITIES.items():
+            if known in name or info[3] == name:
+                return known, info
+        rng = self._rng("city", name)
+        adcode = f"{rng.randint(11, 65)}0100"
+        return name, (
+            round(rng.uniform(100.0, 122.0), 6),
+            round(rng.uniform(22.0, 42.0), 6),
+            f"{name}省",
+            adcode,
+            f"0{rng.randint(300, 999)}",
+        )
+
+    def _point(self, city: Optional[str], *parts: Any) -> str:
+        _, (lng, lat, *_) = self.city(city)
+        rng = self._rng("point", city, *parts)
+        return (
+            f"{lng + rng.uniform(-0.08, 0.08):.6f},{lat + rng.uniform(-0.06, 0.06):.6f}"
+        )
+
+    def _address(self, rng: random.Random) -> str:
+        return f"{rng.choice(ROADS)}{rng.randint(1, 300)}号"
+
+    def geo(self, address: str, city: Optional[str] = None) -> Dict[str, Any]:
+        if not city:
+            city = next((known for known in CITIES if known in address), None)
+        name, (_, _, province, adcode, citycode) = self.city(city)
+        rng = self._rng("geo", address)
+        return {
+            "return": [
+                {
+                    "country": "中国",
+                    "province": province,
+                    "city": f"{name}市",
+                    "citycode": citycode,
+                    "district": f"{rng.choice(NAME_PREFIXES)}区",
+                    "street": rng.choice(ROADS),
+                    "number": f"{rng.randint(1, 300)}号",
+                    "adcode": adcode,
+                    "location": self._point(name, "geo", address),
+                    "level": "兴趣点",
+                }
+            ]
+        }
+
+    def regeocode(self, location: str) -> Dict[str, Any]:
+        lng, lat = (float(v) for v in location.split(","))
+        name, (_, _, province, _, _) = min(
+            CITIES.items(),
+            key=lambda item: (item[1][0] - lng) ** 2 + (item[1][1] - lat) ** 2,
+        )
+        district = self._rng("regeo", location).choice(NAME_PREFIXES)
+        return {"province": province, "city": f"{name}市", "district": f"{district}区"}
+
+    def _search(self, scope: str, keywords: str, city: str, count: int) -> List[Dict]:
+        typecode, suffixes = DEFAULT_CATEGORY
+        for words, code, names in POI_CATEGORIES:
+            if any(word in keywords for word in words):
+                typecode, suffixes = code, names
+                break
+
+        name, _ = self.city(city)
+        rng = self._rng("search", scope, keywords, name)
+        pois = []
+        for _ in range(count):
+            poi_id = f"B0FAKE{rng.randrange(16**8):08X}"
+            poi = {
+                "id": poi_id,
+                "name": f"{rng.choice(NAME_PREFIXES)}{keywords}{rng.choice(suffixes)}",
+                "address": self._address(rng),
+                "typecode": typecode,
+            }
+            self._pois[poi_id] = {
+                **poi,
+                "city": f"{name}市",
+                "location": self._point(name, "poi", poi_id),
+                "rating": f"{rng.uniform(3.5, 5.0):.1f}",
+                "cost": str(rng.choice((0, 30, 60, 120, 200, 450, 900))),
+            }
+            pois.append(poi)
+        return pois
+
+    def text_search(self, keywords: str, city: str = "") -> Dict[str, Any]:
+        return {
+            "suggestion": {"keywords": [], "cities": []},
+            "pois": self._search("text", keywords, city, 10),
+        }
+
+    def around_search(
+        self, location: str, radius: str, keywords: str
+    ) -> Dict[str, Any]:
+        city = self.regeocode(location)["city"]
+        return {"pois": self._search(f"around:{location}:{radius}", keywords, city, 10)}
+
+    def search_detail(self, poi_id: str) -> Dict[str, Any]:
+        """Detail of a searched POI; ids from other processes get a synthetic one"""
+        if poi_id in self._pois:
+            poi = self._pois[poi_id]
+        else:
+            rng = self._rng("detail", poi_id)
+            poi = {
+                "id": poi_id,
+                "name": f"{rng.choice(NAME_PREFIXES)}{DEFAULT_CATEGORY[1][0]}",
+                "address": self._address(rng),
+                "typecode": DEFAULT_CATEGORY[0],
+                "city": "北京市",
+                "location": self._point("北京", "poi", poi_id),
+                "rating": f"{rng.uniform(3.5, 5.0):.1f}",
+                "cost": "",
+            }
+        return {
+            "id": poi["id"],
+            "name": poi["name"],
+            "location": poi["location"],
+            "address": poi["address"],
+            "business_area": "",
+            "city": poi["city"],
+            "type": poi["typecode"],
+            "alias": "",
+            "rating": poi["rating"],
+            "cost": poi["cost"],
+        }
+
+    def distance(
+        self, origins: str, destination: str, type: str = "1"
+    ) -> Dict[str, Any]:
+        detour, speed = {"0": (1.0, 8.0), "3": ROUTE_MODES["walking"]}.get(
+            type, ROUTE_MODES["driving"]
+        )
+        results = []
+        for index, origin in enumerate(origins.split("|"), start=1):
+            meters = _distance(origin, destination) * detour
+            results.append(
+                {
+                    "origin_id": str(index),
+                    "dest_id": "1",
+                    "distance": str(round(meters)),
+                    "duration": str(round(meters / speed)) if type != "0" else "0",
+                }
+            )
+        return {"results": results}
+
+    def _steps(self, rng: random.Random, meters: float, speed: float) -> List[Dict]:
+        count = rng.randint(2, 5)
+        return [
+            {
+                "instruction": f"沿{road}行驶{round(meters / count)}米",
+                "road": road,
+                "distance": str(round(meters / count)),
+                "orientation": rng.choice(WINDS),
+                "duration": str(round(meters / count / speed)),
+            }
+            for road in (rng.choice(ROADS) for _ in range(count))
+        ]
+
+    def direction(
+        self,
+        mode: str,
+        origin_address: str,
+        destination_address: str,
+        origin_city: Optional[str] = None,
+        destination_city: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Driving, walking or transit route between two addresses"""
+        origin = self.geo(origin_address, origin_city)["return"][0]["location"]
+        destination = self.geo(destination_address, destination_city)["return"][0][
+            "location"
+        ]
+        detour, speed = ROUTE_MODES[mode]
+        meters = _distance(origin, destination) * detour
+        rng = self._rng("route", mode, origin, destination)
+        addresses = {
+            "origin": {"address": origin_address, "coordinates": origin},
+            "destination": {"address": destination_address, "coordinates": destination},
+        }
+
+        if mode != "transit":
+            path = {
+                "distance": str(round(meters)),
+                "duration": str(round(meters / speed)),
+                "steps": self._steps(rng, meters, speed),
+            }
+            route = {"origin": origin, "destination": destination, "paths": [path]}
+            return {"route": route, "addresses": addresses}
+
+        transits = []
+        for _ in range(rng.randint(1, 3)):
+            line = f"地铁{rng.randint(1, 16)}号线"
+            transits.append(
+                {
+                    "duration": str(round(meters / speed) + rng.randint(120, 900)),
+                    "walking_distance": str(rng.randint(200, 1500)),
+                    "segments": [
+                        {
+                            "walking": {
+                                "origin": origin,
+                                "destination": origin,
+                                "distance": str(rng.randint(100, 800)),
+                                "duration": str(rng.randint(60, 600)),
+                                "steps": [],
+                            },
+                            "bus": {
+                                "buslines": [
+                                    {
+                                        "name": line,
+                                        "departure_stop": {
+                                            "name": f"{origin_address}站"
+                                        },
+                                        "arrival_stop": {
+                                            "name": f"{destination_address}站"
+                                        },
+                                        "distance": str(round(meters)),
+                                        "duration": str(round(meters / speed)),
+                                        "via_stops": [
+                                            {"name": f"{rng.choice(NAME_PREFIXES)}站"}
+                                            for _ in range(rng.randint(1, 6))
+                                        ],
+                                    }
+                                ]
+                            },
+                            "entrance": {"name": ""},
+                            "exit": {"name": ""},
+                            "railway": {"name": None, "trip": None},
+                        }
+                    ],
+                }
+            )
+        route = {
+            "origin": origin,
+            "destination": destination,
+            "distance": str(round(meters)),
+            "transits": transits,
+        }
+        return {"route": route, "addresses": addresses}
+
+    def weather(self, city: str, today: Optional[date] = None) -> Dict[str, Any]:
+        """Four-day forecast starting today, like the amap weather API"""
+        name, _ = self.city(city)
+        today = today or date.today()
+        forecasts = []
+        for offset in range(4):
+            day = today + timedelta(days=offset)
+            rng = self._rng("weather", name, day.isoformat())
+            high = rng.randint(-5, 35)
+            forecasts.append(
+                {
+                    "date": day.isoformat(),
+                    "week": str(day.isoweekday()),
+                    "dayweather": rng.choice(WEATHERS),
+                    "nightweather": rng.choice(WEATHERS),
+                    "daytemp": str(high),
+                    "nighttemp": str(high - rng.randint(4, 12)),
+                    "daywind": rng.choice(WINDS),
+                    "nightwind": rng.choice(WINDS),
+                    "daypower": "1-3",
+                    "nightpower": "1-3",
+                }
+            )
+        return {"city": f"{name}市", "forecasts": forecasts}
+
+
+def create_server(
+    amap: SyntheticAmap,
+    latency: Optional[LatencyProfile] = None,
+    error_rate: float = 0.0,
+) -> FastMCP:
+    """FastMCP server exposing the amap tools over a synthetic dataset"""
+    mcp = FastMCP("amap-maps")
+    rng = random.Random(amap.seed)
+
+    async def answer(
+        tool: str, produce: Callable[[], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        if latency is not None:
+            await asyncio.sleep(latency.sample(rng))
+        if rng.random() < error_rate:
+            raise RuntimeError(f"Injected failure of {tool}")
+        return produce()
+
+    @mcp.tool()
+    async def maps_geo(address: str, city: Optional[str] = None) -> Dict[str, Any]:
+        """将详细的结构化地址转换为经纬度坐标。支持对地标性名胜景区、建筑物名称解析为经纬度坐标"""
+        return await answer("maps_geo", lambda: amap.geo(address, city))
+
+    @mcp.tool()
+    async def maps_regeocode(location: str) -> Dict[str, Any]:
+        """将一个高德经纬度坐标转换为行政区划地址信息"""
+        return await answer("maps_regeocode", lambda: amap.regeocode(location))
+
+    @mcp.tool()
+    async def maps_text_search(
+        keywords: str, city: str = "", citylimit: str = "false"
+    ) -> Dict[str, Any]:
+        """关键词搜索 API 根据用户输入的关键字进行 POI 搜索，并返回相关的信息"""
+        return await answer(
+            "maps_text_search", lambda: amap.text_search(keywords, city)
+        )
+
+    @mcp.tool()
+    async def maps_around_search(
+        location: str, radius: str = "1000", keywords: str = ""
+    ) -> Dict[str, Any]:
+        """周边搜，根据用户传入关键词以及坐标location，搜索出radius半径范围的POI"""
+        return await answer(
+            "maps_around_search",
+            lambda: amap.around_search(location, radius, keywords),
+        )
+
+    @mcp.tool()
+    async def maps_search_detail(id: str) -> Dict[str, Any]:
+        """查询关键词搜或者周边搜获取到的POI ID的详细信息"""
+        return await answer("maps_search_detail", lambda: amap.search_detail(id))
+
+    @mcp.tool()
+    async def maps_distance(
+        origins: str, destination: str, type: str = "1"
+    ) -> Dict[str, Any]:
+        """测量两个经纬度坐标之间的距离,支持驾车、步行以及球面距离测量"""
+        return await answer(
+            "maps_distance", lambda: amap.distance(origins, destination, type)
+        )
+
+    @mcp.tool()
+    async def maps_direction_driving_by_address(
+        origin_address: str,
+        destination_address: str,
+        origin_city: Optional[str] = None,
+        destination_city: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Plans a driving route between two locations using addresses."""
+        return await answer(
+            "maps_direction_driving_by_address",
+            lambda: amap.direction(
+                "driving",
+                origin_address,
+                destination_address,
+                origin_city,
+                destination_city,
+            ),
+        )
+
+    @mcp.tool()
+    async def maps_direction_walking_by_address(
+        origin_address: str,
+        destination_address: str,
+        origin_city: Optional[str] = None,
+        destination_city: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Plans a walking route between two locations using addresses."""
+        return await answer(
+            "maps_direction_walking_by_address",
+            lambda: amap.direction(
+                "walking",
+                origin_address,
+                destination_address,
+                origin_city,
+                destination_city,
+            ),
+        )
+
+    @mcp.tool()
+    async def maps_direction_transit_integrated_by_address(
+        origin_address: str,
+        destination_address: str,
+        origin_city: str,
+        destination_city: str,
+    ) -> Dict[str, Any]:
+        """Plans a public transit route between two locations using addresses."""
+        return await answer(
+            "maps_direction_transit_integrated_by_address",
+            lambda: amap.direction(
+                "transit",
+                origin_address,
+                destination_address,
+                origin_city,
+                destination_city,
+            ),
+        )
+
+    @mcp.tool()
+    async def maps_weather(city: str) -> Dict[str, Any]:
+        """根据城市名称或者标准adcode查询指定城市的天气"""
+        return await answer("maps_weather", lambda: amap.weather(city))
+
+    return mcp
+
+
+def server_from_env() -> FastMCP:
+    """Server configured from the FAKE_AMAP_* environment variables"""
+    median = float(os.getenv("FAKE_AMAP_LATENCY_MEDIAN_MS", "0"))
+    p95 = float(os.getenv("FAKE_AMAP_LATENCY_P95_MS", str(median)))
+    return create_server(
+        SyntheticAmap(seed=int(os.getenv("FAKE_AMAP_SEED", "0"))),
+        latency=LatencyProfile(median, p95) if median > 0 else None,
+        error_rate=float(os.getenv("FAKE_AMAP_ERROR_RATE", "0")),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Synthetic amap MCP server")
+    parser.add_argument(
+        "transport",
+        nargs="?",
+        default="stdio",
+        choices=["stdio", "sse", "streamable-http"],
+    )
+    args = parser.parse_args()
+
+    server_from_env().run(transport=args.transport)
@@ -0,0 +1,453 @@
+"""
+FakeChatModel - Offline stand-in for the provider chat models
+
+Load-testing /trips/ai-plan against real providers costs money and measures
+the provider as much as the coordinator. With settings.llm_backend = "fake"
+the model registry builds a FakeChatModel wherever it would build an
+OpenAIChatModel / AnthropicChatModel / DashScopeChatModel, so agents, rate
+limiters, usage accounting and the scheduler run unchanged with no network.
+
+The model recognises the calling agent by its system prompt and replays that
+role's script: tool-call turns first (only calls to tools the agent actually
+offers), then the final JSON reply. Every call sleeps for a latency drawn from
+a log-normal distribution, reports token usage and fails at a configured
+error rate. Scripts and per-role profiles are configurable from Settings.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+import asyncio
+import itertools
+import json
+import math
+import random
+import time
+
+from agentscope.message import TextBlock, ToolUseBlock
+from agentscope.model import ChatModelBase, ChatResponse
+from agentscope.model._model_usage import ChatUsage
+
+from config import settings
+from app.agentscope_agents.rate_limiter import CHARS_PER_TOKEN
+
+# z-score of the 95th percentile of a standard normal distribution
+_Z95 = 1.645
+
+# Role scripts: a list of turns, each either {"tool_calls": [{"name", "input"}]}
+# or {"text": final reply}. Roles follow AgentType; "default" serves prompts
+# that match no agent.
+DEFAULT_SCRIPTS: Dict[str, List[Dict[str, Any]]] = {
+    "transport": [
+        {
+            "tool_calls": [
+                {
+                    "name": "maps_direction_transit_integrated_by_address",
+                    "input": {
+                        "origin_address": "北京南站",
+                        "destination_address": "天安门",
+                        "origin_city": "北京",
+                        "destination_city": "北京",
+                    },
+                }
+            ]
+        },
+        {
+            "text": json.dumps(
+                {
+                    "transport": [
+                        {
+                            "type": "地铁",
+                            "from_location": {"name": "北京南站"},
+                            "to_location": {"name": "天安门"},
+                            "duration": 35,
+                            "price": 5,
+                        }
+                    ]
+                },
+                ensure_ascii=False,
+            )
+        },
+    ],
+    "accommodation": [
+        {
+            "tool_calls": [
+                {
+                    "name": "maps_text_search",
+                    "input": {"keywords": "酒店", "city": "北京"},
+                }
+            ]
+        },
+        {
+            "text": json.dumps(
+                {
+                    "hotels": [
+                        {
+                            "name": "北京王府井希尔顿酒店",
+                            "location": {"name": "王府井"},
+                            "star_rating": 5,
+                            "price_per_night": 900,
+                        }
+                    ]
+                },
+                ensure_ascii=False,
+            )
+        },
+    ],
+    "attraction": [
+        {
+            "tool_calls": [
+                {
+                    "name": "maps_text_search",
+                    "input": {"keywords": "景点", "city": "北京"},
+                }
+            ]
+        },
+        {
+            "text": json.dumps(
+                {
+                    "attractions": [
+                        {
+                            "name": "故宫博物院",
+                            "location": {"name": "故宫博物院"},
+                            "rating": 4.8,
+                            "ticket_price": 60,
+                            "recommended_duration": 240,
+                        }
+                    ]
+                },
+                ensure_ascii=False,
+            )
+        },
+    ],
+    "food": [
+        {
+            "tool_calls": [
+                {
+                    "name": "maps_text_search",
+                    "input": {"keywords": "美食", "city": "北京"},
+                }
+            ]
+        },
+        {
+            "text": json.dumps(
+                {
+                    "restaurants": [
+                        {
+                            "name": "全聚德",
+                            "type": "餐厅",
+                            "cuisine": "北京菜",
+                            "location": {"name": "前门"},
+                            "avg_price_per_person": 200,
+                        }
+                    ]
+                },
+                ensure_ascii=False,
+            )
+        },
+    ],
+    "weather": [
+        {"tool_calls": [{"name": "maps_weather", "input": {"city": "北京"}}]},
+        {
+            "text": json.dumps(
+                {
+                    "weather": [
+                        {
+                            "location": "北京",
+                            "date": "2026-05-01",
+                            "temperature_min": 14,
+                            "temperature_max": 26,
+                            "weather_condition": "晴",
+                        }
+                    ]
+                },
+                ensure_ascii=False,
+            )
+        },
+    ],
+    "budget": [
+        {
+            "text": json.dumps(
+                {
+                    "budget": {
+                        "total_budget": 6000,
+                        "total_spent": 5200,
+                        "transport_spent": 300,
+                        "accommodation_spent": 2700,
+                        "food_spent": 1600,
+                        "activities_spent": 600,
+                    },
+                    "within_budget": True,
+                    "suggestions": [],
+                },
+                ensure_ascii=False,
+            )
+        }
+    ],
+    "planner": [
+        {
+            "text": json.dumps(
+                {
+                    "itinerary": [
+                        {
+                            "day": 1,
+                            "time": "09:00",
+                            "type": "attraction",
+                            "title": "游览故宫博物院",
+                            "cost": 60,
+                            "duration": 240,
+                        }
+                    ],
+                    "summary": "北京经典一日游",
+                },
+                ensure_ascii=False,
+            )
+        }
+    ],
+    "default": [{"text": "{}"}],
+}
+
+
+class FakeModelError(RuntimeError):
+    """Injected failure of a fake model call"""
+
+
+class LatencyProfile:
+    """Log-normal call latency given its median and 95th percentile"""
+
+    def __init__(self, median_ms: float, p95_ms: float):
+        if median_ms <= 0 or p95_ms < median_ms:
+            raise ValueError("Latency needs 0 < median_ms <= p95_ms")
+        self.median_ms = median_ms
+        self.p95_ms = p95_ms
+        self._mu = math.log(median_ms / 1000)
+        self._sigma = math.log(p95_ms / median_ms) / _Z95
+
+    def sample(self, rng: random.Random) -> float:
+        """Latency in seconds"""
+        return rng.lognormvariate(self._mu, self._sigma)
+
+
+class FakeProfile:
+    """Latency, error rate and completion size of one role's calls"""
+
+    def __init__(
+        self,
+        latency_median_ms: float = 800.0,
+        latency_p95_ms: float = 3000.0,
+        error_rate: float = 0.0,
+        output_tokens: int = 0,
+    ):
+        """
+        Args:
+            latency_median_ms: Median call latency
+            latency_p95_ms: 95th percentile call latency
+            error_rate: Fraction of calls that raise FakeModelError
+            output_tokens: Completion tokens reported per call; 0 estimates
+                them from the reply
+        """
+        self.latency = LatencyProfile(latency_median_ms, latency_p95_ms)
+        self.error_rate = error_rate
+        self.output_tokens = output_tokens
+
+
+def load_scripts(path: str) -> Dict[str, List[Dict[str, Any]]]:
+    """DEFAULT_SCRIPTS with the roles of a JSON script file replaced"""
+    scripts = dict(DEFAULT_SCRIPTS)
+    if path:
+        with open(path, encoding="utf-8") as file:
+            scripts.update(json.load(file))
+    return scripts
+
+
+@lru_cache(maxsize=1)
+def _agent_prompts() -> Dict[str, str]:
+    """System prompt -> role, imported late as the agents import the registry"""
+    from app.agentscope_agents.agents.accommodation_agent import ACCOMMODATION_PROMPT
+    from app.agentscope_agents.agents.attraction_agent import ATTRACTION_PROMPT
+    from app.agentscope_agents.agents.budget_agent import BUDGET_PROMPT
+    from app.agentscope_agents.agents.food_agent import FOOD_PROMPT
+    from app.agentscope_agents.agents.planner_agent import PLANNER_PROMPT
+    from app.agentscope_agents.agents.transport_agent import TRANSPORT_PROMPT
+    from app.agentscope_agents.agents.weather_agent import WEATHER_PROMPT
+
+    return {
+        TRANSPORT_PROMPT.strip(): "transport",
+        ACCOMMODATION_PROMPT.strip(): "accommodation",
+        ATTRACTION_PROMPT.strip(): "attraction",
+        FOOD_PROMPT.strip(): "food",
+        WEATHER_PROMPT.strip(): "weather",
+        BUDGET_PROMPT.strip(): "budget",
+        PLANNER_PROMPT.strip(): "planner",
+    }
+
+
+def _text(message: Dict[str, Any]) -> str:
+    content = message.get("content")
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            block.get("text", "") for block in content if isinstance(block, dict)
+        )
+    return ""
+
+
+def detect_role(messages: List[Dict[str, Any]]) -> str:
+    """Role of the calling agent from its system prompt, or "default" """
+    for message in messages:
+        if message.get("role") == "system":
+            return _agent_prompts().get(_text(message).strip(), "default")
+    return "default"
+
+
+def _turn_index(messages: List[Dict[str, Any]]) -> int:
+    """Assistant turns since the last user message"""
+    turns = 0
+    for message in messages:
+        if message.get("role") == "user":
+            turns = 0
+        elif message.get("role") == "assistant":
+            turns += 1
+    return turns
+
+
+def _tool_names(tools: Optional[List[Dict[str, Any]]]) -> set:
+    return {
+        tool.get("function", {}).get("name")
+        for tool in tools or []
+        if isinstance(tool, dict)
+    }
+
+
+class FakeChatModel(ChatModelBase):
+    """
+    Scripted chat model with synthetic latency, usage and failures.
+
+    Usage:
+        model = FakeChatModel("gpt-4o", profile=FakeProfile(800, 3000), seed=7)
+        response = await model(messages, tools=toolkit.get_json_schemas())
+
+    The model is stateless per conversation: the reply depends on the role
+    and on how many assistant turns follow the last user message, so one
+    instance can serve every agent of every request like the real clients.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "fake",
+        scripts: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+        profile: Optional[FakeProfile] = None,
+        role_profiles: Optional[Dict[str, FakeProfile]] = None,
+        seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            model_name: Reported model name; a real one keeps cost accounting
+            scripts: Role -> turns (default DEFAULT_SCRIPTS)
+            profile: Profile of roles without their own
+            role_profiles: Role -> profile overrides
+            seed: Seed of latency and failure sampling
+        """
+        super().__init__(model_name, stream=False)
+        self.scripts = scripts or DEFAULT_SCRIPTS
+        self.profile = profile or FakeProfile()
+        self.role_profiles = role_profiles or {}
+        self._rng = random.Random(seed)
+        self._call_ids = itertools.count(1)
+
+        # Metrics
+        self._calls: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+
+    def reply(
+        self, role: str, turn: int, tools: Optional[List[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """Content blocks of a role's reply at a turn"""
+        script = self.scripts.get(role) or self.scripts.get("default") or []
+        offered = _tool_names(tools)
+        tool_turns = []
+        for step in script:
+            calls = [
+                call for call in step.get("tool_calls", []) if call["name"] in offered
+            ]
+            if calls:
+                tool_turns.append(calls)
+
+        if turn < len(tool_turns):
+            return [
+                ToolUseBlock(
+                    type="tool_use",
+                    id=f"fake_call_{next(self._call_ids)}",
+                    name=call["name"],
+                    input=call.get("input", {}),
+                )
+                for call in tool_turns[turn]
+            ]
+        final = next((step["text"] for step in script if "text" in step), "{}")
+        return [TextBlock(type="text", text=final)]
+
+    async def __call__(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Optional[str] = None,
+        **kwargs: Any,
+    ) -> ChatResponse:
+        started = time.monotonic()
+        role = detect_role(messages)
+        profile = self.role_profiles.get(role, self.profile)
+        self._calls[role] = self._calls.get(role, 0) + 1
+
+        await asyncio.sleep(profile.latency.sample(self._rng))
+        if self._rng.random() < profile.error_rate:
+            self._errors[role] = self._errors.get(role, 0) + 1
+            raise FakeModelError(f"Injected failure of {role} call")
+
+        content = self.reply(role, _turn_index(messages), tools)
+        prompt_chars = len(json.dumps(messages, ensure_ascii=False, default=str))
+        reply_chars = len(json.dumps(content, ensure_ascii=False, default=str))
+        return ChatResponse(
+            content=content,
+            usage=ChatUsage(
+                input_tokens=prompt_chars // CHARS_PER_TOKEN,
+                output_tokens=(
+                    profile.output_tokens or max(1, reply_chars // CHARS_PER_TOKEN)
+                ),
+                time=time.monotonic() - started,
+            ),
+        )
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            role: {"calls": calls, "errors": self._errors.get(role, 0)}
+            for role, calls in self._calls.items()
+        }
+
+
+def create_fake_model(model_name: str) -> FakeChatModel:
+    """FakeChatModel configured from settings"""
+
+    def profile(overrides: Dict[str, float]) -> FakeProfile:
+        return FakeProfile(
+            latency_median_ms=overrides.get(
+                "latency_median_ms", settings.fake_llm_latency_median_ms
+            ),
+            latency_p95_ms=overrides.get(
+                "latency_p95_ms", settings.fake_llm_latency_p95_ms
+            ),
+            error_rate=overrides.get("error_rate", settings.fake_llm_error_rate),
+            output_tokens=int(
+                overrides.get("output_tokens", settings.fake_llm_output_tokens)
+            ),
+        )
+
+    return FakeChatModel(
+        model_name=model_name,
+        scripts=load_scripts(settings.fake_llm_script_path),
+        profile=profile({}),
+        role_profiles={
+            role: profile(overrides)
+            for role, overrides in settings.fake_llm_profiles.items()
+        },
+        seed=settings.fake_llm_seed,
+    )
@@ -0,0 +1,134 @@
+"""
+Adaptive ReAct iteration caps
+
+The agent factories set a fixed max_iters (20, or 10 for WeatherAgent) that
+real runs rarely need, while a looping agent burns tokens until it hits the
+cap. The controller records every run's iteration count and tool-call
+sequence and, once an agent has enough samples, caps it at a percentile of
+its observed iterations plus headroom. The factory value stays the upper
+bound. A capped agent answers with what it has (see BoundedReActAgent).
+"""
+
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import math
+
+from config import settings
+
+
+class AgentIterationStats:
+    """Recent iteration counts and tool-call sequences of one agent"""
+
+    def __init__(self, window: int = 200):
+        self.iterations: Deque[int] = deque(maxlen=window)
+        self.sequences: Deque[Tuple[str, ...]] = deque(maxlen=window)
+        self.cap_hits = 0
+
+    def percentile(self, fraction: float) -> Optional[int]:
+        if not self.iterations:
+            return None
+        ordered = sorted(self.iterations)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class IterationController:
+    """
+    Derives per-agent max_iters from observed iteration percentiles.
+
+    Usage:
+        controller = IterationController()
+        agent.max_iters = controller.cap_for("food", default=20)
+        ...
+        controller.record("food", iterations, tool_sequence, capped)
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        headroom: float = 1.25,
+        min_iters: int = 3,
+        min_samples: int = 20,
+        window: int = 200,
+    ):
+        """
+        Args:
+            percentile: Iteration percentile the cap is derived from
+            headroom: Factor applied to that percentile
+            min_iters: Lower bound of every cap
+            min_samples: Runs needed before an agent's cap adapts
+            window: Runs kept per agent
+        """
+        self.percentile = percentile
+        self.headroom = headroom
+        self.min_iters = min_iters
+        self.min_samples = min_samples
+        self.window = window
+        self._stats: Dict[str, AgentIterationStats] = {}
+        self._defaults: Dict[str, int] = {}
+
+    def stats(self, agent: str) -> AgentIterationStats:
+        if agent not in self._stats:
+            self._stats[agent] = AgentIterationStats(self.window)
+        return self._stats[agent]
+
+    def cap_for(self, agent: str, default: int) -> int:
+        """Iteration cap for the next run; default until enough samples exist"""
+        self._defaults[agent] = default
+        stats = self.stats(agent)
+        if len(stats.iterations) < self.min_samples:
+            return default
+        cap = math.ceil(stats.percentile(self.percentile) * self.headroom)
+        return max(self.min_iters, min(default, cap))
+
+    def record(
+        self, agent: str, iterations: int, tool_sequence: List[str], capped: bool
+    ):
+        """
+        Record a finished run.
+
+        A capped run records the cap, a lower bound of what it needed. Once
+        such runs reach the percentile the headroom lifts the cap again.
+        """
+        stats = self.stats(agent)
+        stats.iterations.append(iterations)
+        stats.sequences.append(tuple(tool_sequence))
+        if capped:
+            stats.cap_hits += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            name: {
+                "samples": len(stats.iterations),
+                "p50_iterations": stats.percentile(0.5),
+                "p95_iterations": stats.percentile(0.95),
+                "cap": (
+                    self.cap_for(name, self._defaults[name])
+                    if name in self._defaults
+                    else None
+                ),
+                "cap_hits": stats.cap_hits,
+                "top_tool_sequences": [
+                    {"tools": list(sequence), "runs": runs}
+                    for sequence, runs in Counter(stats.sequences).most_common(3)
+                ],
+            }
+            for name, stats in self._stats.items()
+        }
+
+
+_iteration_controller: Optional[IterationController] = None
+
+
+def get_iteration_controller() -> IterationController:
+    """Get the process-wide iteration controller, configured from settings"""
+    global _iteration_controller
+
+    if _iteration_controller is None:
+        _iteration_controller = IterationController(
+            percentile=settings.agent_iteration_cap_percentile,
+            headroom=settings.agent_iteration_cap_headroom,
+            min_iters=settings.agent_iteration_cap_min,
+            min_samples=settings.agent_iteration_cap_min_samples,
+            window=settings.agent_iteration_cap_window,
+        )
+    return _iteration_controller
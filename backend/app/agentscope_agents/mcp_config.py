@@ -4,6 +4,7 @@ MCP Client Configuration for amap-mcp-server
 
 from agentscope.mcp import StdIOStatefulClient
 import os
+import sys
 from pathlib import Path
 
 # 确保.env被加载
@@ -11,11 +12,16 @@ env_path = Path(__file__).parent.parent.parent / '.env'
 from dotenv import load_dotenv
 load_dotenv(env_path)
 
+from config import settings
+
 
 def create_amap_mcp_client() -> StdIOStatefulClient:
     """
     Create Amap MCP client using uvx to run amap-mcp-server.
 
+    Each client spawns its own server process; request handlers should use
+    the pooled sessions from mcp_pool.get_amap_mcp_pool() instead.
+
     Returns:
         StdIOStatefulClient connected to amap-mcp-server
     """
@@ -32,5 +38,37 @@ def create_amap_mcp_client() -> StdIOStatefulClient:
     )
 
 
-# MCP server configuration mapping
-MCP_SERVERS = {"amap": {"client_factory": create_amap_mcp_client, "enabled": True}}
+def create_fake_amap_mcp_client() -> StdIOStatefulClient:
+    """
+    Create a client of the synthetic amap MCP server (fake_amap_server.py).
+
+    The server runs with this interpreter and needs no network or API key;
+    its seed and latency come from the fake_amap_* settings.
+
+    Returns:
+        StdIOStatefulClient connected to the synthetic amap server
+    """
+    return StdIOStatefulClient(
+        name="fake-amap-mcp-server",
+        command=sys.executable,
+        args=["-m", "app.agentscope_agents.fake_amap_server"],
+        cwd=str(Path(__file__).parent.parent.parent),
+        env={
+            "FAKE_AMAP_SEED": str(settings.fake_amap_seed),
+            "FAKE_AMAP_LATENCY_MEDIAN_MS": str(settings.fake_amap_latency_median_ms),
+            "FAKE_AMAP_LATENCY_P95_MS": str(settings.fake_amap_latency_p95_ms),
+            "FAKE_AMAP_ERROR_RATE": str(settings.fake_amap_error_rate),
+        },
+    )
+
+
+# MCP server configuration mapping; settings.amap_mcp_server picks the one
+# behind the amap tools, "api_key_env" names a variable the server requires
+MCP_SERVERS = {
+    "amap": {
+        "client_factory": create_amap_mcp_client,
+        "enabled": True,
+        "api_key_env": "AMAP_API_KEY",
+    },
+    "fake_amap": {"client_factory": create_fake_amap_mcp_client, "enabled": True},
+}
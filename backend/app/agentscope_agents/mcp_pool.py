@@ -0,0 +1,440 @@
+"""
+MCPSessionPool - Long-lived, health-checked pool of MCP server sessions
+
+Each stdio MCP client spawns its own server subprocess (``uvx amap-mcp-server``).
+The pool starts sessions once, leases them per tool call, pings idle sessions,
+reaps the ones that stay idle too long, respawns crashed servers and caps the
+number of concurrent sessions, so subprocess start-up stays off the request path.
+
+Every session is opened and closed by an owner task of its own: the stdio
+client enters anyio cancel scopes on connect, which must be exited by the task
+that entered them. Discarding a session only signals its owner.
+"""
+
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+import asyncio
+import logging
+import os
+import time
+
+import mcp
+from agentscope.mcp import MCPClientBase, MCPToolFunction, StatefulClientBase
+from agentscope.tool import ToolResponse
+
+from config import settings
+from app.agentscope_agents.tool_cache import ToolResultCache
+from app.agentscope_agents.usage import record_tool_call
+
+logger = logging.getLogger(__name__)
+
+
+class _PooledSession:
+    """A connected MCP client, the task that owns it and its bookkeeping"""
+
+    def __init__(self, client: StatefulClientBase):
+        self.client = client
+        self.last_used = time.monotonic()
+        self._stop = asyncio.Event()
+        self._owner: Optional[asyncio.Task] = None
+
+    async def open(self):
+        """Connect the client in a new owner task and wait until it is connected"""
+        connected = asyncio.get_running_loop().create_future()
+        self._owner = asyncio.create_task(self._own(connected))
+        try:
+            await connected
+        except asyncio.CancelledError:
+            # The owner closes the client if it connects after all
+            self._stop.set()
+            raise
+
+    async def _own(self, connected: asyncio.Future):
+        try:
+            await self.client.connect()
+        except asyncio.CancelledError:
+            connected.cancel()
+            raise
+        except Exception as e:
+            if not connected.done():
+                connected.set_exception(e)
+            return
+        if not connected.done():
+            connected.set_result(None)
+
+        await self._stop.wait()
+        try:
+            await self.client.close()
+        except Exception as e:
+            logger.debug(f"Error while closing MCP session: {e}")
+
+    def close(self):
+        """Ask the owner task to close the client"""
+        self._stop.set()
+
+    async def wait_closed(self):
+        if self._owner is not None:
+            await asyncio.wait({self._owner})
+
+
+class MCPSessionPool:
+    """
+    Pool of connected stateful MCP clients.
+
+    Usage:
+        pool = MCPSessionPool(create_amap_mcp_client, max_sessions=4)
+        await pool.start()
+
+        async with pool.lease() as client:
+            await client.session.call_tool("maps_geo", arguments={...})
+
+        await pool.close()
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], StatefulClientBase],
+        max_sessions: int = 4,
+        min_sessions: int = 1,
+        idle_timeout: float = 300.0,
+        health_check_interval: float = 30.0,
+        ping_timeout: float = 10.0,
+        lease_timeout: Optional[float] = None,
+    ):
+        """
+        Args:
+            client_factory: Creates a new, unconnected MCP client
+            max_sessions: Upper bound on live sessions (and server processes)
+            min_sessions: Sessions kept alive even when idle
+            idle_timeout: Seconds after which idle sessions above min_sessions are closed
+            health_check_interval: Seconds between background health checks
+            ping_timeout: Seconds to wait for a ping before a session is considered dead
+            lease_timeout: Seconds to wait for a free session (None waits forever)
+        """
+        if max_sessions < 1 or min_sessions > max_sessions:
+            raise ValueError(
+                "MCP pool requires 1 <= max_sessions and min_sessions <= max_sessions"
+            )
+
+        self.client_factory = client_factory
+        self.max_sessions = max_sessions
+        self.min_sessions = min_sessions
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.ping_timeout = ping_timeout
+        self.lease_timeout = lease_timeout
+
+        self._idle: List[_PooledSession] = []
+        self._slots = asyncio.Semaphore(max_sessions)
+        self._live = 0
+        self._tools: Optional[List[mcp.types.Tool]] = None
+        self._maintenance_task: Optional[asyncio.Task] = None
+        self._replacements: Set[asyncio.Task] = set()
+        self._started = False
+
+        # Metrics
+        self._spawned = 0
+        self._respawned = 0
+        self._reaped = 0
+        self._leases = 0
+        self._lease_timeouts = 0
+
+    async def start(self):
+        """Spawn min_sessions servers and start the health-check loop"""
+        if self._started:
+            return
+        self._started = True
+
+        for _ in range(self.min_sessions):
+            try:
+                self._idle.append(await self._spawn())
+            except Exception as e:
+                logger.warning(f"Failed to start MCP session: {e}")
+
+        self._maintenance_task = asyncio.create_task(self._maintain())
+        logger.info(f"MCP session pool started with {len(self._idle)} sessions")
+
+    async def close(self):
+        """Stop health checks and replacements and close every idle session"""
+        background = list(self._replacements)
+        if self._maintenance_task:
+            background.append(self._maintenance_task)
+            self._maintenance_task = None
+        for task in background:
+            task.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
+
+        closing = list(self._idle)
+        self._idle.clear()
+        for pooled in closing:
+            self._discard(pooled)
+        await asyncio.gather(*(pooled.wait_closed() for pooled in closing))
+        self._started = False
+        logger.info("MCP session pool closed")
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[StatefulClientBase]:
+        """
+        Lease a connected MCP client.
+
+        If the caller raises, the session is pinged before it goes back to the
+        pool; sessions whose server crashed are closed instead of reused and a
+        replacement is spawned in the background, holding the lease's slot
+        until it is ready.
+
+        Raises:
+            TimeoutError: No session became free within lease_timeout
+        """
+        if not self._started:
+            await self.start()
+
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.lease_timeout)
+        except asyncio.TimeoutError:
+            self._lease_timeouts += 1
+            raise TimeoutError("No MCP session available")
+
+        replacing = False
+        try:
+            pooled = self._idle.pop() if self._idle else await self._spawn()
+            self._leases += 1
+
+            healthy = True
+            try:
+                yield pooled.client
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                healthy = await self._ping(pooled)
+                raise
+            finally:
+                if healthy:
+                    pooled.last_used = time.monotonic()
+                    self._idle.append(pooled)
+                else:
+                    logger.warning("MCP session failed health check, discarding it")
+                    self._respawned += 1
+                    self._discard(pooled)
+                    self._replace_in_background()
+                    replacing = True
+        finally:
+            if not replacing:
+                self._slots.release()
+
+    async def call_tool(
+        self, name: str, arguments: Dict[str, Any]
+    ) -> mcp.types.CallToolResult:
+        """Call an MCP tool on any healthy session"""
+        async with self.lease() as client:
+            return await client.session.call_tool(name, arguments=arguments)
+
+    async def list_tools(self) -> List[mcp.types.Tool]:
+        """Tools exposed by the MCP server (fetched once and cached)"""
+        if self._tools is None:
+            async with self.lease() as client:
+                self._tools = await client.list_tools()
+        return self._tools
+
+    async def check_health(self):
+        """Reap long-idle sessions, replace dead ones and top up to min_sessions"""
+        for pooled in list(self._idle):
+            async with self._slots:
+                if pooled not in self._idle:
+                    continue
+                self._idle.remove(pooled)
+
+                expired = time.monotonic() - pooled.last_used > self.idle_timeout
+                if expired and self._live > self.min_sessions:
+                    self._reaped += 1
+                    self._discard(pooled)
+                elif await self._ping(pooled):
+                    self._idle.insert(0, pooled)
+                else:
+                    logger.warning("Idle MCP session failed health check, respawning")
+                    self._respawned += 1
+                    self._discard(pooled)
+
+        while self._live < self.min_sessions:
+            async with self._slots:
+                try:
+                    self._idle.insert(0, await self._spawn())
+                except Exception as e:
+                    logger.warning(f"Failed to respawn MCP session: {e}")
+                    break
+
+    async def _maintain(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            try:
+                await self.check_health()
+            except Exception as e:
+                logger.error(f"MCP pool health check failed: {e}")
+
+    async def _spawn(self) -> _PooledSession:
+        pooled = _PooledSession(self.client_factory())
+        await pooled.open()
+        self._live += 1
+        self._spawned += 1
+        return pooled
+
+    def _replace_in_background(self):
+        """Spawn a replacement session; the caller's slot is released once it is idle"""
+
+        async def replace():
+            try:
+                self._idle.insert(0, await self._spawn())
+            except Exception as e:
+                logger.warning(f"Failed to respawn MCP session: {e}")
+            finally:
+                self._slots.release()
+
+        task = asyncio.create_task(replace())
+        self._replacements.add(task)
+        task.add_done_callback(self._replacements.discard)
+
+    async def _ping(self, pooled: _PooledSession) -> bool:
+        try:
+            await asyncio.wait_for(
+                pooled.client.session.send_ping(), timeout=self.ping_timeout
+            )
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, pooled: _PooledSession):
+        self._live -= 1
+        pooled.close()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Session counts and lifecycle statistics"""
+        return {
+            "max_sessions": self.max_sessions,
+            "live": self._live,
+            "idle": len(self._idle),
+            "in_use": self._live - len(self._idle),
+            "leases": self._leases,
+            "lease_timeouts": self._lease_timeouts,
+            "spawned": self._spawned,
+            "respawned": self._respawned,
+            "reaped": self._reaped,
+        }
+
+
+class PooledMCPToolFunction(MCPToolFunction):
+    """
+    MCP tool function that runs each call on a session leased from the pool.
+
+    When a ToolResultCache is given, successful results are cached and repeated
+    calls with equivalent arguments skip the MCP round-trip. Every call is
+    recorded into the current agent's usage (see usage.py).
+    """
+
+    def __init__(
+        self,
+        mcp_name: str,
+        tool: mcp.types.Tool,
+        pool: MCPSessionPool,
+        wrap_tool_result: bool = True,
+        cache: Optional[ToolResultCache] = None,
+    ):
+        super().__init__(
+            mcp_name=mcp_name,
+            tool=tool,
+            wrap_tool_result=wrap_tool_result,
+            client_gen=pool.lease,
+        )
+        self.pool = pool
+        self.cache = cache
+
+    async def _call_tool(self, arguments: Dict[str, Any]) -> mcp.types.CallToolResult:
+        if self.cache is None:
+            return await self.pool.call_tool(self.name, arguments)
+
+        cached = await self.cache.get(self.name, arguments)
+        if cached is not None:
+            return mcp.types.CallToolResult.model_validate(cached)
+
+        res = await self.pool.call_tool(self.name, arguments)
+        if not res.isError:
+            await self.cache.set(self.name, arguments, res.model_dump(mode="json"))
+        return res
+
+    async def __call__(self, **kwargs: Any) -> mcp.types.CallToolResult | ToolResponse:
+        started = time.monotonic()
+        try:
+            res = await self._call_tool(kwargs)
+        except Exception:
+            record_tool_call(time.monotonic() - started, False)
+            raise
+        record_tool_call(time.monotonic() - started, not res.isError)
+
+        if self.wrap_tool_result:
+            return ToolResponse(
+                content=MCPClientBase._convert_mcp_content_to_as_blocks(res.content),
+                metadata=res.meta,
+            )
+        return res
+
+
+class PooledMCPClient(MCPClientBase):
+    """
+    MCP client facade backed by an MCPSessionPool.
+
+    It can be registered with ``Toolkit.register_mcp_client`` like any other
+    client; tool calls are spread over the pooled sessions and, when a cache is
+    given, served from the tool result cache where possible.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        pool: MCPSessionPool,
+        cache: Optional[ToolResultCache] = None,
+    ):
+        super().__init__(name=name)
+        self.pool = pool
+        self.cache = cache
+
+    async def list_tools(self) -> List[mcp.types.Tool]:
+        return await self.pool.list_tools()
+
+    async def get_callable_function(
+        self, func_name: str, wrap_tool_result: bool = True
+    ) -> PooledMCPToolFunction:
+        for tool in await self.pool.list_tools():
+            if tool.name == func_name:
+                return PooledMCPToolFunction(
+                    self.name, tool, self.pool, wrap_tool_result, cache=self.cache
+                )
+        raise ValueError(f"Tool '{func_name}' not found in the MCP server")
+
+
+_amap_pool: Optional[MCPSessionPool] = None
+
+
+def get_amap_mcp_pool() -> Optional[MCPSessionPool]:
+    """
+    Get the process-wide amap MCP session pool.
+
+    The server is settings.amap_mcp_server from mcp_config.MCP_SERVERS; None
+    when it is disabled or its API key (e.g. AMAP_API_KEY) is not set.
+    """
+    global _amap_pool
+
+    if _amap_pool is None:
+        from app.agentscope_agents.mcp_config import MCP_SERVERS
+
+        server = MCP_SERVERS.get(settings.amap_mcp_server)
+        if server is None or not server["enabled"]:
+            return None
+        if server.get("api_key_env") and not os.getenv(server["api_key_env"]):
+            return None
+
+        _amap_pool = MCPSessionPool(
+            server["client_factory"],
+            max_sessions=settings.mcp_pool_max_sessions,
+            min_sessions=settings.mcp_pool_min_sessions,
+            idle_timeout=settings.mcp_pool_idle_timeout,
+            health_check_interval=settings.mcp_pool_health_check_interval,
+        )
+    return _amap_pool
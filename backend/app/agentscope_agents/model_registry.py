@@ -0,0 +1,296 @@
+"""
+ModelClientRegistry - Process-wide registry of shared chat model clients
+
+Agent factories used to build a new OpenAIChatModel / AnthropicChatModel /
+DashScopeChatModel per agent, each with its own HTTP client, so every agent of
+every request opened fresh TLS connections to the provider. The registry hands
+out one model instance per (provider, base_url, model, api_key), and the
+OpenAI-compatible and Anthropic clients share a keep-alive connection pool.
+Every model is admitted through its provider's rate limiter (rate_limiter.py).
+
+When more than one provider is configured, create_chat_model returns a
+RoutedChatModel that routes and hedges calls across them (router.py). Routed
+models all use the OpenAI-compatible API so any provider accepts the prompt.
+
+With settings.llm_backend = "fake" every model is a scripted FakeChatModel
+(fake_model.py) for offline load tests; routing is skipped.
+"""
+
+from typing import Any, Dict, Optional, Tuple
+import logging
+import os
+
+import httpx
+from agentscope.formatter import (
+    AnthropicChatFormatter,
+    DashScopeChatFormatter,
+    FormatterBase,
+    OpenAIChatFormatter,
+)
+from agentscope.model import (
+    AnthropicChatModel,
+    ChatModelBase,
+    DashScopeChatModel,
+    OpenAIChatModel,
+)
+
+from config import settings
+from app.agentscope_agents.fake_model import create_fake_model
+from app.agentscope_agents.rate_limiter import RateLimitedChatModel, get_rate_limiter
+from app.agentscope_agents.router import (
+    ProviderRouter,
+    RoutedChatModel,
+    get_provider_router,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+PROVIDERS = ("openai", "anthropic", "tongyi")
+
+# Wire format of each provider's native client
+NATIVE_APIS = {"openai": "openai", "anthropic": "anthropic", "tongyi": "dashscope"}
+
+FORMATTERS = {
+    "openai": OpenAIChatFormatter,
+    "anthropic": AnthropicChatFormatter,
+    "dashscope": DashScopeChatFormatter,
+    "fake": OpenAIChatFormatter,
+}
+
+# (provider, api, base_url, model, api_key); api is the wire format used
+ModelKey = Tuple[str, str, str, str, Optional[str]]
+
+
+def resolve_model_key(model_config: Dict[str, str]) -> ModelKey:
+    """
+    Registry key for a model config.
+
+    The provider is taken from model_config["provider"] when present, otherwise
+    detected from the base URL and model name like the agent factories always
+    did: anthropic in the URL, tongyi in the URL or qwen in the model name, and
+    OpenAI-compatible for everything else. model_config["api"] may force the
+    "openai" wire format for providers with an OpenAI-compatible endpoint.
+    The fake LLM backend replaces the wire format with "fake".
+    """
+    base_url = model_config.get("base_url") or DEFAULT_BASE_URL
+    model_name = model_config.get("model") or "gpt-4"
+    api_key = model_config.get("api_key") or os.getenv("OPENAI_API_KEY")
+
+    provider = model_config.get("provider")
+    if provider not in PROVIDERS:
+        if "anthropic" in base_url.lower():
+            provider = "anthropic"
+        elif "tongyi" in base_url.lower() or "qwen" in model_name.lower():
+            provider = "tongyi"
+        else:
+            provider = "openai"
+    api = model_config.get("api") or NATIVE_APIS[provider]
+    if settings.llm_backend == "fake":
+        api = "fake"
+    return provider, api, base_url, model_name, api_key
+
+
+class ModelClientRegistry:
+    """
+    Shared chat model instances backed by a pooled HTTP client.
+
+    Usage:
+        registry = ModelClientRegistry(max_connections=100)
+        model, formatter = registry.get(model_config)
+        ...
+        await registry.aclose()
+
+    Model instances hold no per-request state, so agents of different
+    coordinators and requests can share them safely. DashScope models use the
+    dashscope SDK's own transport and are shared but not pooled.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 60.0,
+        timeout: float = 120.0,
+    ):
+        """
+        Args:
+            max_connections: Upper bound on open connections across providers
+            max_keepalive_connections: Idle connections kept open for reuse
+            keepalive_expiry: Seconds an idle connection is kept open
+            timeout: Request timeout in seconds
+        """
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = timeout
+
+        self._models: Dict[ModelKey, ChatModelBase] = {}
+        self._routed: Dict[Tuple[ModelKey, ...], RoutedChatModel] = {}
+        self._http_client: Optional[httpx.AsyncClient] = None
+
+        # Metrics
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """The shared keep-alive HTTP client, created on first use"""
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=httpx.Timeout(self.timeout, connect=10.0),
+                follow_redirects=True,
+            )
+        return self._http_client
+
+    def get(
+        self, model_config: Dict[str, str]
+    ) -> Tuple[ChatModelBase, Optional[FormatterBase]]:
+        """Shared model for a config, and a fresh formatter for the agent"""
+        key = resolve_model_key(model_config)
+        model = self._models.get(key)
+        if model is None:
+            self._misses += 1
+            model = self._models[key] = RateLimitedChatModel(
+                self._build(*key), get_rate_limiter(key[0])
+            )
+            logger.info(f"Created shared {key[0]} model client for {key[3]}")
+        else:
+            self._hits += 1
+
+        return model, FORMATTERS[key[1]]()
+
+    def get_routed(
+        self, configs: Dict[str, Dict[str, str]], router: ProviderRouter
+    ) -> Tuple[RoutedChatModel, FormatterBase]:
+        """Shared RoutedChatModel over the OpenAI-compatible models of configs"""
+        key = tuple(resolve_model_key(config) for config in configs.values())
+        model = self._routed.get(key)
+        if model is None:
+            models = {name: self.get(config)[0] for name, config in configs.items()}
+            model = self._routed[key] = RoutedChatModel(models, router)
+        return model, OpenAIChatFormatter()
+
+    def _build(
+        self,
+        provider: str,
+        api: str,
+        base_url: str,
+        model_name: str,
+        api_key: Optional[str],
+    ) -> ChatModelBase:
+        if api == "anthropic":
+            return AnthropicChatModel(
+                model_name=model_name,
+                api_key=api_key,
+                client_args={"http_client": self.http_client},
+            )
+        if api == "dashscope":
+            return DashScopeChatModel(model_name=model_name, api_key=api_key)
+        if api == "fake":
+            return create_fake_model(model_name)
+
+        client_args: Dict[str, Any] = {"http_client": self.http_client}
+        if base_url != DEFAULT_BASE_URL:
+            client_args["base_url"] = base_url
+        return OpenAIChatModel(
+            model_name=model_name, api_key=api_key, client_args=client_args
+        )
+
+    async def aclose(self):
+        """Drop all models and close the pooled HTTP connections"""
+        self._models.clear()
+        self._routed.clear()
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "models": len(self._models),
+            "routed_models": len(self._routed),
+            "hits": self._hits,
+            "misses": self._misses,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+        }
+
+
+_model_registry: Optional[ModelClientRegistry] = None
+
+
+def get_model_registry() -> ModelClientRegistry:
+    """Get the process-wide model client registry, configured from settings"""
+    global _model_registry
+
+    if _model_registry is None:
+        _model_registry = ModelClientRegistry(
+            max_connections=settings.llm_http_max_connections,
+            max_keepalive_connections=settings.llm_http_max_keepalive_connections,
+            keepalive_expiry=settings.llm_http_keepalive_expiry,
+            timeout=settings.llm_http_timeout,
+        )
+    return _model_registry
+
+
+def routing_configs(model_config: Dict[str, str]) -> Dict[str, Dict[str, str]]:
+    """
+    OpenAI-compatible model configs to route an agent's calls over.
+
+    The agent's own provider comes first, followed by every other provider that
+    has an API key configured in AIProviderConfig and a model in the agent's
+    tier (see get_tier_model), so hedges and failovers keep the agent's tier.
+    """
+    from app.ai_providers import get_provider_config, get_tier_model
+
+    provider, api, base_url, model_name, api_key = resolve_model_key(model_config)
+    if api != "openai":
+        base_url = get_provider_config(provider)["compatible_base_url"]
+    configs = {
+        provider: {
+            "provider": provider,
+            "api": "openai",
+            "base_url": base_url,
+            "model": model_name,
+            "api_key": api_key,
+        }
+    }
+    for name in PROVIDERS:
+        config = get_provider_config(name)
+        if name in configs or not config.get("api_key"):
+            continue
+        tier_model = get_tier_model(
+            provider, model_name, name, model_config.get("tier")
+        )
+        if tier_model is None:
+            logger.debug(f"No {name} model in the tier of {model_name}, not routed")
+            continue
+        configs[name] = {
+            "provider": name,
+            "api": "openai",
+            "base_url": config["compatible_base_url"],
+            "model": tier_model,
+            "api_key": config["api_key"],
+        }
+    return configs
+
+
+def create_chat_model(
+    model_config: Dict[str, str],
+) -> Tuple[ChatModelBase, Optional[FormatterBase]]:
+    """
+    Model and formatter for an agent, served from the process-wide registry.
+
+    With routing enabled and at least two providers configured, the model is a
+    RoutedChatModel over all of them.
+    """
+    registry = get_model_registry()
+    if settings.llm_routing_enabled and settings.llm_backend != "fake":
+        configs = routing_configs(model_config)
+        if len(configs) > 1:
+            return registry.get_routed(configs, get_provider_router())
+    return registry.get(model_config)
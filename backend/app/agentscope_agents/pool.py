@@ -0,0 +1,236 @@
+"""
+CoordinatorPool - Process-wide pool of pre-built AgentCoordinator instances
+
+Building a coordinator constructs seven ReActAgents, their model clients and a
+Toolkit. The pool builds them once and leases them per planning request; on
+return every agent's memory is cleared so no per-user state leaks between leases.
+"""
+
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+import asyncio
+import logging
+import time
+
+from config import settings
+from app.agentscope_agents.coordinator import AgentCoordinator, AGENT_NAMES
+from app.agentscope_agents.deadline import get_fallback_cache
+from app.agentscope_agents.result_cache import get_recommendation_cache
+from app.agentscope_agents.tool_cache import ToolResultCache
+
+logger = logging.getLogger(__name__)
+
+
+class CoordinatorPool:
+    """
+    Fixed-size pool of warm AgentCoordinator instances.
+
+    Usage:
+        pool = CoordinatorPool(model_configs, size=4)
+        await pool.start()
+
+        async with pool.lease() as coordinator:
+            async for event in coordinator.run_graph(trip_data):
+                ...
+    """
+
+    def __init__(
+        self,
+        model_configs: Dict[str, Dict[str, str]],
+        size: int = 4,
+        lease_timeout: Optional[float] = None,
+        mcp_clients_factory: Optional[Callable[[], Optional[Dict[str, Any]]]] = None,
+        result_cache: Optional[ToolResultCache] = None,
+        fallback_cache: Optional[ToolResultCache] = None,
+    ):
+        """
+        Args:
+            model_configs: Model configs passed to every AgentCoordinator
+            size: Number of coordinators kept warm
+            lease_timeout: Seconds to wait for a free coordinator (None waits forever)
+            mcp_clients_factory: Returns the MCP clients for one coordinator, e.g.
+                {"amap": client}; called once per coordinator at start-up
+            result_cache: Agent result cache shared by all coordinators
+            fallback_cache: Last-good result store shared by all coordinators
+        """
+        if size < 1:
+            raise ValueError("Coordinator pool size must be at least 1")
+
+        self.model_configs = model_configs
+        self.size = size
+        self.lease_timeout = lease_timeout
+        self.mcp_clients_factory = mcp_clients_factory
+        self.result_cache = result_cache
+        self.fallback_cache = fallback_cache
+
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._coordinators: List[AgentCoordinator] = []
+        self._started = False
+        self._start_lock = asyncio.Lock()
+        # Slots whose coordinator was dropped and is rebuilt on a later lease
+        self._missing = 0
+
+        # Lease-wait metrics
+        self._leases = 0
+        self._timeouts = 0
+        self._waiting = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    async def start(self):
+        """Build and initialize all coordinators"""
+        async with self._start_lock:
+            if self._started:
+                return
+
+            logger.info(f"Warming up {self.size} agent coordinators...")
+            for _ in range(self.size):
+                coordinator = await self._build()
+                self._coordinators.append(coordinator)
+                self._idle.put_nowait(coordinator)
+
+            self._started = True
+            logger.info(f"Coordinator pool ready with {self.size} coordinators")
+
+    async def _build(self) -> AgentCoordinator:
+        coordinator = AgentCoordinator(
+            self.model_configs,
+            result_cache=self.result_cache,
+            fallback_cache=self.fallback_cache,
+        )
+        mcp_clients = self.mcp_clients_factory() if self.mcp_clients_factory else None
+        await coordinator.initialize(mcp_clients=mcp_clients)
+        return coordinator
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[AgentCoordinator]:
+        """
+        Lease a coordinator for the duration of one planning request.
+
+        Raises:
+            TimeoutError: No coordinator became free within lease_timeout
+        """
+        if not self._started:
+            await self.start()
+
+        wait_started = time.monotonic()
+        self._waiting += 1
+        try:
+            coordinator = await self._replace_missing()
+            if coordinator is None:
+                coordinator = await asyncio.wait_for(
+                    self._idle.get(), timeout=self.lease_timeout
+                )
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            raise TimeoutError("No agent coordinator available")
+        finally:
+            self._waiting -= 1
+
+        waited = time.monotonic() - wait_started
+        self._leases += 1
+        self._total_wait += waited
+        self._max_wait = max(self._max_wait, waited)
+
+        try:
+            yield coordinator
+        finally:
+            # Only a coordinator that was reset (or freshly built) goes back to
+            # the pool; anything else still holds this request's state
+            clean = None
+            try:
+                await coordinator.reset()
+                clean = coordinator
+            except Exception as e:
+                logger.warning(f"Failed to reset coordinator, rebuilding it: {e}")
+                try:
+                    clean = await self._rebuild(coordinator)
+                except Exception as e:
+                    logger.error(f"Failed to rebuild coordinator, dropping it: {e}")
+            finally:
+                if clean is not None:
+                    self._idle.put_nowait(clean)
+                else:
+                    self._coordinators.remove(coordinator)
+                    self._missing += 1
+
+    async def _rebuild(self, broken: AgentCoordinator) -> AgentCoordinator:
+        coordinator = await self._build()
+        self._coordinators[self._coordinators.index(broken)] = coordinator
+        return coordinator
+
+    async def _replace_missing(self) -> Optional[AgentCoordinator]:
+        """
+        Build a coordinator for a dropped slot, if there is one.
+
+        Returns None when no slot is missing, or when the build fails while
+        other coordinators can still serve the lease.
+        """
+        if not self._missing:
+            return None
+
+        self._missing -= 1
+        try:
+            coordinator = await self._build()
+        except BaseException as e:
+            self._missing += 1
+            if not self._coordinators or not isinstance(e, Exception):
+                raise
+            logger.error(f"Failed to rebuild dropped coordinator: {e}")
+            return None
+        self._coordinators.append(coordinator)
+        return coordinator
+
+    def metrics(self) -> Dict[str, Any]:
+        """Pool occupancy and lease-wait statistics"""
+        return {
+            "size": self.size,
+            "idle": self._idle.qsize(),
+            "in_use": len(self._coordinators) - self._idle.qsize(),
+            "missing": self._missing,
+            "waiting": self._waiting,
+            "leases": self._leases,
+            "lease_timeouts": self._timeouts,
+            "avg_wait_ms": (
+                round(self._total_wait / self._leases * 1000, 2)
+                if self._leases
+                else 0.0
+            ),
+            "max_wait_ms": round(self._max_wait * 1000, 2),
+        }
+
+
+def _amap_mcp_clients() -> Optional[Dict[str, Any]]:
+    from app.agentscope_agents.mcp_pool import PooledMCPClient, get_amap_mcp_pool
+    from app.agentscope_agents.tool_cache import get_tool_cache
+
+    amap_pool = get_amap_mcp_pool()
+    if amap_pool is None:
+        return None
+    return {
+        "amap": PooledMCPClient("amap-mcp-server", amap_pool, cache=get_tool_cache())
+    }
+
+
+_coordinator_pool: Optional[CoordinatorPool] = None
+
+
+def get_coordinator_pool() -> CoordinatorPool:
+    """Get the process-wide coordinator pool, sized from settings"""
+    global _coordinator_pool
+
+    if _coordinator_pool is None:
+        from app.ai_providers import get_agent_model_config
+
+        # Each agent uses its tier from settings.agent_models; calls are routed
+        # across every configured provider (see router.py)
+        model_configs = {name: get_agent_model_config(name) for name in AGENT_NAMES}
+        _coordinator_pool = CoordinatorPool(
+            model_configs,
+            size=settings.coordinator_pool_size,
+            lease_timeout=settings.coordinator_pool_lease_timeout,
+            mcp_clients_factory=_amap_mcp_clients,
+            result_cache=get_recommendation_cache(),
+            fallback_cache=get_fallback_cache(),
+        )
+    return _coordinator_pool
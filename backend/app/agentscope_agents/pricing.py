@@ -0,0 +1,34 @@
+"""
+Model price lookup for token cost estimates
+
+Prices come from settings.model_prices (USD per 1M tokens) and are matched on
+the longest model-name prefix, so dated model versions such as
+"gpt-4o-mini-2024-07-18" use the "gpt-4o-mini" price.
+"""
+
+from typing import Dict, Optional
+
+from config import settings
+
+
+def model_price(model_name: str) -> Optional[Dict[str, float]]:
+    """Input/output price per 1M tokens of a model, or None when unknown"""
+    matches = [
+        prefix for prefix in settings.model_prices if model_name.startswith(prefix)
+    ]
+    if not matches:
+        return None
+    return settings.model_prices[max(matches, key=len)]
+
+
+def model_cost(
+    model_name: str, input_tokens: int, output_tokens: int
+) -> Optional[float]:
+    """Estimated cost in USD of one call, or None when the model has no price"""
+    price = model_price(model_name)
+    if price is None:
+        return None
+    return (
+        input_tokens * price.get("input", 0.0)
+        + output_tokens * price.get("output", 0.0)
+    ) / 1_000_000
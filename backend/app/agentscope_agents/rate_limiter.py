@@ -0,0 +1,195 @@
+"""
+Per-provider admission control for LLM calls
+
+Each provider gets a requests-per-minute and a tokens-per-minute token bucket,
+configured through AIProviderConfig. A call that would exceed either bucket
+waits in a FIFO queue until enough capacity has refilled instead of going out
+and failing with a 429, so concurrent plans can use the whole quota.
+"""
+
+from typing import Any, Dict, Optional
+import asyncio
+import json
+import logging
+import time
+
+from agentscope.model import ChatModelBase
+
+from app.agentscope_agents.usage import record_llm_response
+
+logger = logging.getLogger(__name__)
+
+# Prompt size estimate: mixed Chinese/English text averages 2-4 chars per token
+CHARS_PER_TOKEN = 3
+# Tokens reserved for the completion of every call
+COMPLETION_TOKEN_RESERVE = 1000
+
+
+class TokenBucket:
+    """Bucket refilled continuously up to capacity over one minute"""
+
+    def __init__(self, per_minute: int):
+        if per_minute <= 0:
+            raise ValueError("Token bucket rate must be positive")
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def delay_for(self, amount: float) -> float:
+        """Seconds until amount (capped at capacity) is available"""
+        self._refill()
+        missing = min(amount, self.capacity) - self.tokens
+        return max(0.0, missing / self.rate)
+
+    def consume(self, amount: float):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def drain(self):
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+
+class ProviderRateLimiter:
+    """
+    RPM and TPM admission for one provider.
+
+    Usage:
+        limiter = ProviderRateLimiter("openai", rpm=500, tpm=90000)
+        await limiter.acquire(estimated_tokens)
+
+    Waiters are admitted in arrival order. A limit of 0 or None disables
+    that bucket.
+    """
+
+    def __init__(
+        self, provider: str, rpm: Optional[int] = None, tpm: Optional[int] = None
+    ):
+        self.provider = provider
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self._lock = asyncio.Lock()
+
+        # Metrics
+        self._waiting = 0
+        self._admitted = 0
+        self._delayed = 0
+        self._throttled = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    async def acquire(self, tokens: int = 0):
+        """Wait until one request and the given number of tokens are available"""
+        if self.requests is None and self.tokens is None:
+            self._admitted += 1
+            return
+
+        started = time.monotonic()
+        self._waiting += 1
+        try:
+            async with self._lock:
+                while True:
+                    delay = max(
+                        self.requests.delay_for(1) if self.requests else 0.0,
+                        self.tokens.delay_for(tokens) if self.tokens else 0.0,
+                    )
+                    if delay <= 0:
+                        break
+                    await asyncio.sleep(delay)
+
+                if self.requests:
+                    self.requests.consume(1)
+                if self.tokens:
+                    self.tokens.consume(tokens)
+        finally:
+            self._waiting -= 1
+
+        waited = time.monotonic() - started
+        self._admitted += 1
+        self._total_wait += waited
+        self._max_wait = max(self._max_wait, waited)
+        if waited > 0.001:
+            self._delayed += 1
+
+    def throttled(self):
+        """The provider answered 429: stop admitting until the buckets refill"""
+        self._throttled += 1
+        for bucket in (self.requests, self.tokens):
+            if bucket:
+                bucket.drain()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "rpm_limit": int(self.requests.capacity) if self.requests else None,
+            "tpm_limit": int(self.tokens.capacity) if self.tokens else None,
+            "queue_depth": self._waiting,
+            "admitted": self._admitted,
+            "delayed": self._delayed,
+            "throttled": self._throttled,
+            "avg_wait_ms": (
+                round(self._total_wait / self._admitted * 1000, 2)
+                if self._admitted
+                else 0.0
+            ),
+            "max_wait_ms": round(self._max_wait * 1000, 2),
+        }
+
+
+def estimate_tokens(messages: Any) -> int:
+    """Token estimate for a call: prompt size plus the completion reserve"""
+    text = json.dumps(messages, ensure_ascii=False, default=str)
+    return len(text) // CHARS_PER_TOKEN + COMPLETION_TOKEN_RESERVE
+
+
+class RateLimitedChatModel(ChatModelBase):
+    """
+    Chat model wrapper that admits every call through a ProviderRateLimiter.
+
+    Calls that the provider rejects with HTTP 429 drain the buckets so queued
+    calls back off together instead of retrying into the limit. Answered calls
+    are recorded into the current agent's usage (see usage.py).
+    """
+
+    def __init__(self, model: ChatModelBase, limiter: ProviderRateLimiter):
+        super().__init__(model.model_name, model.stream)
+        self.model = model
+        self.limiter = limiter
+
+    async def __call__(self, messages: Any = None, *args: Any, **kwargs: Any) -> Any:
+        await self.limiter.acquire(estimate_tokens(messages))
+        started = time.monotonic()
+        try:
+            response = await self.model(messages, *args, **kwargs)
+        except Exception as e:
+            if getattr(e, "status_code", None) == 429:
+                logger.warning(f"{self.limiter.provider} rate limited the call: {e}")
+                self.limiter.throttled()
+            raise
+        return record_llm_response(self.model_name, response, started)
+
+
+_rate_limiters: Dict[str, ProviderRateLimiter] = {}
+
+
+def get_rate_limiter(provider: str) -> ProviderRateLimiter:
+    """Get the process-wide limiter for a provider, configured from AIProviderConfig"""
+    if provider not in _rate_limiters:
+        from app.ai_providers import get_provider_config
+
+        config = get_provider_config(provider) or {}
+        _rate_limiters[provider] = ProviderRateLimiter(
+            provider, rpm=config.get("rpm_limit"), tpm=config.get("tpm_limit")
+        )
+    return _rate_limiters[provider]
+
+
+def rate_limiter_metrics() -> Dict[str, Any]:
+    return {name: limiter.metrics() for name, limiter in _rate_limiters.items()}
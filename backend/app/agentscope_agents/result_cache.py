@@ -0,0 +1,128 @@
+"""
+Exact-match recommendation cache for specialist agent outputs
+
+Agent results are cached on agent name, system-prompt hash, model name and a
+canonicalized task payload. Trip dates can be bucketed and budgets rounded so
+near-identical requests (same destination, travelers and budget tier) share a
+cache entry. Agents whose output names concrete dates (DATED_AGENTS) are always
+keyed on the exact dates, and agents whose output is priced against the budget
+(BUDGETED_AGENTS) on the exact budget. Storage reuses ToolResultCache with the
+agent name as the "tool".
+"""
+
+from datetime import date
+from typing import Any, Dict, Optional
+import hashlib
+
+from config import settings
+from app.agentscope_agents.tool_cache import PostgresToolCacheBackend, ToolResultCache
+
+# Agents whose results contain dates (forecasts, day plans, per-day costs):
+# their cache keys never bucket trip dates
+DATED_AGENTS = frozenset({"weather", "budget", "planner"})
+
+# Agents whose results are sized to the budget (allocations, priced day plans):
+# their cache keys never round budget values
+BUDGETED_AGENTS = frozenset({"budget", "planner"})
+
+
+def _bucket_date(value: Any, bucket_days: int) -> Any:
+    if not value or bucket_days <= 1:
+        return value
+    try:
+        day = date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return value
+    return f"bucket-{day.toordinal() // bucket_days}"
+
+
+def _trip_days(start: Any, end: Any) -> Optional[int]:
+    try:
+        return (
+            date.fromisoformat(str(end)[:10]) - date.fromisoformat(str(start)[:10])
+        ).days + 1
+    except (TypeError, ValueError):
+        return None
+
+
+def _bucket_budget(budget: Any, budget_bucket: int) -> Any:
+    if not isinstance(budget, dict) or budget_bucket <= 1:
+        return budget
+    return {
+        key: (
+            int(value) // budget_bucket * budget_bucket
+            if isinstance(value, (int, float)) and not isinstance(value, bool)
+            else value
+        )
+        for key, value in budget.items()
+    }
+
+
+def canonicalize_trip_data(
+    trip_data: Dict[str, Any], date_bucket_days: int = 1, budget_bucket: int = 1
+) -> Dict[str, Any]:
+    """
+    Reduce trip_data to the fields that influence agent recommendations.
+
+    The title is dropped, destinations are stripped, dates are replaced by
+    date_bucket_days-wide buckets plus the trip length, and numeric budget
+    values are rounded down to budget_bucket.
+    """
+    start, end = trip_data.get("start_date"), trip_data.get("end_date")
+    return {
+        "destinations": [str(d).strip() for d in trip_data.get("destinations", [])],
+        "start_date": _bucket_date(start, date_bucket_days),
+        "days": _trip_days(start, end),
+        "travelers": trip_data.get("travelers", 2),
+        "budget": _bucket_budget(trip_data.get("budget", {}), budget_bucket),
+        "preferences": trip_data.get("preferences", {}),
+    }
+
+
+def recommendation_cache_args(
+    agent_name: str,
+    sys_prompt: str,
+    model_name: str,
+    task_data: Dict[str, Any],
+    date_bucket_days: int = 1,
+    budget_bucket: int = 1,
+) -> Dict[str, Any]:
+    """Cache key material for one agent call"""
+    if agent_name in DATED_AGENTS:
+        date_bucket_days = 1
+    if agent_name in BUDGETED_AGENTS:
+        budget_bucket = 1
+    payload = dict(task_data)
+    if isinstance(payload.get("trip_data"), dict):
+        payload["trip_data"] = canonicalize_trip_data(
+            payload["trip_data"], date_bucket_days, budget_bucket
+        )
+    if "budget" in payload and "trip_data" not in payload:
+        payload["budget"] = _bucket_budget(payload["budget"], budget_bucket)
+
+    return {
+        "agent": agent_name,
+        "prompt": hashlib.sha256(sys_prompt.encode()).hexdigest(),
+        "model": model_name,
+        "payload": payload,
+    }
+
+
+_recommendation_cache: Optional[ToolResultCache] = None
+
+
+def get_recommendation_cache() -> Optional[ToolResultCache]:
+    """Get the process-wide agent result cache (None when disabled in settings)"""
+    global _recommendation_cache
+
+    if _recommendation_cache is None and settings.recommendation_cache_enabled:
+        _recommendation_cache = ToolResultCache(
+            max_entries=settings.recommendation_cache_max_entries,
+            default_ttl=settings.recommendation_cache_ttl,
+            backend=(
+                PostgresToolCacheBackend()
+                if settings.recommendation_cache_postgres_enabled
+                else None
+            ),
+        )
+    return _recommendation_cache
@@ -0,0 +1,236 @@
+"""
+Latency-aware routing and hedging of LLM calls across providers
+
+The router keeps a rolling window of latency and outcome per provider. Each
+call goes to the fastest healthy provider first. If it has not answered by the
+provider's hedge percentile (p95 by default), a hedged duplicate goes to the
+next provider, and the first successful answer wins. A failed call fails over
+to the next provider at once. A brownout at one provider therefore costs one
+hedge delay instead of stalling every plan.
+
+Latency is measured up to the point where the model call returns. For
+streaming models that is the time to the first response chunk.
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import time
+
+from agentscope.model import ChatModelBase
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderStats:
+    """Rolling latency and error statistics of one provider"""
+
+    def __init__(self, window: int = 50):
+        self.samples: Deque[Tuple[float, bool]] = deque(maxlen=window)
+
+    def record(self, latency: float, ok: bool):
+        self.samples.append((latency, ok))
+
+    def error_rate(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(1 for _, ok in self.samples if not ok) / len(self.samples)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        latencies = sorted(latency for latency, ok in self.samples if ok)
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, int(fraction * len(latencies)))
+        return latencies[index]
+
+
+class ProviderRouter:
+    """
+    Ranks providers by health and latency and decides when to hedge.
+
+    A provider is unhealthy once min_samples calls are recorded and its error
+    rate exceeds max_error_rate; unhealthy providers are only tried after all
+    healthy ones. Providers without latency samples rank first so they get
+    measured.
+    """
+
+    def __init__(
+        self,
+        window: int = 50,
+        hedge_percentile: float = 0.95,
+        min_hedge_delay: float = 2.0,
+        max_error_rate: float = 0.5,
+        min_samples: int = 5,
+    ):
+        self.window = window
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_delay = min_hedge_delay
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+
+        self._stats: Dict[str, ProviderStats] = {}
+
+        # Metrics
+        self._calls = 0
+        self._hedges = 0
+        self._hedge_wins = 0
+        self._failovers = 0
+
+    def stats(self, provider: str) -> ProviderStats:
+        if provider not in self._stats:
+            self._stats[provider] = ProviderStats(self.window)
+        return self._stats[provider]
+
+    def healthy(self, provider: str) -> bool:
+        stats = self.stats(provider)
+        return (
+            len(stats.samples) < self.min_samples
+            or stats.error_rate() <= self.max_error_rate
+        )
+
+    def rank(self, providers: List[str]) -> List[str]:
+        """Providers in the order they should be tried (stable for ties)"""
+
+        def score(provider: str):
+            median = self.stats(provider).percentile(0.5)
+            return (not self.healthy(provider), median or 0.0)
+
+        return sorted(providers, key=score)
+
+    def hedge_delay(self, provider: str) -> float:
+        """Seconds to wait for a provider before sending a hedged duplicate"""
+        stats = self.stats(provider)
+        threshold = None
+        if len(stats.samples) >= self.min_samples:
+            threshold = stats.percentile(self.hedge_percentile)
+        return max(self.min_hedge_delay, threshold or 0.0)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "calls": self._calls,
+            "hedges": self._hedges,
+            "hedge_wins": self._hedge_wins,
+            "failovers": self._failovers,
+            "providers": {
+                name: {
+                    "samples": len(stats.samples),
+                    "healthy": self.healthy(name),
+                    "error_rate": round(stats.error_rate(), 4),
+                    "p50_ms": _ms(stats.percentile(0.5)),
+                    "p95_ms": _ms(stats.percentile(0.95)),
+                }
+                for name, stats in self._stats.items()
+            },
+        }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+
+async def _discard(result: Any):
+    """Close a losing streaming response so its connection is released"""
+    aclose = getattr(result, "aclose", None)
+    if aclose is not None:
+        try:
+            await aclose()
+        except Exception:
+            pass
+
+
+class RoutedChatModel(ChatModelBase):
+    """
+    Chat model that spreads calls over equivalent models of several providers.
+
+    All models must accept the same formatted prompt, i.e. speak the same API
+    format (see model_registry.create_chat_model).
+    """
+
+    def __init__(self, models: Dict[str, ChatModelBase], router: ProviderRouter):
+        if not models:
+            raise ValueError("RoutedChatModel needs at least one model")
+        primary = next(iter(models.values()))
+        super().__init__(primary.model_name, primary.stream)
+        self.models = models
+        self.router = router
+
+    async def _attempt(self, provider: str, args: tuple, kwargs: dict) -> Any:
+        started = time.monotonic()
+        try:
+            result = await self.models[provider](*args, **kwargs)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.router.stats(provider).record(time.monotonic() - started, False)
+            raise
+        self.router.stats(provider).record(time.monotonic() - started, True)
+        return result
+
+    async def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        router = self.router
+        router._calls += 1
+        remaining = router.rank(list(self.models))
+        pending: Dict[asyncio.Task, str] = {}
+        last_error: Optional[Exception] = None
+
+        def launch():
+            provider = remaining.pop(0)
+            task = asyncio.create_task(self._attempt(provider, args, kwargs))
+            pending[task] = provider
+            return provider
+
+        primary = latest = launch()
+        hedged = False
+        try:
+            while pending:
+                timeout = router.hedge_delay(latest) if remaining else None
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    router._hedges += 1
+                    hedged = True
+                    latest = launch()
+                    logger.info(f"LLM call slow, hedging with {latest}")
+                    continue
+
+                for task in done:
+                    provider = pending.pop(task)
+                    if task.exception() is None:
+                        if hedged and provider != primary:
+                            router._hedge_wins += 1
+                        return task.result()
+                    last_error = task.exception()
+                    logger.warning(f"LLM call to {provider} failed: {last_error}")
+
+                if not pending and remaining:
+                    router._failovers += 1
+                    latest = launch()
+            raise last_error
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                for result in await asyncio.gather(*pending, return_exceptions=True):
+                    if not isinstance(result, BaseException):
+                        await _discard(result)
+
+
+_provider_router: Optional[ProviderRouter] = None
+
+
+def get_provider_router() -> ProviderRouter:
+    """Get the process-wide provider router, configured from settings"""
+    global _provider_router
+
+    if _provider_router is None:
+        _provider_router = ProviderRouter(
+            window=settings.llm_router_window,
+            hedge_percentile=settings.llm_hedge_percentile,
+            min_hedge_delay=settings.llm_hedge_min_delay,
+            max_error_rate=settings.llm_router_max_error_rate,
+        )
+    return _provider_router
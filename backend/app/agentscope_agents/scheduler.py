@@ -0,0 +1,197 @@
+"""
+Dependency-graph scheduler for multi-agent trip planning
+
+Each agent declares the results it consumes. Agents without pending inputs run
+concurrently, and dependents start as soon as their last input completes, so a
+plan takes roughly as long as its critical path instead of the sum of all agents.
+"""
+
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List
+import asyncio
+import logging
+
+from app.agentscope_agents.compaction import compact_results
+
+logger = logging.getLogger(__name__)
+
+# (trip_data, results of upstream agents) -> task payload sent to the agent
+PayloadBuilder = Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]]
+
+# (agent name, payload) -> agent result
+AgentRunner = Callable[[str, Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+class AgentNode:
+    """A single agent in the planning graph and the inputs it waits for"""
+
+    def __init__(
+        self,
+        name: str,
+        build_payload: PayloadBuilder,
+        depends_on: Iterable[str] = (),
+    ):
+        self.name = name
+        self.build_payload = build_payload
+        self.depends_on = tuple(depends_on)
+
+
+class AgentGraph:
+    """
+    Directed acyclic graph of agents.
+
+    Nodes are validated on construction: every dependency must be a node of the
+    graph and the graph must not contain cycles.
+    """
+
+    def __init__(self, nodes: Iterable[AgentNode]):
+        self.nodes: Dict[str, AgentNode] = {}
+        for node in nodes:
+            if node.name in self.nodes:
+                raise ValueError(f"Duplicate agent node: {node.name}")
+            self.nodes[node.name] = node
+
+        for node in self.nodes.values():
+            for dep in node.depends_on:
+                if dep not in self.nodes:
+                    raise ValueError(f"{node.name} depends on unknown agent: {dep}")
+
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        remaining = {name: set(node.depends_on) for name, node in self.nodes.items()}
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Cycle detected between agents: {sorted(remaining)}")
+            for name in ready:
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+
+    def ready_nodes(
+        self, completed: Iterable[str], started: Iterable[str]
+    ) -> List[AgentNode]:
+        """Nodes whose dependencies are all completed and that were not started yet"""
+        completed = set(completed)
+        started = set(started)
+        return [
+            node
+            for name, node in self.nodes.items()
+            if name not in started and completed.issuperset(node.depends_on)
+        ]
+
+
+class AgentGraphExecutor:
+    """
+    Runs an AgentGraph and reports progress as an async stream of events.
+
+    Events are dictionaries:
+        {"event": "started", "agent": name}
+        {"event": "completed", "agent": name, "result": {...}}
+
+    Completion events are emitted in the order agents actually finish. If the
+    consumer stops iterating, agents that are still running are cancelled.
+    """
+
+    def __init__(self, graph: AgentGraph, runner: AgentRunner):
+        self.graph = graph
+        self.runner = runner
+
+    async def run(self, trip_data: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        results: Dict[str, Any] = {}
+        running: Dict[asyncio.Task, str] = {}
+
+        try:
+            while len(results) < len(self.graph.nodes):
+                started = set(results) | set(running.values())
+                for node in self.graph.ready_nodes(results, started):
+                    payload = node.build_payload(trip_data, results)
+                    task = asyncio.create_task(self.runner(node.name, payload))
+                    running[task] = node.name
+                    yield {"event": "started", "agent": node.name}
+
+                done, _ = await asyncio.wait(
+                    running.keys(), return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    name = running.pop(task)
+                    try:
+                        results[name] = task.result()
+                    except Exception as e:
+                        logger.error(f"[{name}] failed in graph executor: {e}")
+                        results[name] = {"error": str(e)}
+                    yield {"event": "completed", "agent": name, "result": results[name]}
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running.keys(), return_exceptions=True)
+
+
+def _recommend_payload(
+    trip_data: Dict[str, Any], results: Dict[str, Any]
+) -> Dict[str, Any]:
+    return {"action": "recommend", "trip_data": trip_data}
+
+
+def _weather_payload(
+    trip_data: Dict[str, Any], results: Dict[str, Any]
+) -> Dict[str, Any]:
+    return {"action": "query", "trip_data": trip_data}
+
+
+def _budget_payload(
+    trip_data: Dict[str, Any], results: Dict[str, Any]
+) -> Dict[str, Any]:
+    results = compact_results(results)
+    return {
+        "action": "analyze",
+        "transport": results["transport"],
+        "accommodation": results["accommodation"],
+        "attractions": results["attraction"],
+        "food": results["food"],
+        "weather": results["weather"],
+        "budget": trip_data.get("budget", {}),
+    }
+
+
+def _planner_payload(
+    trip_data: Dict[str, Any], results: Dict[str, Any]
+) -> Dict[str, Any]:
+    results = compact_results(results)
+    return {
+        "action": "generate_itinerary",
+        "trip_data": trip_data,
+        "transport_recommendations": results["transport"],
+        "accommodation_recommendations": results["accommodation"],
+        "attraction_recommendations": results["attraction"],
+        "food_recommendations": results["food"],
+        "weather_recommendations": results["weather"],
+        "budget_analysis": results["budget"],
+    }
+
+
+SPECIALIST_AGENTS = ["transport", "accommodation", "attraction", "food", "weather"]
+
+
+def build_planning_graph() -> AgentGraph:
+    """
+    Build the default trip planning graph.
+
+    transport, accommodation, attraction, food and weather are independent;
+    budget waits for all of them, and planner waits for everything. Budget and
+    planner receive the specialist results compacted (see compaction.py).
+    """
+    return AgentGraph(
+        [
+            AgentNode("transport", _recommend_payload),
+            AgentNode("accommodation", _recommend_payload),
+            AgentNode("attraction", _recommend_payload),
+            AgentNode("food", _recommend_payload),
+            AgentNode("weather", _weather_payload),
+            AgentNode("budget", _budget_payload, depends_on=SPECIALIST_AGENTS),
+            AgentNode(
+                "planner", _planner_payload, depends_on=SPECIALIST_AGENTS + ["budget"]
+            ),
+        ]
+    )
@@ -0,0 +1,173 @@
+"""
+Single-flight coalescing of identical concurrent planning requests
+
+During traffic spikes many users submit practically identical /trips/ai-plan
+payloads at the same moment. Requests that share a canonical key attach to one
+in-flight agent run; its events are fanned out to every subscriber, and late
+joiners first receive the events they missed.
+
+A run is bounded by the deadline of the request that started it. A request
+only joins a run that is due no later than its own deadline; a tighter request
+runs on its own instead, so it never waits past its deadline for a shared run.
+"""
+
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+import asyncio
+import logging
+
+from app.agentscope_agents.result_cache import canonicalize_trip_data
+from app.agentscope_agents.tool_cache import make_cache_key
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+class _Flight:
+    """One in-flight run and the queues of its subscribers"""
+
+    def __init__(self, expires_at: Optional[float] = None):
+        self.events: List[Any] = []
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.done = False
+        self.task: Optional[asyncio.Task] = None
+        self.expires_at = expires_at
+
+    def due_by(self, expires_at: Optional[float]) -> bool:
+        """Whether the run is bounded by a deadline no later than expires_at"""
+        if expires_at is None:
+            return True
+        return self.expires_at is not None and self.expires_at <= expires_at
+
+
+def planning_flight_key(trip_data: Dict[str, Any]) -> str:
+    """Coalescing key for a planning request (the title is ignored)"""
+    return make_cache_key("ai-plan", canonicalize_trip_data(trip_data))
+
+
+class SingleFlight:
+    """
+    Runs at most one event source per key and fans its events out.
+
+    Usage:
+        async for event in flights.subscribe(
+            key, lambda: produce_events(), expires_at=deadline.expires_at
+        ):
+            ...
+
+    The source runs in a background task. If every subscriber goes away before
+    it finishes, the run is cancelled.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self._started = 0
+        self._coalesced = 0
+        self._deadline_bypasses = 0
+
+    async def subscribe(
+        self,
+        key: str,
+        source_factory: Callable[[], AsyncIterator[Any]],
+        expires_at: Optional[float] = None,
+    ) -> AsyncIterator[Any]:
+        """
+        Events of the run for key, starting one if none is in flight.
+
+        Args:
+            key: Coalescing key
+            source_factory: Creates the event source of a new run
+            expires_at: time.monotonic() deadline of this subscriber; an
+                in-flight run due later is not joined
+        """
+        flight = self._flights.get(key)
+        if flight is not None and not flight.due_by(expires_at):
+            self._deadline_bypasses += 1
+            logger.info(
+                f"In-flight run {key[:12]} is due after this request's deadline, "
+                "running it separately"
+            )
+            source = source_factory()
+            try:
+                async for event in source:
+                    yield event
+            finally:
+                await source.aclose()
+            return
+
+        if flight is None:
+            flight = _Flight(expires_at)
+            self._flights[key] = flight
+            flight.task = asyncio.create_task(self._run(key, flight, source_factory()))
+            self._started += 1
+        else:
+            self._coalesced += 1
+            logger.info(f"Coalesced planning request onto in-flight run {key[:12]}")
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for event in flight.events:
+            queue.put_nowait(event)
+        flight.subscribers.add(queue)
+
+        try:
+            while True:
+                item = await queue.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+        finally:
+            flight.subscribers.discard(queue)
+            if not flight.subscribers and not flight.done:
+                logger.info(f"All subscribers left run {key[:12]}, cancelling it")
+                flight.task.cancel()
+
+    async def _run(self, key: str, flight: _Flight, source: AsyncIterator[Any]):
+        outcome: Any = _DONE
+        try:
+            async for event in source:
+                flight.events.append(event)
+                for queue in flight.subscribers:
+                    queue.put_nowait(event)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Coalesced planning run failed: {e}")
+            outcome = _Failure(e)
+        finally:
+            flight.done = True
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            await source.aclose()
+            if isinstance(outcome, _Failure):
+                for queue in flight.subscribers:
+                    queue.put_nowait(outcome)
+            for queue in flight.subscribers:
+                queue.put_nowait(_DONE)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._flights),
+            "subscribers": sum(len(f.subscribers) for f in self._flights.values()),
+            "runs_started": self._started,
+            "requests_coalesced": self._coalesced,
+            "deadline_bypasses": self._deadline_bypasses,
+        }
+
+
+_planning_flights: Optional[SingleFlight] = None
+
+
+def get_planning_flights() -> SingleFlight:
+    """Get the process-wide single-flight group for planning runs"""
+    global _planning_flights
+
+    if _planning_flights is None:
+        _planning_flights = SingleFlight()
+    return _planning_flights
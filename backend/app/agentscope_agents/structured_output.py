@@ -0,0 +1,195 @@
+"""
+Tolerant extraction and validation of agent JSON replies
+
+Prompts ask for bare JSON, but models still wrap it in markdown fences, add
+prose around it, leave trailing commas or stop mid-object. The extractor
+strips fences, takes the outermost JSON value and repairs those defects, so
+only replies that really contain no usable JSON cost a re-ask round-trip.
+
+Results are then validated against their model in app/models.py (see
+compaction.RESULT_MODELS: the specialist sections, TripBudget for the budget
+agent and ItineraryItem for the planner) and field-level errors are reported.
+"""
+
+from typing import Any, List, Optional
+import json
+import re
+
+from pydantic import ValidationError
+
+from app.agentscope_agents.compaction import RESULT_MODELS, find_records
+
+_FENCE = re.compile(r"```[A-Za-z]*\s*(.*?)(?:```|$)", re.S)
+_CLOSERS = {"{": "}", "[": "]"}
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+class ExtractionError(ValueError):
+    """The text contains no recoverable JSON value"""
+
+
+def _outermost(text: str) -> str:
+    """The first complete JSON object or array; unclosed ones are closed"""
+    starts = [index for index in (text.find("{"), text.find("[")) if index >= 0]
+    if not starts:
+        raise ExtractionError("no JSON object found")
+    start = min(starts)
+
+    stack: List[str] = []
+    in_string = escaped = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in _CLOSERS:
+            stack.append(_CLOSERS[char])
+        elif char in "}]" and stack:
+            stack.pop()
+            if not stack:
+                return text[start : index + 1]
+
+    # Truncated reply: close the open string and containers
+    return text[start:] + ('"' if in_string else "") + "".join(reversed(stack))
+
+
+def _repair(text: str) -> str:
+    """Fix trailing commas, Python literals and raw newlines inside strings"""
+    out: List[str] = []
+    in_string = escaped = False
+    index = 0
+    while index < len(text):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            elif char in "\n\r\t":
+                char = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}[char]
+            out.append(char)
+            index += 1
+            continue
+
+        if char == '"':
+            in_string = True
+        elif char == ",":
+            rest = text[index + 1 :].lstrip()
+            if rest[:1] in ("}", "]"):
+                index += 1
+                continue
+        elif char.isalpha() and not (out and (out[-1].isalnum() or out[-1] == "_")):
+            word = re.match(r"[A-Za-z_]+", text[index:]).group(0)
+            out.append(_PY_LITERALS.get(word, word))
+            index += len(word)
+            continue
+        out.append(char)
+        index += 1
+    return "".join(out)
+
+
+def extract_json(text: str) -> Any:
+    """
+    Extract a JSON value from an LLM reply.
+
+    Raises:
+        ExtractionError: No JSON value could be recovered
+    """
+    text = text.strip()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+
+    fenced = _FENCE.search(text)
+    candidate = _outermost(fenced.group(1) if fenced else text)
+    try:
+        return json.loads(candidate)
+    except json.JSONDecodeError:
+        pass
+    try:
+        return json.loads(_repair(candidate))
+    except json.JSONDecodeError as e:
+        raise ExtractionError(f"invalid JSON: {e}") from e
+
+
+def validate_result(agent: str, result: Any) -> List[str]:
+    """Field-level validation errors of the records in an agent result"""
+    model = RESULT_MODELS.get(agent)
+    if model is None:
+        return []
+
+    errors = []
+    for index, record in enumerate(find_records(agent, result)):
+        try:
+            model.model_validate(record)
+        except ValidationError as e:
+            for error in e.errors():
+                path = ".".join(str(part) for part in error["loc"])
+                errors.append(f"{model.__name__}[{index}].{path}: {error['msg']}")
+    return errors
+
+
+class AgentOutput:
+    """
+    Parsed reply of an agent.
+
+    Attributes:
+        result: The result dict passed downstream
+        errors: Extraction and field-level validation errors
+        invalid: Whether the reply is unusable and worth a re-ask
+    """
+
+    def __init__(self, result: Any, errors: List[str], invalid: bool):
+        self.result = result
+        self.errors = errors
+        self.invalid = invalid
+
+
+def parse_agent_output(agent: str, text: Optional[str]) -> AgentOutput:
+    """
+    Extract and validate an agent's reply.
+
+    A reply is invalid when it contains no JSON or when no record of the
+    agent's model (a specialist section, TripBudget or ItineraryItem) can be
+    found in it. Field-level errors of
+    records that were found are reported but do not make the reply invalid.
+    Invalid replies keep their raw text as {"content": text}.
+    """
+    text = text or ""
+    try:
+        result = extract_json(text)
+    except ExtractionError as e:
+        return AgentOutput({"content": text}, [str(e)], invalid=True)
+
+    if isinstance(result, list):
+        result = {"itinerary" if agent == "planner" else "recommendations": result}
+    elif not isinstance(result, dict):
+        return AgentOutput(
+            {"content": text}, ["reply is not a JSON object"], invalid=True
+        )
+
+    errors = validate_result(agent, result)
+    model = RESULT_MODELS.get(agent)
+    if model is not None and not find_records(agent, result):
+        fields = ", ".join(model.model_fields)
+        errors.insert(0, f"no {model.__name__} records found (fields: {fields})")
+        return AgentOutput(result, errors, invalid=True)
+    return AgentOutput(result, errors, invalid=False)
+
+
+def reask_prompt(errors: List[str]) -> str:
+    """Follow-up message asking an agent to fix an unusable reply"""
+    problems = "; ".join(errors[:5])
+    return (
+        f"你的上一条回复无法使用：{problems}。"
+        "请不要再调用工具，基于已有信息直接输出一个符合要求的纯JSON对象。"
+    )
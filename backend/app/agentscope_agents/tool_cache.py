@@ -0,0 +1,202 @@
+"""
+ToolResultCache - Shared TTL/LRU cache for MCP tool results
+
+Agents call maps_geo, maps_text_search, maps_distance and the direction tools
+many times with the same arguments, within one plan and across plans. Results
+are cached by tool name plus normalized arguments with per-tool TTLs, in an
+in-memory LRU tier and an optional Postgres-backed second tier.
+"""
+
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import json
+import logging
+import time
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(value: Any) -> Any:
+    """Normalize argument values so equivalent calls share a cache key"""
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def make_cache_key(tool_name: str, arguments: Dict[str, Any]) -> str:
+    """Cache key for a tool call: sha256 of the tool name and canonical JSON arguments"""
+    canonical = json.dumps(
+        _normalize(arguments or {}),
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(f"{tool_name}:{canonical}".encode()).hexdigest()
+
+
+class PostgresToolCacheBackend:
+    """Second cache tier stored in the tool_cache table"""
+
+    async def get(self, key: str) -> Optional[Any]:
+        from app.database import AsyncSessionLocal
+        from app.db_models import ToolCacheEntry
+
+        async with AsyncSessionLocal() as db:
+            entry = await db.get(ToolCacheEntry, key)
+            if entry is None or entry.expires_at <= datetime.utcnow():
+                return None
+            return entry.result
+
+    async def set(self, key: str, tool_name: str, value: Any, ttl: float):
+        from app.database import AsyncSessionLocal
+        from app.db_models import ToolCacheEntry
+
+        async with AsyncSessionLocal() as db:
+            await db.merge(
+                ToolCacheEntry(
+                    key=key,
+                    tool_name=tool_name,
+                    result=value,
+                    expires_at=datetime.utcnow() + timedelta(seconds=ttl),
+                )
+            )
+            await db.commit()
+
+
+class ToolResultCache:
+    """
+    Two-tier cache for tool results.
+
+    The memory tier is an LRU bounded by max_entries; entries expire after the
+    TTL of their tool. When a backend is configured, memory misses fall through
+    to it and its hits are promoted back into memory. Backend errors are logged
+    and treated as misses, so the cache never breaks a tool call.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        default_ttl: float = 3600.0,
+        ttls: Optional[Dict[str, float]] = None,
+        backend: Optional[PostgresToolCacheBackend] = None,
+    ):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.ttls = ttls or {}
+        self.backend = backend
+
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+        # Metrics
+        self._hits = 0
+        self._backend_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._per_tool: Dict[str, Dict[str, int]] = {}
+
+    def ttl_for(self, tool_name: str) -> float:
+        return self.ttls.get(tool_name, self.default_ttl)
+
+    async def get(self, tool_name: str, arguments: Dict[str, Any]) -> Optional[Any]:
+        """Cached result for a tool call, or None on a miss"""
+        key = make_cache_key(tool_name, arguments)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self._record(tool_name, "hits")
+                self._hits += 1
+                return value
+            del self._entries[key]
+
+        if self.backend is not None:
+            try:
+                value = await self.backend.get(key)
+            except Exception as e:
+                logger.warning(f"Tool cache backend read failed: {e}")
+                value = None
+            if value is not None:
+                self._store(key, tool_name, value)
+                self._record(tool_name, "hits")
+                self._backend_hits += 1
+                return value
+
+        self._record(tool_name, "misses")
+        self._misses += 1
+        return None
+
+    async def set(self, tool_name: str, arguments: Dict[str, Any], value: Any):
+        """Store a tool result under its tool's TTL"""
+        key = make_cache_key(tool_name, arguments)
+        self._store(key, tool_name, value)
+
+        if self.backend is not None:
+            try:
+                await self.backend.set(key, tool_name, value, self.ttl_for(tool_name))
+            except Exception as e:
+                logger.warning(f"Tool cache backend write failed: {e}")
+
+    def clear(self):
+        self._entries.clear()
+
+    def _store(self, key: str, tool_name: str, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl_for(tool_name), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def _record(self, tool_name: str, outcome: str):
+        counters = self._per_tool.setdefault(tool_name, {"hits": 0, "misses": 0})
+        counters[outcome] += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """Hit/miss counters, overall and per tool"""
+        lookups = self._hits + self._backend_hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self._hits,
+            "backend_hits": self._backend_hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "hit_rate": (
+                round((self._hits + self._backend_hits) / lookups, 4)
+                if lookups
+                else 0.0
+            ),
+            "per_tool": self._per_tool,
+        }
+
+
+_tool_cache: Optional[ToolResultCache] = None
+
+
+def get_tool_cache() -> ToolResultCache:
+    """Get the process-wide tool result cache, configured from settings"""
+    global _tool_cache
+
+    if _tool_cache is None:
+        _tool_cache = ToolResultCache(
+            max_entries=settings.tool_cache_max_entries,
+            default_ttl=settings.tool_cache_default_ttl,
+            ttls=settings.tool_cache_ttls,
+            backend=(
+                PostgresToolCacheBackend()
+                if settings.tool_cache_postgres_enabled
+                else None
+            ),
+        )
+    return _tool_cache
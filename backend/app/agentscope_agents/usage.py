@@ -0,0 +1,195 @@
+"""
+Token, latency and cost accounting for planning runs
+
+Every agent run gets an AgentUsage that is made current through a context
+variable. LLM calls (rate_limiter.RateLimitedChatModel), MCP tool calls
+(mcp_pool.PooledMCPToolFunction), ReAct reasoning and acting steps (agent
+hooks) and forced final answers (BoundedReActAgent) record into the current
+usage, so shared model clients and toolkits need no per-agent wiring.
+Calls made outside a tracked agent run are not recorded.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncGenerator, Dict, Iterator, List, Optional
+import time
+
+from app.agentscope_agents.pricing import model_cost
+
+
+class AgentUsage:
+    """Usage counters of one agent run"""
+
+    def __init__(self):
+        self.llm_calls = 0
+        self.iterations = 0
+        self.reasks = 0
+        self.cap_hits = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.llm_time = 0.0
+        self.cost = 0.0
+        self.unpriced_calls = 0
+        self.tool_calls = 0
+        self.tool_errors = 0
+        self.tool_time = 0.0
+        self.tool_sequence: List[str] = []
+        self.wall_time = 0.0
+
+    def record_llm(
+        self, model_name: str, input_tokens: int, output_tokens: int, latency: float
+    ):
+        self.llm_calls += 1
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+        self.llm_time += latency
+        cost = model_cost(model_name, input_tokens, output_tokens)
+        if cost is None:
+            self.unpriced_calls += 1
+        else:
+            self.cost += cost
+
+    def record_tool(self, latency: float, ok: bool):
+        self.tool_calls += 1
+        self.tool_time += latency
+        if not ok:
+            self.tool_errors += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "llm_calls": self.llm_calls,
+            "iterations": self.iterations,
+            "reasks": self.reasks,
+            "cap_hits": self.cap_hits,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "total_tokens": self.input_tokens + self.output_tokens,
+            "llm_time_ms": round(self.llm_time * 1000, 2),
+            "tool_calls": self.tool_calls,
+            "tool_errors": self.tool_errors,
+            "tool_time_ms": round(self.tool_time * 1000, 2),
+            "tool_sequence": list(self.tool_sequence),
+            "wall_time_ms": round(self.wall_time * 1000, 2),
+            "cost_usd": round(self.cost, 6),
+            "unpriced_calls": self.unpriced_calls,
+        }
+
+
+_current_usage: ContextVar[Optional[AgentUsage]] = ContextVar(
+    "agent_usage", default=None
+)
+
+
+def current_usage() -> Optional[AgentUsage]:
+    """Usage of the agent run in progress, if any"""
+    return _current_usage.get()
+
+
+@contextmanager
+def track_usage(usage: AgentUsage) -> Iterator[AgentUsage]:
+    """Record calls made in this context (and tasks started from it) into usage"""
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+
+def _record_response(usage: AgentUsage, model_name: str, response: Any, started: float):
+    tokens = getattr(response, "usage", None)
+    usage.record_llm(
+        model_name,
+        tokens.input_tokens if tokens else 0,
+        tokens.output_tokens if tokens else 0,
+        time.monotonic() - started,
+    )
+
+
+async def _metered_stream(
+    usage: AgentUsage, model_name: str, stream: AsyncGenerator, started: float
+) -> AsyncGenerator:
+    # Streamed chunks are cumulative, the last one carries the call's usage
+    last = None
+    try:
+        async for chunk in stream:
+            last = chunk
+            yield chunk
+    finally:
+        _record_response(usage, model_name, last, started)
+
+
+def record_llm_response(model_name: str, response: Any, started: float) -> Any:
+    """
+    Record an LLM response into the current usage.
+
+    Streaming responses are wrapped so they are recorded once consumed.
+
+    Args:
+        model_name: Model that answered, used for pricing
+        response: ChatResponse or async generator of ChatResponse chunks
+        started: time.monotonic() at which the call was made
+
+    Returns:
+        The response, or a wrapper yielding the same chunks
+    """
+    usage = current_usage()
+    if usage is None:
+        return response
+    if isinstance(response, AsyncGenerator):
+        return _metered_stream(usage, model_name, response, started)
+    _record_response(usage, model_name, response, started)
+    return response
+
+
+def record_tool_call(latency: float, ok: bool):
+    """Record a tool call into the current usage"""
+    usage = current_usage()
+    if usage is not None:
+        usage.record_tool(latency, ok)
+
+
+def count_reasoning_step(agent: Any, kwargs: Dict[str, Any]) -> None:
+    """ReActAgent pre_reasoning hook counting iterations into the current usage"""
+    usage = current_usage()
+    if usage is not None:
+        usage.iterations += 1
+
+
+def record_tool_step(agent: Any, kwargs: Dict[str, Any]) -> None:
+    """ReActAgent pre_acting hook recording the tool-call sequence"""
+    usage = current_usage()
+    name = kwargs["tool_call"].get("name")
+    if usage is not None and name != agent.finish_function_name:
+        usage.tool_sequence.append(name)
+
+
+def summarize_usage(
+    agents: Dict[str, Dict[str, Any]], wall_time: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Aggregate per-agent usage dicts into a planning-run summary.
+
+    Args:
+        agents: Agent name -> AgentUsage.to_dict()
+        wall_time: Wall time of the whole run in seconds
+
+    Returns:
+        {"agents": agents, "total": summed counters, "wall_time_ms": ...}
+        where total["wall_time_ms"] is the summed agent time
+    """
+    total: Dict[str, Any] = {}
+    for usage in agents.values():
+        for key, value in usage.items():
+            if isinstance(value, (int, float)):
+                total[key] = total.get(key, 0) + value
+    for key in ("llm_time_ms", "tool_time_ms", "wall_time_ms"):
+        if key in total:
+            total[key] = round(total[key], 2)
+    if "cost_usd" in total:
+        total["cost_usd"] = round(total["cost_usd"], 6)
+
+    return {
+        "agents": agents,
+        "total": total,
+        "wall_time_ms": round(wall_time * 1000, 2) if wall_time is not None else None,
+    }
@@ -6,6 +6,7 @@ Provides centralized configuration for different AI model providers.
 
 from typing import Optional
 from config import settings
+from app.models import AgentType
 
 
 class AIProviderConfig:
@@ -18,8 +19,11 @@ class AIProviderConfig:
         return {
             "api_key": settings.openai_api_key,
             "base_url": settings.openai_base_url,
+            "compatible_base_url": settings.openai_base_url,
             "model": settings.openai_model,
             "provider": "openai",
+            "rpm_limit": settings.openai_rpm_limit,
+            "tpm_limit": settings.openai_tpm_limit,
         }
 
     # Anthropic Configuration
@@ -29,8 +33,11 @@ class AIProviderConfig:
         return {
             "api_key": settings.anthropic_api_key,
             "base_url": settings.anthropic_base_url,
+            "compatible_base_url": settings.anthropic_compatible_base_url,
             "model": settings.anthropic_model,
             "provider": "anthropic",
+            "rpm_limit": settings.anthropic_rpm_limit,
+            "tpm_limit": settings.anthropic_tpm_limit,
         }
 
     # Tongyi Configuration
@@ -40,8 +47,11 @@ class AIProviderConfig:
         return {
             "api_key": settings.tongyi_api_key,
             "base_url": settings.tongyi_base_url,
+            "compatible_base_url": settings.tongyi_base_url,
             "model": settings.tongyi_model,
             "provider": "tongyi",
+            "rpm_limit": settings.tongyi_rpm_limit,
+            "tpm_limit": settings.tongyi_tpm_limit,
         }
 
     @staticmethod
@@ -62,6 +72,71 @@ class AIProviderConfig:
         }
         return configs.get(provider_name.lower())
 
+    @staticmethod
+    def get_agent_config(agent_type: str) -> dict:
+        """
+        Get the model configuration for one agent role
+
+        Applies settings.agent_models[agent_type] on top of the configuration
+        of its provider (the default provider when none is given). A "tier"
+        without a "model" selects the provider's model of that tier from
+        settings.model_tiers.
+
+        Args:
+            agent_type: AgentType value ('planner', 'weather', ...)
+
+        Returns:
+            Provider configuration dict with the agent's model
+        """
+        override = settings.agent_models.get(AgentType(agent_type), {})
+        provider = override.get("provider") or AIProviderConfig.get_default_provider()
+        config = dict(AIProviderConfig.get_provider_config(provider))
+        config.update(
+            {
+                key: value
+                for key, value in override.items()
+                if value and key != "provider"
+            }
+        )
+        if not override.get("model") and override.get("tier"):
+            config["model"] = settings.model_tiers.get(override["tier"], {}).get(
+                provider, config["model"]
+            )
+        return config
+
+    @staticmethod
+    def get_tier_model(
+        provider: str, model: str, target: str, tier: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        The model of provider target in the same tier as provider's model
+
+        The tier is the given one, else the tier listing model for provider in
+        settings.model_tiers. A provider's default model maps to target's
+        default model.
+
+        Args:
+            provider: Provider of the agent's model
+            model: The agent's model name
+            target: Provider to find the equivalent model for
+            tier: The agent's tier from settings.agent_models, if any
+
+        Returns:
+            Model name, or None when target has no model in that tier
+        """
+        if not tier:
+            if model == AIProviderConfig.get_provider_config(provider)["model"]:
+                return AIProviderConfig.get_provider_config(target)["model"]
+            tier = next(
+                (
+                    name
+                    for name, models in settings.model_tiers.items()
+                    if models.get(provider) == model
+                ),
+                None,
+            )
+        return settings.model_tiers.get(tier, {}).get(target)
+
     @staticmethod
     def get_available_providers() -> list[str]:
         """Get list of available provider names"""
@@ -97,3 +172,15 @@ def get_tongyi_config() -> dict:
 def get_provider_config(provider_name: str) -> Optional[dict]:
     """Convenience function to get any provider config"""
     return AIProviderConfig.get_provider_config(provider_name)
+
+
+def get_tier_model(
+    provider: str, model: str, target: str, tier: Optional[str] = None
+) -> Optional[str]:
+    """Convenience function to map a model onto another provider's tier"""
+    return AIProviderConfig.get_tier_model(provider, model, target, tier)
+
+
+def get_agent_model_config(agent_type: str) -> dict:
+    """Convenience function to get an agent's tiered model config"""
+    return AIProviderConfig.get_agent_config(agent_type)
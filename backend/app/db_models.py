@@ -11,6 +11,7 @@ from sqlalchemy import (
     Text,
     Boolean,
     ForeignKey,
+    Index,
     JSON,
 )
 from sqlalchemy.orm import relationship
@@ -38,9 +39,13 @@ class User(Base):
 
 class Trip(Base):
     __tablename__ = "trips"
+    # 行程列表的 keyset 分页：WHERE user_id = ? AND (created_at, id) < (?, ?)
+    __table_args__ = (
+        Index("ix_trips_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String(36), ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
     title = Column(String(200), nullable=False)
     destinations = Column(JSON, nullable=False)
     start_date = Column(DateTime, nullable=False)
@@ -49,15 +54,105 @@ class Trip(Base):
     status = Column(String(20), default="draft")
     budget = Column(JSON)
     preferences = Column(JSON, default={})
+    # 旧版行程数组；行程项存储在 itinerary_items 后此列为空（见 itinerary.py）
     itinerary = Column(JSON, default=[])
+    # Token/latency/cost accounting of the last AI planning run
+    # (existing databases: ALTER TABLE trips ADD COLUMN usage JSON, see README)
+    usage = Column(JSON)
     share_token = Column(String(64), unique=True, index=True)
     is_public = Column(Boolean, default=False)
+    # 乐观锁版本号：每次 UPDATE 加 1，ETag / If-Match 由它生成
+    version = Column(Integer, nullable=False, server_default="1")
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # 关系
     user = relationship("User", back_populates="trips")
 
+    __mapper_args__ = {"version_id_col": version}
+
+
+class ItineraryItem(Base):
+    """行程项（对应 models.ItineraryItem），按 (day, time, position) 排序"""
+
+    __tablename__ = "itinerary_items"
+    __table_args__ = (
+        Index("ix_itinerary_items_trip_id_day_time", "trip_id", "day", "time"),
+    )
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    trip_id = Column(
+        String(36), ForeignKey("trips.id", ondelete="CASCADE"), nullable=False
+    )
+    day = Column(Integer, nullable=False)
+    time = Column(String(20), nullable=False)
+    # 同一时间点多个行程项的先后顺序
+    position = Column(Integer, nullable=False, default=0)
+    type = Column(String(20), nullable=False)
+    title = Column(String(200), nullable=False)
+    description = Column(Text)
+    location = Column(JSON)
+    cost = Column(Integer)
+    duration = Column(Integer)
+    notes = Column(Text)
+    data = Column(JSON)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class PlanningRun(Base):
+    """AI 规划运行记录（每次 /trips/ai-plan 一条）"""
+
+    __tablename__ = "planning_runs"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String(36), ForeignKey("users.id"), nullable=False, index=True)
+    trip_id = Column(
+        String(36),
+        ForeignKey("trips.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    # SessionStatus: active, completed, cancelled, failed
+    status = Column(String(20), nullable=False, default="active")
+    request = Column(JSON)
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime)
+
+
+class PlanningStep(Base):
+    """规划运行中单个 Agent 的结果，Agent 完成时立即写入"""
+
+    __tablename__ = "planning_steps"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    run_id = Column(
+        String(36),
+        ForeignKey("planning_runs.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    agent_type = Column(String(20), nullable=False)
+    result = Column(JSON)
+    cached = Column(Boolean, default=False)
+    degraded = Column(Boolean, default=False)
+    usage = Column(JSON)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ToolCacheEntry(Base):
+    """MCP 工具调用结果缓存（二级缓存）"""
+
+    __tablename__ = "tool_cache"
+
+    key = Column(String(64), primary_key=True)
+    tool_name = Column(String(100), nullable=False, index=True)
+    result = Column(JSON, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 
 def generate_share_token():
     """生成唯一的分享令牌"""
@@ -0,0 +1,263 @@
+"""
+行程项存储（itinerary_items）
+
+行程项逐条存储在 itinerary_items 表中，编辑一项只写一行，而不是重写整个
+Trip.itinerary JSON。旧客户端仍然读写 itinerary 数组：
+
+- 读取时由行程项按 (day, time, position) 组装出数组；没有行程项的旧行程
+  仍返回 Trip.itinerary 中的数组
+- 整体写入数组时，若每一项都符合 models.ItineraryItem，则拆分为行程项存储，
+  Trip.itinerary 置空；否则（例如按天组织的旧格式）原样存入 Trip.itinerary
+
+时间点写入时规范为补零的 HH:MM（"9:00" -> "09:00"），按字符串排序即按时间排序。
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import re
+import uuid
+
+from pydantic import ValidationError
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.db_models import ItineraryItem, Trip
+
+# 行程项可编辑的字段
+ITEM_FIELDS = tuple(f for f in models.ItineraryItem.model_fields if f != "id")
+
+_TIME = re.compile(r"^(\d{1,2})[:：](\d{2})(?::(\d{2}))?$")
+
+
+def normalize_time(value: str) -> str:
+    """把 H:MM / HH:MM[:SS] 规范为补零的 HH:MM[:SS]，其他写法原样保留"""
+    match = _TIME.match(value.strip())
+    if not match:
+        return value
+    hour, minute, second = match.groups()
+    if int(hour) > 23 or int(minute) > 59:
+        return value
+    normalized = f"{int(hour):02d}:{minute}"
+    return f"{normalized}:{second}" if second else normalized
+
+
+def item_to_dict(item: ItineraryItem) -> Dict[str, Any]:
+    """行程项在 itinerary 数组中的表示（省略空字段）"""
+    data = {"id": item.id}
+    for field in ITEM_FIELDS:
+        value = getattr(item, field)
+        if value is not None:
+            data[field] = value
+    return data
+
+
+def validate_item(data: Dict[str, Any]) -> models.ItineraryItem:
+    """
+    校验行程项
+
+    Raises:
+        ValueError: 不符合 models.ItineraryItem
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Itinerary item must be an object")
+    try:
+        item = models.ItineraryItem.model_validate(data)
+    except ValidationError as e:
+        raise ValueError(str(e)) from e
+    item.time = normalize_time(item.time)
+    return item
+
+
+def parse_itinerary(itinerary: Any) -> Optional[List[models.ItineraryItem]]:
+    """itinerary 数组中的行程项；不是行程项数组时返回 None"""
+    if not isinstance(itinerary, list):
+        return None
+    try:
+        return [validate_item(entry) for entry in itinerary]
+    except ValueError:
+        return None
+
+
+def build_items(
+    trip_id: str, items: Iterable[models.ItineraryItem], start: int = 0
+) -> List[ItineraryItem]:
+    """行程项的数据库行，position 按给定顺序递增"""
+    return [
+        ItineraryItem(
+            id=str(uuid.uuid4()),
+            trip_id=trip_id,
+            position=start + index,
+            **item.model_dump(include=set(ITEM_FIELDS)),
+        )
+        for index, item in enumerate(items)
+    ]
+
+
+async def load_items(db: AsyncSession, trip_ids: List[str]) -> List[ItineraryItem]:
+    """多个行程的行程项，按行程内顺序排列"""
+    if not trip_ids:
+        return []
+    query = (
+        select(ItineraryItem)
+        .where(ItineraryItem.trip_id.in_(trip_ids))
+        .order_by(
+            ItineraryItem.trip_id,
+            ItineraryItem.day,
+            ItineraryItem.time,
+            ItineraryItem.position,
+        )
+    )
+    return list((await db.scalars(query)).all())
+
+
+async def legacy_itineraries(
+    db: AsyncSession, trips: List[Trip]
+) -> Dict[str, List[Dict[str, Any]]]:
+    """行程 ID -> 旧版 itinerary 数组，一次查询加载所有行程项"""
+    result = {trip.id: [] for trip in trips}
+    for item in await load_items(db, list(result)):
+        result[item.trip_id].append(item_to_dict(item))
+    for trip in trips:
+        if not result[trip.id]:
+            result[trip.id] = trip.itinerary or []
+    return result
+
+
+async def legacy_itinerary(db: AsyncSession, trip: Trip) -> List[Dict[str, Any]]:
+    """单个行程的旧版 itinerary 数组"""
+    return (await legacy_itineraries(db, [trip]))[trip.id]
+
+
+def split_itinerary(trip_id: str, itinerary: Any) -> Tuple[Any, List[ItineraryItem]]:
+    """
+    itinerary 数组的存储方式
+
+    Returns:
+        (应存入 Trip.itinerary 的值, 行程项行)：拆分为行程项时为 ([], 行)，
+        否则为 (原数组, [])
+    """
+    items = parse_itinerary(itinerary)
+    if items is None:
+        return itinerary, []
+    return [], build_items(trip_id, items)
+
+
+async def replace_itinerary(
+    db: AsyncSession, trip_id: str, itinerary: Any
+) -> List[Dict[str, Any]]:
+    """
+    用 itinerary 数组替换行程的全部行程项（不提交）
+
+    Returns:
+        应存入 Trip.itinerary 的值：拆分为行程项时为空数组，否则为原数组
+    """
+    await db.execute(delete(ItineraryItem).where(ItineraryItem.trip_id == trip_id))
+    stored, rows = split_itinerary(trip_id, itinerary)
+    db.add_all(rows)
+    return stored
+
+
+async def sync_itinerary(
+    db: AsyncSession, trip_id: str, itinerary: Any
+) -> List[Dict[str, Any]]:
+    """
+    与 replace_itinerary 相同，但只写入有变化的行程项（不提交）
+
+    数组中的行程项按 id 对应到已有的行：字段或位置变化的行被更新，
+    没有对应行的被插入，数组中不再出现的行被删除。
+
+    Returns:
+        应存入 Trip.itinerary 的值
+    """
+    items = parse_itinerary(itinerary)
+    if items is None:
+        return await replace_itinerary(db, trip_id, itinerary)
+
+    rows = {row.id: row for row in await load_items(db, [trip_id])}
+    seen = set()
+    for position, (entry, item) in enumerate(zip(itinerary, items)):
+        row = rows.get(entry.get("id"))
+        if row is None or row.id in seen:
+            db.add_all(build_items(trip_id, [item], start=position))
+            continue
+        seen.add(row.id)
+        for field in ITEM_FIELDS:
+            value = getattr(item, field)
+            if getattr(row, field) != value:
+                setattr(row, field, value)
+        if row.position != position:
+            row.position = position
+
+    for row_id, row in rows.items():
+        if row_id not in seen:
+            await db.delete(row)
+    return []
+
+
+async def add_item(
+    db: AsyncSession, trip_id: str, item: models.ItineraryItem
+) -> ItineraryItem:
+    """追加一个行程项，同一时间点排在已有行程项之后（不提交）"""
+    last = await db.scalar(
+        select(func.max(ItineraryItem.position)).where(ItineraryItem.trip_id == trip_id)
+    )
+    (row,) = build_items(trip_id, [item], start=0 if last is None else last + 1)
+    db.add(row)
+    return row
+
+
+def update_item(row: ItineraryItem, changes: Dict[str, Any]):
+    """
+    把部分字段的修改应用到行程项，修改后的整项需符合 models.ItineraryItem
+
+    Raises:
+        ValueError: 修改后的行程项不合法
+    """
+    unknown = sorted(set(changes) - set(ITEM_FIELDS))
+    if unknown:
+        raise ValueError(f"Unknown itinerary item fields: {', '.join(unknown)}")
+    item = validate_item({**item_to_dict(row), **changes})
+    for field in changes:
+        setattr(row, field, getattr(item, field))
+
+
+async def ensure_items(db: AsyncSession, trip: Trip):
+    """
+    逐项编辑前，把仍存放在 Trip.itinerary 中的数组迁移为行程项（不提交）
+
+    Raises:
+        ValueError: 旧数组不是行程项数组，无法逐项编辑
+    """
+    if not trip.itinerary:
+        return
+    items = parse_itinerary(trip.itinerary)
+    if items is None:
+        raise ValueError(
+            "Itinerary is not a list of itinerary items; replace it with PUT first"
+        )
+    db.add_all(build_items(trip.id, items))
+    trip.itinerary = []
+    await db.flush()
+
+
+async def reorder_day(
+    db: AsyncSession, trip_id: str, day: int, item_ids: List[str]
+) -> List[ItineraryItem]:
+    """
+    按 item_ids 重新排列一天的行程项（不提交）
+
+    时间点保持不变：当天按时间排序的时间点依次分配给新顺序中的行程项。
+
+    Raises:
+        ValueError: item_ids 不是当天全部行程项的一个排列
+    """
+    items = [item for item in await load_items(db, [trip_id]) if item.day == day]
+    by_id = {item.id: item for item in items}
+    if len(item_ids) != len(by_id) or set(item_ids) != set(by_id):
+        raise ValueError(f"item_ids must list every item of day {day} exactly once")
+
+    times = [item.time for item in items]
+    for position, (item_id, time) in enumerate(zip(item_ids, times)):
+        by_id[item_id].time = time
+        by_id[item_id].position = position
+    return [by_id[item_id] for item_id in item_ids]
@@ -0,0 +1,214 @@
+"""
+JSON Merge Patch（RFC 7386）和 JSON Patch（RFC 6902）
+
+补丁以写时复制的方式应用：只复制从根到被修改位置路径上的对象和数组，
+未修改的子树在新旧文档之间共享，原文档不会被修改。因此 diff_paths 比较
+新旧文档时遇到同一个对象可以直接跳过，开销只与修改的部分成正比。
+"""
+
+from typing import Any, Callable, List, Tuple
+
+# diff_paths 中表示删除的值
+REMOVED = object()
+
+
+class PatchError(ValueError):
+    """补丁格式错误或无法应用到文档"""
+
+
+class PatchTestFailed(PatchError):
+    """JSON Patch 的 test 操作不成立"""
+
+
+def merge_patch(target: Any, patch: Any) -> Any:
+    """应用 RFC 7386 merge patch，返回新文档"""
+    if not isinstance(patch, dict):
+        return patch
+
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = merge_patch(result.get(key), value)
+    return result
+
+
+def parse_pointer(pointer: str) -> List[str]:
+    """RFC 6901 JSON Pointer 的各级引用"""
+    if not isinstance(pointer, str) or (pointer and not pointer.startswith("/")):
+        raise PatchError(f"Invalid JSON pointer: {pointer!r}")
+    if not pointer:
+        return []
+    return [t.replace("~1", "/").replace("~0", "~") for t in pointer[1:].split("/")]
+
+
+def _index(container: list, token: str, allow_end: bool = False) -> int:
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise PatchError(f"Invalid array index: {token!r}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise PatchError(f"Array index out of range: {index}")
+    return index
+
+
+def _get(doc: Any, tokens: List[str]) -> Any:
+    for token in tokens:
+        if isinstance(doc, dict):
+            if token not in doc:
+                raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+            doc = doc[token]
+        elif isinstance(doc, list):
+            doc = doc[_index(doc, token)]
+        else:
+            raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+    return doc
+
+
+def _update(doc: Any, tokens: List[str], leaf: Callable[[Any, str], None]) -> Any:
+    """复制路径上的容器，在最后一级容器上调用 leaf(container, token)"""
+    if isinstance(doc, dict):
+        doc = dict(doc)
+    elif isinstance(doc, list):
+        doc = list(doc)
+    else:
+        raise PatchError("Path not found")
+
+    token = tokens[0]
+    if len(tokens) == 1:
+        leaf(doc, token)
+        return doc
+
+    if isinstance(doc, dict):
+        if token not in doc:
+            raise PatchError(f"Path not found: {token!r}")
+        doc[token] = _update(doc[token], tokens[1:], leaf)
+    else:
+        index = _index(doc, token)
+        doc[index] = _update(doc[index], tokens[1:], leaf)
+    return doc
+
+
+def _add(doc: Any, tokens: List[str], value: Any) -> Any:
+    if not tokens:
+        return value
+
+    def leaf(container, token):
+        if isinstance(container, dict):
+            container[token] = value
+        else:
+            container.insert(_index(container, token, allow_end=True), value)
+
+    return _update(doc, tokens, leaf)
+
+
+def _remove(doc: Any, tokens: List[str]) -> Any:
+    if not tokens:
+        raise PatchError("Cannot remove the whole document")
+
+    def leaf(container, token):
+        if isinstance(container, dict):
+            if token not in container:
+                raise PatchError(f"Path not found: {token!r}")
+            del container[token]
+        else:
+            del container[_index(container, token)]
+
+    return _update(doc, tokens, leaf)
+
+
+def _replace(doc: Any, tokens: List[str], value: Any) -> Any:
+    if not tokens:
+        return value
+
+    def leaf(container, token):
+        if isinstance(container, dict):
+            if token not in container:
+                raise PatchError(f"Path not found: {token!r}")
+            container[token] = value
+        else:
+            container[_index(container, token)] = value
+
+    return _update(doc, tokens, leaf)
+
+
+def json_equal(a: Any, b: Any) -> bool:
+    """JSON 值相等（区分 1 和 true，不区分 1 和 1.0）"""
+    if isinstance(a, bool) or isinstance(b, bool):
+        return type(a) is type(b) and a == b
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(json_equal(a[k], b[k]) for k in a)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(json_equal(x, y) for x, y in zip(a, b))
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return a == b
+    return type(a) is type(b) and a == b
+
+
+def apply_json_patch(doc: Any, operations: Any) -> Any:
+    """
+    应用 RFC 6902 JSON Patch，返回新文档
+
+    Raises:
+        PatchError: 操作格式错误或路径不存在
+        PatchTestFailed: test 操作不成立
+    """
+    if not isinstance(operations, list):
+        raise PatchError("JSON Patch must be an array of operations")
+
+    for operation in operations:
+        if not isinstance(operation, dict) or "path" not in operation:
+            raise PatchError(f"Invalid operation: {operation!r}")
+        op = operation.get("op")
+        tokens = parse_pointer(operation["path"])
+
+        if op in ("add", "replace", "test") and "value" not in operation:
+            raise PatchError(f"Operation {op!r} requires a value")
+        if op in ("move", "copy") and "from" not in operation:
+            raise PatchError(f"Operation {op!r} requires from")
+
+        if op == "add":
+            doc = _add(doc, tokens, operation["value"])
+        elif op == "remove":
+            doc = _remove(doc, tokens)
+        elif op == "replace":
+            doc = _replace(doc, tokens, operation["value"])
+        elif op == "move":
+            source = parse_pointer(operation["from"])
+            if tokens[: len(source)] == source and len(tokens) > len(source):
+                raise PatchError("Cannot move a value into one of its children")
+            value = _get(doc, source)
+            doc = _add(_remove(doc, source), tokens, value)
+        elif op == "copy":
+            doc = _add(doc, tokens, _get(doc, parse_pointer(operation["from"])))
+        elif op == "test":
+            if not json_equal(_get(doc, tokens), operation["value"]):
+                raise PatchTestFailed(f"Test failed at {operation['path']!r}")
+        else:
+            raise PatchError(f"Unknown operation: {op!r}")
+    return doc
+
+
+def diff_paths(
+    old: Any, new: Any, path: Tuple[str, ...] = ()
+) -> List[Tuple[Tuple[str, ...], Any]]:
+    """
+    新旧文档的差异：[(对象键路径, 新值或 REMOVED)]
+
+    只深入两边都是对象的位置，数组和标量的变化记为整体替换。
+    """
+    if old is new:
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = [(path + (key,), REMOVED) for key in old if key not in new]
+        for key, value in new.items():
+            if key in old:
+                changes.extend(diff_paths(old[key], value, path + (key,)))
+            else:
+                changes.append((path + (key,), value))
+        return changes
+    if json_equal(old, new):
+        return []
+    return [(path, new)]
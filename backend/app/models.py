@@ -16,12 +16,15 @@ class AgentType(str, Enum):
     accommodation = "accommodation"
     attraction = "attraction"
     food = "food"
+    weather = "weather"
     budget = "budget"
 
 
 class SessionStatus(str, Enum):
     active = "active"
     completed = "completed"
+    cancelled = "cancelled"
+    failed = "failed"
 
 
 class DayBudget(BaseModel):
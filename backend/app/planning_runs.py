@@ -0,0 +1,121 @@
+"""
+AI 规划运行记录的持久化（planning_runs / planning_steps）
+
+一次规划要运行数分钟。运行开始、每个 Agent 完成、运行结束时各写一次，
+每次写入都打开自己的会话并在一个短事务内提交，规划期间不占用连接池中的连接；
+进程崩溃时已完成的 Agent 结果也已落库。
+
+结束运行的写入（finish）在屏蔽取消的作用域中执行：客户端断开后 Starlette 会
+反复取消流式响应的任务，不屏蔽的话运行记录会停留在 active、行程停留在 planning。
+"""
+
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+import uuid
+
+import anyio
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import AsyncSessionLocal
+from app.db_models import PlanningRun, PlanningStep, Trip
+from app.itinerary import replace_itinerary
+from app.models import SessionStatus
+
+
+class PlanningRunStore:
+    """
+    规划运行的写入接口
+
+    Usage:
+        store = PlanningRunStore()
+        run = await store.start(trip, trip_data)
+        await store.record_step(run.id, "weather", result, usage=usage)
+        await store.finish(run, trip, SessionStatus.completed)
+
+    传入的 Trip/PlanningRun 在提交后处于分离状态，可以继续读取属性。
+    """
+
+    def __init__(self, session_factory: Optional[Callable[[], AsyncSession]] = None):
+        """
+        Args:
+            session_factory: 创建 AsyncSession 的工厂，默认 AsyncSessionLocal
+        """
+        self.session_factory = session_factory or AsyncSessionLocal
+
+    async def start(self, trip: Trip, request: Dict[str, Any]) -> PlanningRun:
+        """在同一事务中创建行程和一条 active 状态的运行记录"""
+        run = PlanningRun(
+            id=str(uuid.uuid4()),
+            user_id=trip.user_id,
+            trip_id=trip.id,
+            status=SessionStatus.active.value,
+            request=request,
+        )
+        async with self.session_factory() as db:
+            db.add_all([trip, run])
+            await db.commit()
+        return run
+
+    async def record_step(
+        self,
+        run_id: str,
+        agent: str,
+        result: Any,
+        cached: bool = False,
+        degraded: bool = False,
+        usage: Optional[Dict[str, Any]] = None,
+    ):
+        """写入一个已完成 Agent 的结果"""
+        async with self.session_factory() as db:
+            db.add(
+                PlanningStep(
+                    id=str(uuid.uuid4()),
+                    run_id=run_id,
+                    agent_type=agent,
+                    result=result,
+                    cached=cached,
+                    degraded=degraded,
+                    usage=usage,
+                )
+            )
+            await db.commit()
+
+    async def finish(
+        self,
+        run: PlanningRun,
+        trip: Trip,
+        status: SessionStatus,
+        error: Optional[str] = None,
+    ):
+        """
+        写回行程的规划结果（行程项见 itinerary.py）并结束运行记录
+
+        在取消或失败的处理中调用时也会完成写入（屏蔽取消）。
+        """
+        now = datetime.utcnow()
+        with anyio.CancelScope(shield=True):
+            async with self.session_factory() as db:
+                await db.execute(
+                    update(Trip)
+                    .where(Trip.id == trip.id)
+                    .values(
+                        status=trip.status,
+                        itinerary=await replace_itinerary(
+                            db, trip.id, trip.itinerary
+                        ),
+                        budget=trip.budget,
+                        usage=trip.usage,
+                        version=Trip.version + 1,
+                        updated_at=now,
+                    )
+                )
+                await db.execute(
+                    update(PlanningRun)
+                    .where(PlanningRun.id == run.id)
+                    .values(status=status.value, error=error, finished_at=now)
+                )
+                await db.commit()
+        run.status = status.value
+        run.error = error
+        run.finished_at = now
@@ -0,0 +1,204 @@
+"""
+PATCH /trips/{trip_id}：用 merge patch 或 JSON Patch 修改行程
+
+补丁应用在行程的可编辑字段组成的文档上（写时复制，见 json_patch.py），
+然后只写回有变化的部分：
+
+- 没有变化时不执行 UPDATE
+- PostgreSQL 上 budget / preferences 对象按变化的路径用 jsonb_set / #- 修改，
+  只发送变化的值，其他数据库整体写入该列
+- itinerary 只在补丁涉及时才加载，行程项按 id 逐行比较（见 itinerary.py）
+- 有变化时行程版本号加 1（乐观锁，见 db_models.Trip.version）
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import JSON, Text, bindparam, cast, func, update
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.db_models import Trip
+from app.itinerary import legacy_itinerary, sync_itinerary
+from app.json_patch import (
+    REMOVED,
+    PatchError,
+    apply_json_patch,
+    diff_paths,
+    json_equal,
+    merge_patch,
+)
+
+MERGE_PATCH = "application/merge-patch+json"
+JSON_PATCH = "application/json-patch+json"
+
+# 补丁文档中的字段
+PATCHABLE_FIELDS = (
+    "title",
+    "destinations",
+    "start_date",
+    "end_date",
+    "travelers",
+    "status",
+    "budget",
+    "preferences",
+    "itinerary",
+    "is_public",
+)
+# 按路径修改的 JSON 对象列
+PARTIAL_JSON_FIELDS = ("budget", "preferences")
+DATE_FIELDS = ("start_date", "end_date")
+
+
+def patch_touches(content_type: str, patch: Any, field: str) -> bool:
+    """补丁是否可能修改 field（用于决定是否加载 itinerary）"""
+    if content_type != JSON_PATCH:
+        return isinstance(patch, dict) and field in patch
+    if not isinstance(patch, list):
+        return False
+
+    prefix = f"/{field}"
+    for operation in patch:
+        if not isinstance(operation, dict):
+            continue
+        for pointer in (operation.get("path"), operation.get("from")):
+            if isinstance(pointer, str) and (
+                pointer in ("", prefix) or pointer.startswith(prefix + "/")
+            ):
+                return True
+    return False
+
+
+def trip_document(trip: Trip, itinerary: Optional[List[Any]] = None) -> Dict[str, Any]:
+    """行程的补丁文档；itinerary 为 None 时不包含 itinerary"""
+    document = {}
+    for field in PATCHABLE_FIELDS:
+        if field == "itinerary":
+            if itinerary is not None:
+                document[field] = itinerary
+            continue
+        value = getattr(trip, field)
+        document[field] = value.isoformat() if isinstance(value, datetime) else value
+    return document
+
+
+def apply_patch(document: Dict[str, Any], content_type: str, patch: Any) -> Dict:
+    """
+    按 Content-Type 应用补丁，返回新文档
+
+    Raises:
+        PatchError: 补丁不合法，或修改了未知字段、删除了字段
+    """
+    if content_type == JSON_PATCH:
+        patched = apply_json_patch(document, patch)
+    else:
+        if not isinstance(patch, dict):
+            raise PatchError("Merge patch must be a JSON object")
+        patched = merge_patch(document, patch)
+
+    if not isinstance(patched, dict):
+        raise PatchError("Patched trip must be a JSON object")
+    unknown = sorted(patched.keys() - document.keys())
+    if unknown:
+        raise PatchError(f"Unknown trip fields: {', '.join(unknown)}")
+    removed = sorted(document.keys() - patched.keys())
+    if removed:
+        raise PatchError(f"Trip fields cannot be removed: {', '.join(removed)}")
+    return patched
+
+
+def _text_path(path: Tuple[str, ...]):
+    return bindparam(None, list(path), type_=ARRAY(Text))
+
+
+def jsonb_path_update(column, changes: List[Tuple[Tuple[str, ...], Any]]):
+    """只修改 changes 中路径的 SQL 表达式（PostgreSQL）"""
+    expression = cast(column, JSONB)
+    for path, value in changes:
+        if value is REMOVED:
+            expression = expression.op("#-")(_text_path(path))
+        else:
+            expression = func.jsonb_set(
+                expression, _text_path(path), bindparam(None, value, type_=JSONB)
+            )
+    return cast(expression, JSON)
+
+
+def column_values(
+    old: Dict[str, Any], new: Dict[str, Any], partial_json: bool
+) -> Dict[str, Any]:
+    """
+    新旧文档中变化的列（不含 itinerary）及其 UPDATE 值
+
+    Raises:
+        PatchError: 日期格式错误
+    """
+    values = {}
+    for field in PATCHABLE_FIELDS:
+        if field == "itinerary" or field not in old:
+            continue
+        before, after = old[field], new[field]
+        if before is after or json_equal(before, after):
+            continue
+
+        if field in DATE_FIELDS:
+            try:
+                values[field] = datetime.fromisoformat(after)
+            except (TypeError, ValueError) as e:
+                raise PatchError(f"Invalid {field}: {after!r}") from e
+        elif (
+            partial_json
+            and field in PARTIAL_JSON_FIELDS
+            and isinstance(before, dict)
+            and isinstance(after, dict)
+        ):
+            column = getattr(Trip, field)
+            values[field] = jsonb_path_update(column, diff_paths(before, after))
+        else:
+            values[field] = after
+    return values
+
+
+async def patch_trip(
+    db: AsyncSession, trip: Trip, content_type: str, patch: Any
+) -> Dict[str, Any]:
+    """
+    把补丁应用到行程并写回变化的部分（不提交）
+
+    Returns:
+        修改后的文档（补丁涉及 itinerary 时才包含 itinerary）
+
+    Raises:
+        PatchError: 补丁不合法
+        PatchTestFailed: JSON Patch 的 test 操作不成立
+        StaleDataError: 行程在读取后被其他请求修改
+    """
+    itinerary = None
+    if patch_touches(content_type, patch, "itinerary"):
+        itinerary = await legacy_itinerary(db, trip)
+    old = trip_document(trip, itinerary)
+    new = apply_patch(old, content_type, patch)
+
+    partial_json = db.bind is not None and db.bind.dialect.name == "postgresql"
+    values = column_values(old, new, partial_json)
+    changed = bool(values)
+    if itinerary is not None and not json_equal(itinerary, new["itinerary"]):
+        stored = await sync_itinerary(db, trip.id, new["itinerary"])
+        if not json_equal(trip.itinerary or [], stored):
+            values["itinerary"] = stored
+        changed = True
+
+    if changed:
+        # 与 ORM 的 version_id_col 相同：只更新读取时的版本，并把版本加 1
+        result = await db.execute(
+            update(Trip)
+            .where(Trip.id == trip.id, Trip.version == trip.version)
+            .values(**values, version=Trip.version + 1, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            raise StaleDataError(f"Trip {trip.id} was modified concurrently")
+        set_committed_value(trip, "version", trip.version + 1)
+    return new
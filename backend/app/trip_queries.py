@@ -0,0 +1,154 @@
+"""
+行程列表查询：keyset 分页、字段投影和过滤都在 SQL 中完成
+
+按 (created_at, id) 倒序分页，游标是上一页最后一条记录的 (created_at, id)，
+配合 trips 表上的 (user_id, created_at, id) 复合索引，翻到任何一页都只扫描
+一页的行。itinerary 和 preferences 这类大 JSON 列只在 fields 显式请求时加载。
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import base64
+import json
+
+from sqlalchemy import Select, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+
+from app.db_models import Trip
+from app.itinerary import legacy_itineraries
+
+# 行程响应中的字段（顺序即输出顺序）
+TRIP_FIELDS = (
+    "id",
+    "user_id",
+    "title",
+    "destinations",
+    "start_date",
+    "end_date",
+    "travelers",
+    "status",
+    "budget",
+    "preferences",
+    "itinerary",
+    "share_token",
+    "is_public",
+    "version",
+    "created_at",
+    "updated_at",
+)
+# 列表默认不加载的大 JSON 列
+HEAVY_TRIP_FIELDS = ("itinerary", "preferences")
+DEFAULT_LIST_FIELDS = tuple(f for f in TRIP_FIELDS if f not in HEAVY_TRIP_FIELDS)
+
+
+def serialize_trip(trip: Trip, fields: Iterable[str] = TRIP_FIELDS) -> Dict[str, Any]:
+    """行程的 JSON 表示，只读取 fields 中的属性"""
+    data = {}
+    for field in fields:
+        value = getattr(trip, field)
+        data[field] = value.isoformat() if isinstance(value, datetime) else value
+    return data
+
+
+def parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """
+    解析 fields 查询参数（逗号分隔），id 总是包含在内
+
+    Raises:
+        ValueError: 包含未知字段
+    """
+    if not fields:
+        return DEFAULT_LIST_FIELDS
+
+    requested = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = sorted(requested - set(TRIP_FIELDS))
+    if unknown:
+        raise ValueError(f"Unknown trip fields: {', '.join(unknown)}")
+    requested.add("id")
+    return tuple(f for f in TRIP_FIELDS if f in requested)
+
+
+def encode_cursor(trip: Trip) -> str:
+    """指向 trip 之后一条记录的游标"""
+    raw = json.dumps([trip.created_at.isoformat(), trip.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    游标中的 (created_at, id)
+
+    Raises:
+        ValueError: 游标格式错误
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, trip_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), str(trip_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def trips_page_query(
+    user_id: str,
+    fields: Iterable[str],
+    limit: int,
+    cursor: Optional[str] = None,
+    statuses: Optional[List[str]] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> Select:
+    """
+    用户行程一页的查询，多取一条用于判断是否还有下一页
+
+    Args:
+        user_id: 行程所属用户
+        fields: 需要加载的列；id 和 created_at 总会加载（游标需要）
+        limit: 每页条数
+        cursor: 上一页返回的游标
+        statuses: 只返回这些状态的行程
+        date_from: 只返回在此日期或之后结束的行程
+        date_to: 只返回在此日期或之前开始的行程
+    """
+    columns = set(fields) | {"id", "created_at"}
+    query = (
+        select(Trip)
+        .options(load_only(*(getattr(Trip, c) for c in columns), raiseload=True))
+        .where(Trip.user_id == user_id)
+    )
+
+    if cursor:
+        created_at, trip_id = decode_cursor(cursor)
+        query = query.where(tuple_(Trip.created_at, Trip.id) < (created_at, trip_id))
+    if statuses:
+        query = query.where(Trip.status.in_(statuses))
+    if date_from:
+        query = query.where(Trip.end_date >= datetime.combine(date_from, time.min))
+    if date_to:
+        next_day = datetime.combine(date_to + timedelta(days=1), time.min)
+        query = query.where(Trip.start_date < next_day)
+
+    return query.order_by(Trip.created_at.desc(), Trip.id.desc()).limit(limit + 1)
+
+
+async def list_trips_page(
+    db: AsyncSession,
+    user_id: str,
+    fields: Tuple[str, ...],
+    limit: int,
+    **filters: Any,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """一页行程和下一页的游标（没有下一页时为 None）"""
+    trips = (
+        await db.scalars(trips_page_query(user_id, fields, limit, **filters))
+    ).all()
+    next_cursor = encode_cursor(trips[limit - 1]) if len(trips) > limit else None
+    trips = trips[:limit]
+
+    page = [serialize_trip(trip, fields) for trip in trips]
+    if "itinerary" in fields:
+        itineraries = await legacy_itineraries(db, trips)
+        for data in page:
+            data["itinerary"] = itineraries[data["id"]]
+    return page, next_cursor
@@ -1,5 +1,8 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
+from typing import Dict, List, Optional
+
+from app.models import AgentType
 
 
 class Settings(BaseSettings):
@@ -12,6 +15,9 @@ class Settings(BaseSettings):
     database_user: str = "postgres"
     database_password: str = "your-super-secret-password"
     database_name: str = "postgres"
+    # Async connection pool shared by all requests
+    database_pool_size: int = 10
+    database_max_overflow: int = 20
 
     # 兼容旧配置（用于迁移）
     # mysql_host: str = "localhost"
@@ -33,14 +39,180 @@ class Settings(BaseSettings):
     anthropic_api_key: str = ""
     anthropic_base_url: str = "https://api.anthropic.com"
     anthropic_model: str = "claude-3-sonnet-20240229"
+    # OpenAI-compatible endpoint, used when calls are routed across providers
+    anthropic_compatible_base_url: str = "https://api.anthropic.com/v1/"
     tongyi_api_key: str = ""
     tongyi_base_url: str = "https://dashscope.aliyuncs.com/compatible-mode/v1"
     tongyi_model: str = "qwen-max"
 
+    # Per-agent model tiers: AgentType -> {"provider", "model", "tier", "base_url",
+    # "api_key"}. Missing fields fall back to the provider's settings, missing
+    # agents to the default provider, e.g. AGENT_MODELS='{"weather": {"tier": "fast"}}'
+    # or AGENT_MODELS='{"weather": {"model": "gpt-4o-mini"}}'
+    agent_models: Dict[AgentType, Dict[str, str]] = {}
+
+    # Each tier's model per provider; routed calls to another provider use that
+    # provider's model of the agent's tier
+    model_tiers: Dict[str, Dict[str, str]] = {
+        "fast": {
+            "openai": "gpt-4o-mini",
+            "anthropic": "claude-3-haiku-20240307",
+            "tongyi": "qwen-turbo",
+        },
+        "strong": {
+            "openai": "gpt-4o",
+            "anthropic": "claude-3-sonnet-20240229",
+            "tongyi": "qwen-max",
+        },
+    }
+
+    # Model prices in USD per 1M tokens, matched on the longest model-name prefix
+    model_prices: Dict[str, Dict[str, float]] = {
+        "gpt-4o-mini": {"input": 0.15, "output": 0.6},
+        "gpt-4o": {"input": 2.5, "output": 10.0},
+        "gpt-4": {"input": 30.0, "output": 60.0},
+        "claude-3-haiku": {"input": 0.25, "output": 1.25},
+        "claude-3-sonnet": {"input": 3.0, "output": 15.0},
+        "qwen-turbo": {"input": 0.05, "output": 0.2},
+        "qwen-plus": {"input": 0.4, "output": 1.2},
+        "qwen-max": {"input": 1.6, "output": 6.4},
+    }
+
+    # Provider rate limits: requests and tokens per minute (0 = unlimited)
+    openai_rpm_limit: int = 0
+    openai_tpm_limit: int = 0
+    anthropic_rpm_limit: int = 0
+    anthropic_tpm_limit: int = 0
+    tongyi_rpm_limit: int = 0
+    tongyi_tpm_limit: int = 0
+
+    # Route LLM calls across configured providers and hedge slow calls
+    llm_routing_enabled: bool = True
+    llm_router_window: int = 50
+    llm_router_max_error_rate: float = 0.5
+    llm_hedge_percentile: float = 0.95
+    llm_hedge_min_delay: float = 2.0
+
+    # LLM backend: "live" calls the providers, "fake" replays scripted replies with
+    # synthetic latency and failures and needs no network (see fake_model.py).
+    # Role profiles override latency_median_ms, latency_p95_ms, error_rate and
+    # output_tokens, e.g. FAKE_LLM_PROFILES='{"planner": {"latency_median_ms": 4000}}'
+    llm_backend: str = "live"
+    fake_llm_script_path: str = ""
+    fake_llm_latency_median_ms: float = 800.0
+    fake_llm_latency_p95_ms: float = 3000.0
+    fake_llm_error_rate: float = 0.0
+    fake_llm_output_tokens: int = 0
+    fake_llm_profiles: Dict[str, Dict[str, float]] = {}
+    fake_llm_seed: Optional[int] = None
+
+    # Shared LLM HTTP connection pool (see model_registry.py)
+    llm_http_max_connections: int = 100
+    llm_http_max_keepalive_connections: int = 20
+    llm_http_keepalive_expiry: float = 60.0
+    llm_http_timeout: float = 120.0
+
+    # Agent coordinator pool
+    coordinator_pool_size: int = 4
+    coordinator_pool_lease_timeout: float = 30.0
+
+    # Amap MCP session pool
+    mcp_pool_max_sessions: int = 4
+    mcp_pool_min_sessions: int = 1
+    mcp_pool_idle_timeout: float = 300.0
+    mcp_pool_health_check_interval: float = 30.0
+
+    # Coalesce identical concurrent /trips/ai-plan requests into one agent run
+    planning_coalescing_enabled: bool = True
+
+    # Planning deadline (seconds) and each agent's share of it; specialists run
+    # concurrently, so their shares plus budget and planner should stay <= 1
+    planning_deadline_seconds: float = 120.0
+    planning_deadline_max_seconds: float = 300.0
+    planning_agent_time_shares: Dict[str, float] = {
+        "transport": 0.5,
+        "accommodation": 0.5,
+        "attraction": 0.5,
+        "food": 0.5,
+        "weather": 0.5,
+        "budget": 0.15,
+        "planner": 0.35,
+    }
+    planning_fallback_cache_ttl: float = 7 * 24 * 3600
+    planning_fallback_cache_max_entries: int = 1024
+
+    # Seconds between client-disconnect checks while a plan is streaming
+    planning_disconnect_poll_interval: float = 1.0
+
+    # Compaction of specialist results before they reach budget and planner:
+    # token budget per section and maximum length of free-text fields
+    planning_compaction_enabled: bool = True
+    planning_compaction_section_tokens: Dict[str, int] = {
+        "transport": 800,
+        "accommodation": 800,
+        "attraction": 1200,
+        "food": 1000,
+        "weather": 600,
+    }
+    planning_compaction_max_text_chars: int = 200
+
+    # Follow-up requests for agent replies without usable JSON
+    agent_output_max_reasks: int = 1
+
+    # Agents answered by their direct tool pipeline instead of the LLM when the
+    # amap tools are available (see direct_mode.py)
+    agent_direct_mode_agents: List[str] = ["weather"]
+
+    # Adaptive ReAct iteration caps: percentile of observed iterations times
+    # headroom, bounded by the factory max_iters (see iteration_control.py)
+    agent_iteration_cap_enabled: bool = True
+    agent_iteration_cap_percentile: float = 0.95
+    agent_iteration_cap_headroom: float = 1.25
+    agent_iteration_cap_min: int = 3
+    agent_iteration_cap_min_samples: int = 20
+    agent_iteration_cap_window: int = 200
+
+    # Agent recommendation cache
+    recommendation_cache_enabled: bool = True
+    recommendation_cache_ttl: float = 6 * 3600
+    recommendation_cache_max_entries: int = 512
+    recommendation_cache_date_bucket_days: int = 7
+    recommendation_cache_budget_bucket: int = 1000
+    recommendation_cache_postgres_enabled: bool = False
+
+    # Amap MCP tool result cache (TTL in seconds)
+    tool_cache_max_entries: int = 2048
+    tool_cache_default_ttl: float = 3600.0
+    tool_cache_ttls: Dict[str, float] = {
+        "maps_geo": 7 * 24 * 3600,
+        "maps_regeocode": 7 * 24 * 3600,
+        "maps_text_search": 24 * 3600,
+        "maps_around_search": 24 * 3600,
+        "maps_search_detail": 24 * 3600,
+        "maps_distance": 24 * 3600,
+        "maps_direction_driving_by_address": 6 * 3600,
+        "maps_direction_transit_integrated_by_address": 6 * 3600,
+        "maps_direction_walking_by_address": 6 * 3600,
+        "maps_weather": 30 * 60,
+    }
+    tool_cache_postgres_enabled: bool = False
+
+    # GET /trips page size (keyset pagination, see trip_queries.py)
+    trips_page_size: int = 20
+    trips_max_page_size: int = 100
+
     # Amap
     amap_api_key: str = ""
     amap_web_api_key: str = ""
 
+    # Amap MCP server: a key of mcp_config.MCP_SERVERS. "fake_amap" answers from a
+    # seedable synthetic dataset with injected latency (see fake_amap_server.py)
+    amap_mcp_server: str = "amap"
+    fake_amap_seed: int = 0
+    fake_amap_latency_median_ms: float = 30.0
+    fake_amap_latency_p95_ms: float = 150.0
+    fake_amap_error_rate: float = 0.0
+
     # App
     app_name: str = "Travel Planner"
     app_version: str = "1.0.0"
@@ -52,6 +224,11 @@ class Settings(BaseSettings):
         """返回 PostgreSQL 数据库连接 URL"""
         return f"postgresql+psycopg2://{self.database_user}:{self.database_password}@{self.database_host}:{self.database_port}/{self.database_name}"
 
+    @property
+    def async_database_url(self) -> str:
+        """返回 asyncpg 异步连接 URL"""
+        return f"postgresql+asyncpg://{self.database_user}:{self.database_password}@{self.database_host}:{self.database_port}/{self.database_name}"
+
 
 @lru_cache()
 def get_settings() -> Settings:
@@ -1,16 +1,27 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import (
+    FastAPI,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.responses import StreamingResponse
 from contextlib import asynccontextmanager
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from typing import Optional
+import anyio
 import jwt
 import hashlib
 import uuid
 import json
 import asyncio
-import os
 import logging
+import time
 
 # 启用DEBUG日志级别以查看详细输出
 logging.basicConfig(
@@ -23,10 +34,40 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from config import settings
-from app.database import get_db, init_db
-from app.db_models import User, Trip, generate_share_token
+from app.database import close_db, get_db, init_db
+from app.db_models import ItineraryItem, User, Trip, generate_share_token
+from app.itinerary import (
+    add_item,
+    ensure_items,
+    item_to_dict,
+    legacy_itinerary,
+    reorder_day,
+    replace_itinerary,
+    split_itinerary,
+    update_item,
+    validate_item,
+)
+from app.json_patch import PatchError, PatchTestFailed
+from app.models import SessionStatus
+from app.planning_runs import PlanningRunStore
+from app.trip_patch import JSON_PATCH, MERGE_PATCH, patch_trip
+from app.trip_queries import list_trips_page, parse_fields, serialize_trip
 from app.api_models import TripPlanRequest
-from sqlalchemy.orm import Session
+from app.agentscope_agents.iteration_control import get_iteration_controller
+from app.agentscope_agents.mcp_pool import get_amap_mcp_pool
+from app.agentscope_agents.model_registry import get_model_registry
+from app.agentscope_agents.rate_limiter import rate_limiter_metrics
+from app.agentscope_agents.router import get_provider_router
+from app.agentscope_agents.pool import get_coordinator_pool
+from app.agentscope_agents.result_cache import get_recommendation_cache
+from app.agentscope_agents.singleflight import (
+    get_planning_flights,
+    planning_flight_key,
+)
+from app.agentscope_agents.tool_cache import get_tool_cache
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
 
 logger = logging.getLogger(__name__)
 
@@ -37,7 +78,22 @@ async def lifespan(app: FastAPI):
     print("📦 Initializing database...")
     init_db()
     print("✅ Database initialized")
+    amap_pool = get_amap_mcp_pool()
+    if amap_pool:
+        await amap_pool.start()
+        print("✅ Amap MCP session pool started")
+    try:
+        await get_coordinator_pool().start()
+        print("✅ Agent coordinator pool warmed up")
+    except Exception as e:
+        logger.warning(
+            f"Coordinator pool warm-up failed, will retry on first lease: {e}"
+        )
     yield
+    if amap_pool:
+        await amap_pool.close()
+    await get_model_registry().aclose()
+    await close_db()
     print("👋 Travel Planner API stopped")
 
 
@@ -54,6 +110,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 security = HTTPBearer()
@@ -61,7 +118,6 @@ security = HTTPBearer()
 
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
 ) -> dict:
     token = credentials.credentials
     try:
@@ -90,9 +146,30 @@ async def health_check():
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
 
+@app.get("/metrics")
+async def get_metrics():
+    amap_pool = get_amap_mcp_pool()
+    recommendation_cache = get_recommendation_cache()
+    return {
+        "coordinator_pool": get_coordinator_pool().metrics(),
+        "model_registry": get_model_registry().metrics(),
+        "llm_rate_limits": rate_limiter_metrics(),
+        "llm_router": get_provider_router().metrics(),
+        "agent_iterations": get_iteration_controller().metrics(),
+        "amap_mcp_pool": amap_pool.metrics() if amap_pool else None,
+        "amap_tool_cache": get_tool_cache().metrics(),
+        "recommendation_cache": recommendation_cache.metrics()
+        if recommendation_cache
+        else None,
+        "planning_flights": get_planning_flights().metrics(),
+    }
+
+
 @app.post("/auth/register")
-async def register(user_data: dict, db: Session = Depends(get_db)):
-    existing_user = db.query(User).filter(User.email == user_data["email"]).first()
+async def register(user_data: dict, db: AsyncSession = Depends(get_db)):
+    existing_user = await db.scalar(
+        select(User).where(User.email == user_data["email"])
+    )
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -109,21 +186,20 @@ async def register(user_data: dict, db: Session = Depends(get_db)):
     )
 
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
 
     return {"message": "User created successfully", "user_id": user.id}
 
 
 @app.post("/auth/login")
-async def login(user_data: dict, db: Session = Depends(get_db)):
+async def login(user_data: dict, db: AsyncSession = Depends(get_db)):
     email = user_data.get("email")
     password = user_data.get("password")
 
     if not email or not password:
         raise HTTPException(status_code=422, detail="Email and password required")
 
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.scalar(select(User).where(User.email == email))
 
     if not user or user.password_hash != hashlib.sha256(password.encode()).hexdigest():
         raise HTTPException(status_code=401, detail="Invalid credentials")
@@ -144,46 +220,59 @@ async def login(user_data: dict, db: Session = Depends(get_db)):
 
 @app.get("/trips")
 async def get_trips(
-    current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    trip_status: Optional[str] = Query(None, alias="status"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
-    user_id = current_user["user_id"]
-    trips = db.query(Trip).filter(Trip.user_id == user_id).all()
-
-    result = []
-    for trip in trips:
-        result.append(
-            {
-                "id": trip.id,
-                "user_id": trip.user_id,
-                "title": trip.title,
-                "destinations": trip.destinations,
-                "start_date": trip.start_date.isoformat() if trip.start_date else None,
-                "end_date": trip.end_date.isoformat() if trip.end_date else None,
-                "travelers": trip.travelers,
-                "status": trip.status,
-                "budget": trip.budget,
-                "preferences": trip.preferences,
-                "itinerary": trip.itinerary,
-                "share_token": trip.share_token,
-                "is_public": trip.is_public,
-                "created_at": trip.created_at.isoformat() if trip.created_at else None,
-                "updated_at": trip.updated_at.isoformat() if trip.updated_at else None,
-            }
+    """
+    One page of the user's trips, newest first.
+
+    The body is the list of trips; when there are more, the X-Next-Cursor
+    header holds the cursor of the next page. "fields" is a comma-separated
+    projection (default: every field but itinerary and preferences), "status"
+    a comma-separated list of statuses and date_from/date_to keep the trips
+    overlapping that date range.
+    """
+    page_size = min(limit or settings.trips_page_size, settings.trips_max_page_size)
+    try:
+        trips, next_cursor = await list_trips_page(
+            db,
+            current_user["user_id"],
+            parse_fields(fields),
+            page_size,
+            cursor=cursor,
+            statuses=trip_status.split(",") if trip_status else None,
+            date_from=date_from,
+            date_to=date_to,
         )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-    return result
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return trips
 
 
 @app.post("/trips")
 async def create_trip(
     trip_data: dict,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     from app.db_models import generate_share_token
 
+    # The itinerary goes either into item rows or into the JSON column, never
+    # both, so the trip row is written once
+    trip_id = str(uuid.uuid4())
+    itinerary, items = split_itinerary(trip_id, trip_data.get("itinerary", []))
     trip = Trip(
-        id=str(uuid.uuid4()),
+        id=trip_id,
         user_id=current_user["user_id"],
         title=trip_data.get("title", "New Trip"),
         destinations=trip_data.get("destinations", []),
@@ -197,14 +286,16 @@ async def create_trip(
         status=trip_data.get("status", "draft"),
         budget=trip_data.get("budget", {}),
         preferences=trip_data.get("preferences", {}),
-        itinerary=trip_data.get("itinerary", []),
+        itinerary=itinerary,
         share_token=generate_share_token(),
         is_public=trip_data.get("is_public", False),
     )
 
     db.add(trip)
-    db.commit()
-    db.refresh(trip)
+    # Insert the trip before its items (there is no ORM relationship to order them)
+    await db.flush()
+    db.add_all(items)
+    await db.commit()
 
     return {
         "message": "Trip created successfully",
@@ -220,7 +311,7 @@ async def create_trip(
             "status": trip.status,
             "budget": trip.budget,
             "preferences": trip.preferences,
-            "itinerary": trip.itinerary,
+            "itinerary": await legacy_itinerary(db, trip),
             "share_token": trip.share_token,
             "is_public": trip.is_public,
             "created_at": trip.created_at.isoformat() if trip.created_at else None,
@@ -229,21 +320,70 @@ async def create_trip(
     }
 
 
+# SSE step metadata per agent: (start action, start message, done message, agent label)
+PLAN_STEP_MESSAGES = {
+    "transport": ("transport", "🚄 正在搜索最佳交通方式...", "✅ 交通推荐完成", "TransportAgent"),
+    "accommodation": (
+        "accommodation",
+        "🏨 正在为您寻找住宿...",
+        "✅ 住宿推荐完成",
+        "AccommodationAgent",
+    ),
+    "attraction": ("attraction", "🏛️ 正在搜索精选景点...", "✅ 景点推荐完成", "AttractionAgent"),
+    "food": ("food", "🍜 正在为您推荐美食...", "✅ 美食推荐完成", "FoodAgent"),
+    "weather": ("weather", "☀️ 正在查询天气信息...", "✅ 天气查询完成", "WeatherAgent"),
+    "budget": ("budget", "💰 正在分析预算分配...", "✅ 预算分析完成", "BudgetAgent"),
+    "planner": ("generate", "📋 正在生成完整行程安排...", "✅ 行程安排生成完成", "PlannerAgent"),
+}
+
+
+async def _cancel_on_disconnect(request: Request, task: asyncio.Task):
+    """Cancel the streaming task once the SSE client has gone away"""
+    while not await request.is_disconnected():
+        await asyncio.sleep(settings.planning_disconnect_poll_interval)
+    task.cancel()
+
+
 @app.post("/trips/ai-plan")
 async def ai_plan_trip_streaming(
     trip_data: dict,
+    request: Request,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
 ):
     """
     Multi-Agent Trip Planning with SSE Streaming
     Uses AgentScope ReActAgents with amap-mcp-server tools.
+
+    Agents run as a dependency graph: independent agents run concurrently and
+    their completion events are streamed in the order they finish.
+
+    The request may set "deadline_seconds" (capped by settings). Agents that
+    overrun their slice of it are replaced by fallbacks and reported in
+    "degraded_agents".
+
+    Token, latency and cost usage is reported per agent in every step event,
+    summarized in the complete event and stored on the trip (GET
+    /trips/{trip_id}/usage).
+
+    The run is recorded in planning_runs and every agent result is written to
+    planning_steps as soon as the agent completes.
+
+    If the client disconnects, every running agent, LLM and MCP call is
+    cancelled and the trip is marked "cancelled".
     """
-    from app.agentscope_agents.coordinator import AgentCoordinator
-    from app.agentscope_agents.mcp_config import create_amap_mcp_client
-    from app.ai_providers import get_provider_config
+    from app.agentscope_agents.deadline import planning_deadline
+    from app.agentscope_agents.scheduler import build_planning_graph
+    from app.agentscope_agents.usage import summarize_usage
 
-    async def ai_plan_generator(trip_data, current_user, db):
+    try:
+        deadline = planning_deadline(trip_data.pop("deadline_seconds", None))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    async def ai_plan_generator(trip_data, current_user):
+        # Every write is a short transaction of its own, so no pool connection
+        # is held while the agents run
+        runs = PlanningRunStore()
         step_data = {
             "step": 1,
             "message": "正在初始化行程...",
@@ -272,215 +412,398 @@ async def ai_plan_trip_streaming(
             is_public=False,
         )
 
-        db.add(trip)
-        db.commit()
-        db.refresh(trip)
+        run = await runs.start(trip, trip_data)
 
-        step_data = {
-            "step": 2,
-            "message": "✅ 行程基础信息已创建",
-            "action": "init_complete",
-            "progress": 10,
-            "trip_id": trip.id,
-        }
-        yield f"data: {json.dumps(step_data)}\n\n"
-        await asyncio.sleep(0.5)
+        watcher = asyncio.create_task(
+            _cancel_on_disconnect(request, asyncio.current_task())
+        )
+        events = None
+        agent_usage = {}
+        started = time.monotonic()
+        try:
+            step_data = {
+                "step": 2,
+                "message": "✅ 行程基础信息已创建",
+                "action": "init_complete",
+                "progress": 10,
+                "trip_id": trip.id,
+            }
+            yield f"data: {json.dumps(step_data)}\n\n"
 
-        step_data = {
-            "step": 3,
-            "message": "🤖 正在初始化多智能体系统...",
-            "action": "initializing_agents",
-            "progress": 15,
-        }
-        yield f"data: {json.dumps(step_data)}\n\n"
+            step_data = {
+                "step": 3,
+                "message": "🤖 正在初始化多智能体系统...",
+                "action": "initializing_agents",
+                "progress": 15,
+            }
+            yield f"data: {json.dumps(step_data)}\n\n"
+
+            graph = build_planning_graph()
+            results = {}
+            cached_agents = []
+            degraded_agents = []
+            step = 3
+
+            async def plan_events():
+                async with get_coordinator_pool().lease() as coordinator:
+                    async for event in coordinator.run_graph(
+                        trip_data, graph, deadline
+                    ):
+                        yield event
+
+            if settings.planning_coalescing_enabled:
+                events = get_planning_flights().subscribe(
+                    planning_flight_key(trip_data),
+                    plan_events,
+                    expires_at=deadline.expires_at,
+                )
+            else:
+                events = plan_events()
+
+            async for event in events:
+                agent = event["agent"]
+                action, start_message, done_message, agent_label = PLAN_STEP_MESSAGES[
+                    agent
+                ]
+                step += 1
+
+                if event["event"] == "started":
+                    step_data = {
+                        "step": step,
+                        "message": start_message,
+                        "action": action,
+                        "progress": 15 + 80 * len(results) // len(graph.nodes),
+                        "agent": agent_label,
+                    }
+                else:
+                    results[agent] = event["result"]
+                    agent_usage[agent] = event["usage"]
+                    await runs.record_step(
+                        run.id,
+                        agent,
+                        event["result"],
+                        cached=event["cached"],
+                        degraded=event["degraded"],
+                        usage=event["usage"],
+                    )
+                    if event["cached"]:
+                        cached_agents.append(agent)
+                    if event["degraded"]:
+                        degraded_agents.append(agent)
+                    step_data = {
+                        "step": step,
+                        "message": done_message,
+                        "action": f"{agent}_complete",
+                        "progress": 15 + 80 * len(results) // len(graph.nodes),
+                        "data": event["result"],
+                        "cached": event["cached"],
+                        "degraded": event["degraded"],
+                        "usage": event["usage"],
+                    }
+                yield f"data: {json.dumps(step_data)}\n\n"
+
+            final_plan = results["planner"]
+
+            if "itinerary" in final_plan:
+                trip.itinerary = final_plan["itinerary"]
+
+            if "budget" in final_plan:
+                trip.budget = final_plan["budget"]
+
+            trip.usage = summarize_usage(agent_usage, time.monotonic() - started)
+            await runs.finish(run, trip, SessionStatus.completed)
+
+            step_data = {
+                "step": step + 1,
+                "message": "🎉 AI 行程规划完成！",
+                "action": "complete",
+                "progress": 100,
+                "cached_agents": cached_agents,
+                "degraded_agents": degraded_agents,
+                "usage": trip.usage,
+                "trip": {
+                    "id": trip.id,
+                    "title": trip.title,
+                    "destinations": trip.destinations,
+                    "start_date": trip.start_date.isoformat()
+                    if trip.start_date
+                    else None,
+                    "end_date": trip.end_date.isoformat() if trip.end_date else None,
+                    "travelers": trip.travelers,
+                    "status": trip.status,
+                    "budget": trip.budget,
+                    "preferences": trip.preferences,
+                    "itinerary": trip.itinerary,
+                    "share_token": trip.share_token,
+                    "is_public": trip.is_public,
+                    "created_at": trip.created_at.isoformat()
+                    if trip.created_at
+                    else None,
+                    "updated_at": trip.updated_at.isoformat()
+                    if trip.updated_at
+                    else None,
+                },
+            }
+            yield f"data: {json.dumps(step_data)}\n\n"
+        except (asyncio.CancelledError, GeneratorExit):
+            logger.info(f"Planning for trip {trip.id} cancelled by client disconnect")
+            # Starlette keeps cancelling this task after a disconnect; finish()
+            # is shielded from that, and the watcher must not cancel it either
+            watcher.cancel()
+            trip.status = "cancelled"
+            if agent_usage:
+                trip.usage = summarize_usage(agent_usage, time.monotonic() - started)
+            await runs.finish(run, trip, SessionStatus.cancelled)
+            raise
+        except Exception as e:
+            logger.error(f"Planning for trip {trip.id} failed: {e}")
+            if agent_usage:
+                trip.usage = summarize_usage(agent_usage, time.monotonic() - started)
+            await runs.finish(run, trip, SessionStatus.failed, error=str(e))
+            raise
+        finally:
+            watcher.cancel()
+            if events is not None:
+                # Release the leased coordinator even while being cancelled
+                with anyio.CancelScope(shield=True):
+                    await events.aclose()
 
-        ai_config = get_provider_config("openai")
-        model_configs = {
-            "transport": ai_config,
-            "accommodation": ai_config,
-            "attraction": ai_config,
-            "food": ai_config,
-            "weather": ai_config,
-            "budget": ai_config,
-            "planner": ai_config,
-        }
+    return StreamingResponse(
+        ai_plan_generator(trip_data, current_user),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        },
+    )
 
-        mcp_client = None
-        if os.getenv("AMAP_API_KEY"):
-            try:
-                mcp_client = create_amap_mcp_client()
-                logger.info("Amap MCP client created successfully")
-            except Exception as e:
-                logger.warning(f"Failed to create Amap MCP client: {e}")
-
-        coordinator = AgentCoordinator(model_configs)
-        await coordinator.initialize(
-            mcp_clients={"amap": mcp_client} if mcp_client else None
-        )
 
-        await asyncio.sleep(0.5)
+def _trip_etag(trip: Trip) -> str:
+    return f'"{trip.version}"'
 
-        step_data = {
-            "step": 4,
-            "message": "🚄 正在搜索最佳交通方式...",
-            "action": "transport",
-            "progress": 30,
-            "agent": "TransportAgent",
-        }
 
-        yield f"data: {json.dumps(step_data)}\n\n"
+def _etag_matches(header: str, etag: str) -> bool:
+    """Strong comparison of an If-Match / If-None-Match header against an ETag"""
+    return any(tag.strip() in ("*", etag) for tag in header.split(","))
+
+
+def _trip_modified() -> HTTPException:
+    """412 for a write based on an outdated version of the trip"""
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="Trip has been modified",
+    )
+
+
+def _check_if_match(if_match: Optional[str], trip: Trip):
+    """412 unless the If-Match header (when given) names the trip's version"""
+    if if_match is not None and not _etag_matches(if_match, _trip_etag(trip)):
+        raise _trip_modified()
+
+
+@app.get("/trips/{trip_id}")
+async def get_trip(
+    trip_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    The trip with its itinerary. The ETag header is the trip's version; send
+    it as If-Match with PUT/PATCH to fail with 412 instead of overwriting a
+    concurrent edit.
+    """
+    user_id = current_user["user_id"]
+    trip = await db.scalar(
+        select(Trip).where(Trip.id == trip_id, Trip.user_id == user_id)
+    )
+
+    if not trip:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Trip not found",
+        )
 
-        transport_result = await coordinator._execute_agent(
-            coordinator._agents["transport"],
-            {"action": "recommend", "trip_data": trip_data},
-            "transport",
+    etag = _trip_etag(trip)
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
         )
 
-        step_data = {
-            "step": 4,
-            "message": "✅ 交通推荐完成",
-            "action": "transport_complete",
-            "progress": 40,
-            "data": transport_result,
-        }
-        yield f"data: {json.dumps(step_data)}\n\n"
-        await asyncio.sleep(0.5)
+    data = serialize_trip(trip)
+    data["itinerary"] = await legacy_itinerary(db, trip)
+    response.headers["ETag"] = etag
+    return data
 
-        step_data = {
-            "step": 5,
-            "message": "🏨 正在为您寻找住宿...",
-            "action": "accommodation",
-            "progress": 50,
-            "agent": "AccommodationAgent",
-        }
-        yield f"data: {json.dumps(step_data)}\n\n"
 
-        accommodation_result = await coordinator._execute_agent(
-            coordinator._agents["accommodation"],
-            {"action": "recommend", "trip_data": trip_data},
-            "accommodation",
+@app.get("/trips/{trip_id}/usage")
+async def get_trip_usage(
+    trip_id: str,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Token, latency and cost usage of the trip's last AI planning run"""
+    user_id = current_user["user_id"]
+    trip = await db.scalar(
+        select(Trip).where(Trip.id == trip_id, Trip.user_id == user_id)
+    )
+
+    if not trip:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Trip not found",
         )
 
-        step_data = {
-            "step": 5,
-            "message": "✅ 住宿推荐完成",
-            "action": "accommodation_complete",
-            "progress": 60,
-            "data": accommodation_result,
-        }
-        yield f"data: {json.dumps(step_data)}\n\n"
-        await asyncio.sleep(0.5)
+    return {"trip_id": trip.id, "usage": trip.usage}
 
-        step_data = {
-            "step": 6,
-            "message": "🏛️ 正在搜索精选景点...",
-            "action": "attraction",
-            "progress": 70,
-            "agent": "AttractionAgent",
-        }
-        yield f"data: {json.dumps(step_data)}\n\n"
 
-        attraction_result = await coordinator._execute_agent(
-            coordinator._agents["attraction"],
-            {"action": "recommend", "trip_data": trip_data},
-            "attraction",
+async def _get_owned_trip(db: AsyncSession, trip_id: str, current_user: dict) -> Trip:
+    """The current user's trip; 404 when it does not exist or is someone else's"""
+    trip = await db.scalar(
+        select(Trip).where(Trip.id == trip_id, Trip.user_id == current_user["user_id"])
+    )
+
+    if not trip:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Trip not found",
         )
+    return trip
 
-        step_data = {
-            "step": 6,
-            "message": "✅ 景点推荐完成",
-            "action": "attraction_complete",
-            "progress": 80,
-            "data": attraction_result,
-        }
-        yield f"data: {json.dumps(step_data)}\n\n"
-        await asyncio.sleep(0.5)
 
-        step_data = {
-            "step": 7,
-            "message": "🍜 正在为您推荐美食...",
-            "action": "food",
-            "progress": 90,
-            "agent": "FoodAgent",
-        }
-        yield f"data: {json.dumps(step_data)}\n\n"
+async def _get_itinerary_item(
+    db: AsyncSession, trip: Trip, item_id: str
+) -> ItineraryItem:
+    item = await db.scalar(
+        select(ItineraryItem).where(
+            ItineraryItem.id == item_id, ItineraryItem.trip_id == trip.id
+        )
+    )
 
-        food_result = await coordinator._execute_agent(
-            coordinator._agents["food"],
-            {"action": "recommend", "trip_data": trip_data},
-            "food",
+    if not item:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Itinerary item not found",
         )
+    return item
 
-        step_data = {
-            "step": 7,
-            "message": "✅ 美食推荐完成",
-            "action": "food_complete",
-            "progress": 95,
-            "data": food_result,
-        }
-        yield f"data: {json.dumps(step_data)}\n\n"
-        await asyncio.sleep(0.5)
 
-        destinations_str = ", ".join(trip_data.get("destinations", []))
+@app.get("/trips/{trip_id}/itinerary")
+async def get_trip_itinerary(
+    trip_id: str,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """The trip's itinerary items as the legacy itinerary array"""
+    trip = await _get_owned_trip(db, trip_id, current_user)
+    return await legacy_itinerary(db, trip)
 
-        step_data = {
-            "step": 8,
-            "message": f"🎯 AI规划完成！目的地: {destinations_str}",
-            "action": "complete",
-            "progress": 100,
-            "trip": {
-                "id": trip.id,
-                "title": trip.title,
-                "destinations": trip.destinations,
-                "start_date": trip.start_date.isoformat() if trip.start_date else None,
-                "end_date": trip.end_date.isoformat() if trip.end_date else None,
-                "travelers": trip.travelers,
-                "status": trip.status,
-                "budget": trip.budget,
-                "preferences": trip.preferences,
-                "created_at": trip.created_at.isoformat() if trip.created_at else None,
-                "updated_at": trip.updated_at.isoformat() if trip.updated_at else None,
-            },
-        }
-        yield f"data: {json.dumps(step_data)}\n\n"
 
-    return StreamingResponse(
-        ai_plan_generator(trip_data, current_user, db),
-        media_type="text/event-stream",
-    )
+@app.post("/trips/{trip_id}/itinerary/items")
+async def create_itinerary_item(
+    trip_id: str,
+    item_data: dict,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    trip = await _get_owned_trip(db, trip_id, current_user)
+    try:
+        await ensure_items(db, trip)
+        item = await add_item(db, trip.id, validate_item(item_data))
+        trip.updated_at = datetime.utcnow()
+        await db.commit()
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except StaleDataError:
+        raise _trip_modified()
+
+    return {
+        "message": "Itinerary item created successfully",
+        "item": item_to_dict(item),
+    }
 
 
-@app.get("/trips/{trip_id}")
-async def get_trip(
+@app.patch("/trips/{trip_id}/itinerary/items/{item_id}")
+async def update_itinerary_item(
     trip_id: str,
+    item_id: str,
+    item_data: dict,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    user_id = current_user["user_id"]
-    trip = db.query(Trip).filter(Trip.id == trip_id, Trip.user_id == user_id).first()
+    """Update the given fields of one itinerary item"""
+    trip = await _get_owned_trip(db, trip_id, current_user)
+    item = await _get_itinerary_item(db, trip, item_id)
+    try:
+        update_item(item, item_data)
+        trip.updated_at = datetime.utcnow()
+        await db.commit()
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except StaleDataError:
+        raise _trip_modified()
 
-    if not trip:
+    return {
+        "message": "Itinerary item updated successfully",
+        "item": item_to_dict(item),
+    }
+
+
+@app.delete("/trips/{trip_id}/itinerary/items/{item_id}")
+async def delete_itinerary_item(
+    trip_id: str,
+    item_id: str,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    trip = await _get_owned_trip(db, trip_id, current_user)
+    item = await _get_itinerary_item(db, trip, item_id)
+
+    await db.delete(item)
+    trip.updated_at = datetime.utcnow()
+    try:
+        await db.commit()
+    except StaleDataError:
+        raise _trip_modified()
+
+    return {"message": "Itinerary item deleted successfully"}
+
+
+@app.post("/trips/{trip_id}/itinerary/reorder")
+async def reorder_itinerary(
+    trip_id: str,
+    order_data: dict,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Reorder the items of one day: {"day": 2, "item_ids": [...]}.
+
+    item_ids lists every item of the day in the new order; the day's time
+    slots stay where they are and are handed to the items in that order.
+    """
+    trip = await _get_owned_trip(db, trip_id, current_user)
+    day, item_ids = order_data.get("day"), order_data.get("item_ids")
+    if not isinstance(day, int) or not isinstance(item_ids, list):
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Trip not found",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Expected {"day": <int>, "item_ids": [<item id>, ...]}',
         )
+    try:
+        await ensure_items(db, trip)
+        items = await reorder_day(db, trip.id, day, item_ids)
+        trip.updated_at = datetime.utcnow()
+        await db.commit()
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except StaleDataError:
+        raise _trip_modified()
 
     return {
-        "id": trip.id,
-        "user_id": trip.user_id,
-        "title": trip.title,
-        "destinations": trip.destinations,
-        "start_date": trip.start_date.isoformat() if trip.start_date else None,
-        "end_date": trip.end_date.isoformat() if trip.end_date else None,
-        "travelers": trip.travelers,
-        "status": trip.status,
-        "budget": trip.budget,
-        "preferences": trip.preferences,
-        "itinerary": trip.itinerary,
-        "share_token": trip.share_token,
-        "is_public": trip.is_public,
-        "created_at": trip.created_at.isoformat() if trip.created_at else None,
-        "updated_at": trip.updated_at.isoformat() if trip.updated_at else None,
+        "message": "Itinerary reordered successfully",
+        "items": [item_to_dict(item) for item in items],
     }
 
 
@@ -488,17 +811,22 @@ async def get_trip(
 async def update_trip(
     trip_id: str,
     trip_data: dict,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     user_id = current_user["user_id"]
-    trip = db.query(Trip).filter(Trip.id == trip_id, Trip.user_id == user_id).first()
+    trip = await db.scalar(
+        select(Trip).where(Trip.id == trip_id, Trip.user_id == user_id)
+    )
 
     if not trip:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Trip not found",
         )
+    _check_if_match(if_match, trip)
 
     if "title" in trip_data:
         trip.title = trip_data["title"]
@@ -517,15 +845,68 @@ async def update_trip(
     if "preferences" in trip_data:
         trip.preferences = trip_data["preferences"]
     if "itinerary" in trip_data:
-        trip.itinerary = trip_data["itinerary"]
+        trip.itinerary = await replace_itinerary(db, trip.id, trip_data["itinerary"])
 
     trip.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(trip)
+    try:
+        await db.commit()
+    except StaleDataError:
+        raise _trip_modified()
+
+    response.headers["ETag"] = _trip_etag(trip)
+    return {
+        "message": "Trip updated successfully",
+        "trip_id": trip.id,
+    }
+
+
+@app.patch("/trips/{trip_id}")
+async def partial_update_trip(
+    trip_id: str,
+    request: Request,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Partial update of the trip's editable fields.
+
+    The body is an RFC 7386 merge patch (application/merge-patch+json, also
+    assumed for application/json) or an RFC 6902 JSON Patch
+    (application/json-patch+json). Only the changed values are written; the
+    response holds the patched fields. Honors If-Match like PUT.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type not in (MERGE_PATCH, JSON_PATCH, "application/json"):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Use {MERGE_PATCH} or {JSON_PATCH}",
+        )
+    try:
+        patch = await request.json()
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON body"
+        )
 
+    trip = await _get_owned_trip(db, trip_id, current_user)
+    _check_if_match(if_match, trip)
+    try:
+        document = await patch_trip(db, trip, content_type, patch)
+        await db.commit()
+    except PatchTestFailed as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except PatchError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except StaleDataError:
+        raise _trip_modified()
+
+    response.headers["ETag"] = _trip_etag(trip)
     return {
         "message": "Trip updated successfully",
         "trip_id": trip.id,
+        "trip": document,
     }
 
 
@@ -533,10 +914,12 @@ async def update_trip(
 async def delete_trip(
     trip_id: str,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     user_id = current_user["user_id"]
-    trip = db.query(Trip).filter(Trip.id == trip_id, Trip.user_id == user_id).first()
+    trip = await db.scalar(
+        select(Trip).where(Trip.id == trip_id, Trip.user_id == user_id)
+    )
 
     if not trip:
         raise HTTPException(
@@ -544,8 +927,11 @@ async def delete_trip(
             detail="Trip not found",
         )
 
-    db.delete(trip)
-    db.commit()
+    await db.delete(trip)
+    try:
+        await db.commit()
+    except StaleDataError:
+        raise _trip_modified()
 
     return {"message": "Trip deleted successfully"}
 
@@ -554,323 +940,3 @@ if __name__ == "__main__":
     import uvicorn
 
     uvicorn.run(app, host="0.0.0.0", port=8000)
-
-
-from app.db_models import generate_share_token
-
-
-@app.post("/trips/ai-plan")
-async def ai_plan_trip_streaming(
-    trip_data: dict,
-    current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    """
-    Multi-Agent Trip Planning with SSE Streaming
-    Uses AgentScope ReActAgents with amap-mcp-server tools.
-    """
-    from app.agentscope_agents.coordinator import AgentCoordinator
-    from app.agentscope_agents.mcp_config import create_amap_mcp_client
-    from app.ai_providers import get_provider_config
-
-    async def ai_plan_generator(trip_data, current_user, db):
-        step_data = {
-            "step": 1,
-            "message": "正在初始化行程...",
-            "action": "init",
-            "progress": 5,
-        }
-        yield f"data: {json.dumps(step_data)}\n\n"
-
-        trip = Trip(
-            id=str(uuid.uuid4()),
-            user_id=current_user["user_id"],
-            title=trip_data.get("title", "AI 规划行程"),
-            destinations=trip_data.get("destinations", []),
-            start_date=datetime.fromisoformat(trip_data["start_date"])
-            if trip_data.get("start_date")
-            else None,
-            end_date=datetime.fromisoformat(trip_data["end_date"])
-            if trip_data.get("end_date")
-            else None,
-            travelers=trip_data.get("travelers", 2),
-            status="planning",
-            budget=trip_data.get("budget", {}),
-            preferences=trip_data.get("preferences", {}),
-            itinerary=[],
-            share_token=generate_share_token(),
-            is_public=False,
-        )
-
-        db.add(trip)
-        db.commit()
-        db.refresh(trip)
-
-        step_data = {
-            "step": 2,
-            "message": "✅ 行程基础信息已创建",
-            "action": "init_complete",
-            "progress": 10,
-            "trip_id": trip.id,
-        }
-        yield f"data: {json.dumps(step_data)}\n\n"
-        await asyncio.sleep(0.5)
-
-        step_data = {
-            "step": 3,
-            "message": "🤖 正在初始化多智能体系统...",
-            "action": "initializing_agents",
-            "progress": 15,
-        }
-        yield f"data: {json.dumps(step_data)}\n\n"
-
-        ai_config = get_provider_config("openai")
-        model_configs = {
-            "transport": ai_config,
-            "accommodation": ai_config,
-            "attraction": ai_config,
-            "food": ai_config,
-            "weather": ai_config,
-            "budget": ai_config,
-            "planner": ai_config,
-        }
-
-        mcp_client = None
-        if os.getenv("AMAP_API_KEY"):
-            try:
-                mcp_client = create_amap_mcp_client()
-                logger.info("Amap MCP client created successfully")
-            except Exception as e:
-                logger.warning(f"Failed to create Amap MCP client: {e}")
-
-        coordinator = AgentCoordinator(model_configs)
-        await coordinator.initialize(
-            mcp_clients={"amap": mcp_client} if mcp_client else None
-        )
-
-        await asyncio.sleep(0.5)
-
-        step_data = {
-            "step": 4,
-            "message": "🚄 正在搜索最佳交通方式...",
-            "action": "transport",
-            "progress": 30,
-            "agent": "TransportAgent",
-        }
-        yield f"data: {json.dumps(step_data)}\n\n"
-
-        transport_result = await coordinator._execute_agent(
-            coordinator._agents["transport"],
-            {"action": "recommend", "trip_data": trip_data},
-            "transport",
-        )
-
-        step_data = {
-            "step": 4,
-            "message": "✅ 交通推荐完成",
-            "action": "transport_complete",
-            "progress": 40,
-            "data": transport_result,
-        }
-        yield f"data: {json.dumps(step_data)}\n\n"
-        await asyncio.sleep(0.5)
-
-        step_data = {
-            "step": 5,
-            "message": "🏨 正在为您寻找住宿...",
-            "action": "accommodation",
-            "progress": 50,
-            "agent": "AccommodationAgent",
-        }
-        yield f"data: {json.dumps(step_data)}\n\n"
-
-        accommodation_result = await coordinator._execute_agent(
-            coordinator._agents["accommodation"],
-            {"action": "recommend", "trip_data": trip_data},
-            "accommodation",
-        )
-
-        step_data = {
-            "step": 5,
-            "message": "✅ 住宿推荐完成",
-            "action": "accommodation_complete",
-            "progress": 60,
-            "data": accommodation_result,
-        }
-        yield f"data: {json.dumps(step_data)}\n\n"
-        await asyncio.sleep(0.5)
-
-        step_data = {
-            "step": 6,
-            "message": "🏛️ 正在搜索精选景点...",
-            "action": "attraction",
-            "progress": 70,
-            "agent": "AttractionAgent",
-        }
-        yield f"data: {json.dumps(step_data)}\n\n"
-
-        attraction_result = await coordinator._execute_agent(
-            coordinator._agents["attraction"],
-            {"action": "recommend", "trip_data": trip_data},
-            "attraction",
-        )
-
-        step_data = {
-            "step": 6,
-            "message": "✅ 景点推荐完成",
-            "action": "attraction_complete",
-            "progress": 80,
-            "data": attraction_result,
-        }
-        yield f"data: {json.dumps(step_data)}\n\n"
-        await asyncio.sleep(0.5)
-
-        step_data = {
-            "step": 7,
-            "message": "🍜 正在为您推荐美食...",
-            "action": "food",
-            "progress": 85,
-            "agent": "FoodAgent",
-        }
-        yield f"data: {json.dumps(step_data)}\n\n"
-
-        food_result = await coordinator._execute_agent(
-            coordinator._agents["food"],
-            {"action": "recommend", "trip_data": trip_data},
-            "food",
-        )
-
-        step_data = {
-            "step": 7,
-            "message": "✅ 美食推荐完成",
-            "action": "food_complete",
-            "progress": 90,
-            "data": food_result,
-        }
-        yield f"data: {json.dumps(step_data)}\n\n"
-        await asyncio.sleep(0.5)
-
-        step_data = {
-            "step": 8,
-            "message": "☀️ 正在查询天气信息...",
-            "action": "weather",
-            "progress": 92,
-            "agent": "WeatherAgent",
-        }
-        yield f"data: {json.dumps(step_data)}\n\n"
-
-        weather_result = await coordinator._execute_agent(
-            coordinator._agents["weather"],
-            {"action": "query", "trip_data": trip_data},
-            "weather",
-        )
-
-        step_data = {
-            "step": 9,
-            "message": "✅ 天气查询完成",
-            "action": "weather_complete",
-            "progress": 94,
-            "data": weather_result,
-        }
-        yield f"data: {json.dumps(step_data)}\n\n"
-        await asyncio.sleep(0.5)
-
-        step_data = {
-            "step": 10,
-            "message": "💰 正在分析预算分配...",
-            "action": "budget",
-            "progress": 95,
-            "agent": "BudgetAgent",
-        }
-        yield f"data: {json.dumps(step_data)}\n\n"
-
-        budget_result = await coordinator._execute_agent(
-            coordinator._agents["budget"],
-            {
-                "action": "analyze",
-                "transport": transport_result,
-                "accommodation": accommodation_result,
-                "attractions": attraction_result,
-                "food": food_result,
-                "weather": weather_result,
-                "budget": trip_data.get("budget", {}),
-            },
-            "budget",
-        )
-
-        step_data = {
-            "step": 11,
-            "message": "✅ 预算分析完成",
-            "action": "budget_complete",
-            "progress": 98,
-            "data": budget_result,
-        }
-        yield f"data: {json.dumps(step_data)}\n\n"
-        await asyncio.sleep(0.5)
-
-        step_data = {
-            "step": 12,
-            "message": "📋 正在生成完整行程安排...",
-            "action": "generate",
-            "progress": 99,
-            "agent": "PlannerAgent",
-        }
-        yield f"data: {json.dumps(step_data)}\n\n"
-
-        final_plan = await coordinator._execute_agent(
-            coordinator._agents["planner"],
-            {
-                "action": "generate_itinerary",
-                "trip_data": trip_data,
-                "transport_recommendations": transport_result,
-                "accommodation_recommendations": accommodation_result,
-                "attraction_recommendations": attraction_result,
-                "food_recommendations": food_result,
-                "budget_analysis": budget_result,
-            },
-            "planner",
-        )
-
-        if "itinerary" in final_plan:
-            trip.itinerary = final_plan["itinerary"]
-
-        if "budget" in final_plan:
-            trip.budget = final_plan["budget"]
-
-        db.commit()
-
-        await asyncio.sleep(0.5)
-
-        step_data = {
-            "step": 10,
-            "message": "🎉 AI 行程规划完成！",
-            "action": "complete",
-            "progress": 100,
-            "trip": {
-                "id": trip.id,
-                "title": trip.title,
-                "destinations": trip.destinations,
-                "start_date": trip.start_date.isoformat() if trip.start_date else None,
-                "end_date": trip.end_date.isoformat() if trip.end_date else None,
-                "travelers": trip.travelers,
-                "status": trip.status,
-                "budget": trip.budget,
-                "preferences": trip.preferences,
-                "itinerary": trip.itinerary,
-                "share_token": trip.share_token,
-                "is_public": trip.is_public,
-                "created_at": trip.created_at.isoformat() if trip.created_at else None,
-                "updated_at": trip.updated_at.isoformat() if trip.updated_at else None,
-            },
-        }
-        yield f"data: {json.dumps(step_data)}\n\n"
-
-    return StreamingResponse(
-        ai_plan_generator(trip_data, current_user, db),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        },
-    )
@@ -0,0 +1,122 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+
+import pytest
+from agentscope.model import ChatModelBase, ChatResponse
+from agentscope.model._model_usage import ChatUsage
+from config import settings
+from app.ai_providers import get_agent_model_config
+from app.models import AgentType
+from app.agentscope_agents.benchmark import benchmark_agent_models
+from app.agentscope_agents.pricing import model_cost, model_price
+
+
+def test_agent_without_tier_uses_default_provider(monkeypatch):
+    """Test that agents fall back to the default provider's model"""
+    monkeypatch.setattr(settings, "openai_api_key", "sk-openai")
+    monkeypatch.setattr(settings, "agent_models", {})
+
+    config = get_agent_model_config("planner")
+
+    assert config["model"] == settings.openai_model
+    assert config["provider"] == "openai"
+
+
+def test_agent_tier_overrides_model_and_provider(monkeypatch):
+    """Test that settings.agent_models picks a model and provider per agent"""
+    monkeypatch.setattr(settings, "openai_api_key", "sk-openai")
+    monkeypatch.setattr(
+        settings,
+        "agent_models",
+        {
+            AgentType.weather: {"model": "gpt-4o-mini"},
+            AgentType.planner: {"provider": "tongyi", "model": "qwen-max"},
+        },
+    )
+
+    weather = get_agent_model_config("weather")
+    planner = get_agent_model_config("planner")
+
+    assert weather["model"] == "gpt-4o-mini"
+    assert weather["base_url"] == settings.openai_base_url
+    assert planner["provider"] == "tongyi"
+    assert planner["base_url"] == settings.tongyi_base_url
+
+
+def test_agent_tier_selects_the_provider_model(monkeypatch):
+    """Test that a tier picks the provider's model from settings.model_tiers"""
+    monkeypatch.setattr(settings, "openai_api_key", "sk-openai")
+    monkeypatch.setattr(
+        settings,
+        "agent_models",
+        {
+            AgentType.weather: {"tier": "fast"},
+            AgentType.planner: {"provider": "tongyi", "tier": "strong"},
+        },
+    )
+
+    assert get_agent_model_config("weather")["model"] == "gpt-4o-mini"
+    assert get_agent_model_config("planner")["model"] == "qwen-max"
+    assert get_agent_model_config("planner")["tier"] == "strong"
+
+
+def test_price_matches_longest_prefix():
+    """Test that dated model versions use the most specific price"""
+    assert model_price("gpt-4o-mini-2024-07-18") == settings.model_prices["gpt-4o-mini"]
+    assert model_price("gpt-4-turbo") == settings.model_prices["gpt-4"]
+    assert model_price("unknown-model") is None
+    assert model_cost("qwen-turbo", 1_000_000, 0) == pytest.approx(0.05)
+
+
+class FakeModel(ChatModelBase):
+    def __init__(self, name):
+        super().__init__(name, stream=False)
+        self.calls = 0
+
+    async def __call__(self, messages, **kwargs):
+        self.calls += 1
+        return ChatResponse(
+            content=[{"type": "text", "text": "{}"}],
+            usage=ChatUsage(input_tokens=1000, output_tokens=500, time=0.0),
+        )
+
+
+class FakeFormatter:
+    async def format(self, msgs):
+        return [{"role": msg.role, "content": msg.content} for msg in msgs]
+
+
+class FakeRegistry:
+    def __init__(self):
+        self.models = {}
+
+    def get(self, config):
+        model = self.models.setdefault(config["model"], FakeModel(config["model"]))
+        return model, FakeFormatter()
+
+
+@pytest.mark.asyncio
+async def test_benchmark_reports_latency_and_cost_per_tier(monkeypatch):
+    """Test that the benchmark groups agents by tier with token costs"""
+    monkeypatch.setattr(settings, "openai_api_key", "sk-openai")
+    monkeypatch.setattr(settings, "openai_model", "gpt-4o")
+    monkeypatch.setattr(
+        settings, "agent_models", {AgentType.weather: {"model": "gpt-4o-mini"}}
+    )
+    registry = FakeRegistry()
+
+    report = await benchmark_agent_models(runs=2, registry=registry)
+
+    assert report["agents"]["weather"]["tier"] == "openai/gpt-4o-mini"
+    assert report["tiers"]["openai/gpt-4o-mini"]["agents"] == ["weather"]
+    assert len(report["tiers"]["openai/gpt-4o"]["agents"]) == 6
+    assert registry.models["gpt-4o-mini"].calls == 2
+    assert report["agents"]["weather"]["avg_cost_usd"] == pytest.approx(
+        model_cost("gpt-4o-mini", 1000, 500), abs=1e-6
+    )
@@ -0,0 +1,221 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import pytest
+from agentscope.formatter import OpenAIChatFormatter
+from agentscope.tool import Toolkit
+from pydantic import BaseModel
+from app.agentscope_agents.agents.base_agent import BoundedReActAgent
+from app.agentscope_agents.agents.food_agent import FOOD_PROMPT
+from app.agentscope_agents.coordinator import AgentCoordinator
+from app.agentscope_agents.fake_model import FakeChatModel, FakeProfile
+from app.agentscope_agents.tool_cache import ToolResultCache
+
+
+class SlowModel(FakeChatModel):
+    """FakeChatModel that signals when a call starts"""
+
+    def __init__(self):
+        super().__init__(
+            "gpt-4o-mini",
+            profile=FakeProfile(latency_median_ms=10000, latency_p95_ms=10000),
+        )
+        self.started = asyncio.Event()
+
+    async def __call__(self, messages, **kwargs):
+        self.started.set()
+        return await super().__call__(messages, **kwargs)
+
+
+class Reply(BaseModel):
+    ok: bool
+
+
+def slow_agent():
+    model = SlowModel()
+    agent = BoundedReActAgent(
+        name="FoodAgent",
+        sys_prompt=FOOD_PROMPT,
+        model=model,
+        formatter=OpenAIChatFormatter(),
+        toolkit=Toolkit(),
+    )
+    return agent, model
+
+
+class FakeRequest:
+    def __init__(self, disconnect_after):
+        self.checks = 0
+        self.disconnect_after = disconnect_after
+
+    async def is_disconnected(self):
+        self.checks += 1
+        return self.checks > self.disconnect_after
+
+
+@pytest.mark.asyncio
+async def test_cancelled_agent_raises_instead_of_returning_interrupt_reply():
+    """Test that cancellation propagates through ReActAgent's interrupt handling"""
+    cache = ToolResultCache()
+    coordinator = AgentCoordinator({}, result_cache=cache)
+    agent, model = slow_agent()
+    coordinator._agents = {"food": agent}
+
+    task = asyncio.create_task(coordinator._run_agent("food", {"action": "recommend"}))
+    await model.started.wait()
+    task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert cache.metrics()["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_structured_reply_is_interrupted_cleanly():
+    """Test that handle_interrupt accepts reply()'s structured_model argument"""
+    coordinator = AgentCoordinator({})
+    agent, model = slow_agent()
+
+    task = asyncio.create_task(
+        coordinator._execute_agent(agent, {}, "food", structured_model=Reply)
+    )
+    await model.started.wait()
+    task.cancel()
+
+    # A TypeError from handle_interrupt would be returned as {"error": ...}
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+@pytest.mark.asyncio
+async def test_disconnect_watcher_cancels_streaming_task(monkeypatch):
+    """Test that a client disconnect cancels the task streaming the plan"""
+    from config import settings
+    from main import _cancel_on_disconnect
+
+    monkeypatch.setattr(settings, "planning_disconnect_poll_interval", 0.01)
+    stream = asyncio.create_task(asyncio.sleep(10))
+
+    await asyncio.wait_for(_cancel_on_disconnect(FakeRequest(2), stream), 1)
+
+    with pytest.raises(asyncio.CancelledError):
+        await stream
+
+
+class RunSession:
+    """AsyncSession stand-in recording the planning run writes"""
+
+    def __init__(self, log):
+        self.log = log
+        self.statements = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    def add(self, obj):
+        pass
+
+    def add_all(self, objs):
+        pass
+
+    async def execute(self, statement):
+        await asyncio.sleep(0.01)
+        self.statements.append(statement)
+
+    async def commit(self):
+        self.log.append(self.statements)
+
+
+class BlockingPool:
+    """Coordinator pool whose planning never finishes"""
+
+    def __init__(self):
+        self.released = False
+
+    @asynccontextmanager
+    async def lease(self):
+        try:
+            yield self
+        finally:
+            self.released = True
+
+    async def run_graph(self, trip_data, graph, deadline):
+        yield {"event": "started", "agent": "weather"}
+        await asyncio.sleep(10)
+
+
+@pytest.mark.asyncio
+async def test_streaming_disconnect_marks_trip_and_run_cancelled(monkeypatch):
+    """Test a real StreamingResponse disconnect through to the stored run"""
+    import main
+    from config import settings
+    from app.planning_runs import PlanningRunStore
+
+    # Leave the disconnect to Starlette's own listener
+    monkeypatch.setattr(settings, "planning_disconnect_poll_interval", 60)
+    monkeypatch.setattr(settings, "planning_coalescing_enabled", False)
+    writes = []
+    monkeypatch.setattr(
+        main, "PlanningRunStore", lambda: PlanningRunStore(lambda: RunSession(writes))
+    )
+    pool = BlockingPool()
+    monkeypatch.setattr(main, "get_coordinator_pool", lambda: pool)
+    main.app.dependency_overrides[main.get_current_user] = lambda: {
+        "user_id": "user-1"
+    }
+
+    body = json.dumps({"title": "北京", "destinations": ["北京"]}).encode()
+    requested = False
+    agent_started = asyncio.Event()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await agent_started.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if b"weather" in message.get("body", b""):
+            agent_started.set()
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/trips/ai-plan",
+        "raw_path": b"/trips/ai-plan",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json")],
+        "client": ("test", 1),
+        "server": ("test", 80),
+    }
+    try:
+        await asyncio.wait_for(main.app(scope, receive, send), 5)
+    finally:
+        main.app.dependency_overrides.clear()
+
+    # start() and finish(); finish() ran to its commit despite the cancellation
+    assert len(writes) == 2
+    _, trip_update, run_update = writes[1]
+    assert trip_update.compile().params["status"] == "cancelled"
+    assert run_update.compile().params["status"] == "cancelled"
+    assert run_update.compile().params["finished_at"] is not None
+    assert pool.released
@@ -0,0 +1,131 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+
+from config import settings
+from app.agentscope_agents.compaction import (
+    compact_results,
+    compact_section,
+    estimate_section_tokens,
+)
+from app.agentscope_agents.scheduler import build_planning_graph
+
+
+def test_records_are_projected_onto_model_fields():
+    """Test that unknown and unused fields are dropped and aliases mapped"""
+    result = {
+        "attractions": [
+            {
+                "name": "故宫",
+                "price": 60,
+                "type": "历史古迹",
+                "image_url": "https://img.example.com/1.jpg",
+                "raw_poi": {"adcode": "110101", "typecode": "110201"},
+                "rating": 4.9,
+            }
+        ],
+        "analysis": "很长的分析文字",
+    }
+
+    compacted = compact_section("attraction", result)
+
+    assert compacted == {
+        "items": [
+            {
+                "name": "故宫",
+                "ticket_price": 60,
+                "category": "历史古迹",
+                "rating": 4.9,
+            }
+        ]
+    }
+
+
+def test_duplicate_pois_are_merged():
+    """Test that the same POI listed twice keeps one record with merged fields"""
+    result = {
+        "restaurants": [
+            {"name": "全聚德", "cuisine": "京菜"},
+            {"name": "全 聚德", "avg_price": 200},
+            {"name": "四季民福"},
+        ]
+    }
+
+    items = compact_section("food", result)["items"]
+
+    assert [item["name"] for item in items] == ["全聚德", "四季民福"]
+    assert items[0] == {
+        "name": "全聚德",
+        "cuisine": "京菜",
+        "avg_price_per_person": 200,
+    }
+
+
+def test_container_named_like_identity_alias_is_searched():
+    """Test that {"transport": [...]} is a container, not a record"""
+    result = {
+        "transport": [
+            {"type": "地铁", "from_location": {"name": "北京南站"}, "price": 5},
+            {"mode": "出租车", "to": {"name": "天安门"}, "cost": 40},
+        ]
+    }
+
+    items = compact_section("transport", result)["items"]
+
+    assert items == [
+        {"type": "地铁", "from_location": {"name": "北京南站"}, "price": 5},
+        {"type": "出租车", "to_location": {"name": "天安门"}, "price": 40},
+    ]
+
+
+def test_section_is_trimmed_to_token_budget():
+    """Test that long text is shortened and trailing records cut"""
+    result = [{"name": f"酒店{i}", "description": "好" * 500} for i in range(20)]
+
+    compacted = compact_section("accommodation", result, token_budget=100, max_chars=50)
+
+    assert estimate_section_tokens(compacted["items"]) <= 100
+    assert len(compacted["items"][0]["description"]) == 51
+    assert compacted["dropped"] == 20 - len(compacted["items"])
+
+
+def test_failure_blobs_are_reduced():
+    """Test that errors and unparsed replies do not carry their payload along"""
+    assert compact_section("weather", {"error": "timeout"}) == {
+        "items": [],
+        "error": "timeout",
+    }
+
+    unparsed = compact_section("transport", {"content": "x" * 10000}, token_budget=10)
+    assert len(unparsed["summary"]) == 31
+
+    fallback = compact_section("food", {"recommendations": [], "degraded": True})
+    assert fallback == {"items": [], "degraded": True}
+
+
+def test_planner_payload_uses_compacted_results(monkeypatch):
+    """Test that downstream agents receive compacted specialist sections"""
+    results = {
+        "transport": {"transport": "高铁", "cost": 300, "notes": "x" * 5000},
+        "accommodation": {"content": "无法解析"},
+        "attraction": {"attractions": [{"name": "故宫"}, {"name": "故宫"}]},
+        "food": {"error": "timeout"},
+        "weather": {"forecast": [{"date": "2026-05-01", "weather": "晴"}]},
+        "budget": {"total": 5000},
+    }
+    planner = build_planning_graph().nodes["planner"]
+
+    payload = planner.build_payload({"title": "北京"}, results)
+
+    assert payload["transport_recommendations"]["items"][0]["type"] == "高铁"
+    assert payload["attraction_recommendations"]["items"] == [{"name": "故宫"}]
+    assert payload["weather_recommendations"]["items"][0]["weather_condition"] == "晴"
+    assert payload["budget_analysis"] == {"total": 5000}
+
+    monkeypatch.setattr(settings, "planning_compaction_enabled", False)
+    assert compact_results(results) is results
@@ -17,6 +17,7 @@ def test_coordinator_initialization():
         "accommodation": {"model": "gpt-4", "api_key": "sk-test"},
         "attraction": {"model": "gpt-4", "api_key": "sk-test"},
         "food": {"model": "gpt-4", "api_key": "sk-test"},
+        "weather": {"model": "gpt-4", "api_key": "sk-test"},
         "budget": {"model": "gpt-4", "api_key": "sk-test"},
         "planner": {"model": "gpt-4", "api_key": "sk-test"},
     }
@@ -37,6 +38,7 @@ async def test_coordinator_with_mcp_initialization():
         "accommodation": {"model": "gpt-4", "api_key": "sk-test"},
         "attraction": {"model": "gpt-4", "api_key": "sk-test"},
         "food": {"model": "gpt-4", "api_key": "sk-test"},
+        "weather": {"model": "gpt-4", "api_key": "sk-test"},
         "budget": {"model": "gpt-4", "api_key": "sk-test"},
         "planner": {"model": "gpt-4", "api_key": "sk-test"},
     }
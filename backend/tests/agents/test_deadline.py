@@ -0,0 +1,157 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+
+import asyncio
+import time
+
+import pytest
+from config import settings
+from app.agentscope_agents.coordinator import AgentCoordinator
+from app.agentscope_agents.deadline import (
+    PlanningDeadline,
+    heuristic_fallback,
+    planning_deadline,
+)
+from app.agentscope_agents.scheduler import AgentGraph, AgentNode
+from app.agentscope_agents.tool_cache import ToolResultCache
+
+TRIP = {
+    "destinations": ["北京"],
+    "start_date": "2026-05-01",
+    "end_date": "2026-05-02",
+}
+
+
+def _payload(trip_data, results):
+    return {"action": "recommend", "trip_data": trip_data}
+
+
+def _coordinator(delays, fallback_cache=None):
+    """Coordinator whose agents sleep for the given delay, then succeed"""
+    coordinator = AgentCoordinator({}, fallback_cache=fallback_cache)
+    coordinator._agents = {name: object() for name in delays}
+    coordinator._is_initialized = True
+    cancelled = []
+
+    async def execute(agent, task_data, name, structured_model=None):
+        try:
+            await asyncio.sleep(delays[name])
+        except asyncio.CancelledError:
+            cancelled.append(name)
+            raise
+        return {"recommendations": [{"name": f"{name}-live"}]}
+
+    coordinator._execute_agent = execute
+    return coordinator, cancelled
+
+
+async def _run(coordinator, names, deadline):
+    graph = AgentGraph([AgentNode(name, _payload) for name in names])
+    return {
+        event["agent"]: event
+        async for event in coordinator.run_graph(TRIP, graph, deadline)
+        if event["event"] == "completed"
+    }
+
+
+def test_agent_budget_is_capped_by_remaining_time():
+    """Test that an agent never gets more time than is left"""
+    deadline = PlanningDeadline(10, {"planner": 0.5}, default_share=0.2)
+
+    assert deadline.budget_for("planner") == pytest.approx(5, abs=0.1)
+    assert deadline.budget_for("food") == pytest.approx(2, abs=0.1)
+
+    deadline.started_at -= 9
+    assert deadline.budget_for("planner") == pytest.approx(1, abs=0.1)
+
+
+@pytest.mark.parametrize("requested", ["soon", [30], -5, 0, float("nan")])
+def test_requested_deadline_must_be_a_positive_number(requested):
+    """Test that a bad client deadline is rejected instead of crashing the run"""
+    with pytest.raises(ValueError):
+        planning_deadline(requested)
+
+
+def test_requested_deadline_is_capped(monkeypatch):
+    """Test that a client deadline is honoured up to the configured maximum"""
+    monkeypatch.setattr(settings, "planning_deadline_max_seconds", 60)
+
+    assert planning_deadline("20").total_seconds == 20
+    assert planning_deadline(600).total_seconds == 60
+
+
+def test_heuristic_itinerary_spreads_attractions_over_days():
+    """Test that the planner fallback covers every trip day"""
+    result = heuristic_fallback(
+        "planner",
+        {
+            "trip_data": TRIP,
+            "attraction_recommendations": {
+                "attractions": [{"name": "故宫"}, {"name": "长城"}, {"name": "颐和园"}]
+            },
+            "food_recommendations": [{"name": "全聚德"}],
+        },
+    )
+
+    days = result["itinerary"]
+    assert [day["date"] for day in days] == ["2026-05-01", "2026-05-02"]
+    assert days[0]["activities"][-1] == {"type": "food", "name": "全聚德"}
+    assert sum(len(day["activities"]) for day in days) == 4
+    assert result["degraded"] is True
+
+
+@pytest.mark.asyncio
+async def test_slow_agent_is_cancelled_and_degraded():
+    """Test that an agent overrunning its slice is replaced by a fallback"""
+    coordinator, cancelled = _coordinator({"fast": 0.01, "slow": 5})
+    deadline = PlanningDeadline(0.5, {"fast": 0.5, "slow": 0.2})
+
+    started = time.monotonic()
+    events = await _run(coordinator, ["fast", "slow"], deadline)
+
+    assert time.monotonic() - started < 1
+    assert cancelled == ["slow"]
+    assert events["fast"]["degraded"] is False
+    assert events["slow"]["degraded"] is True
+    assert events["slow"]["result"]["fallback"] == "heuristic"
+
+
+@pytest.mark.asyncio
+async def test_degraded_specialist_uses_last_good_result():
+    """Test that a timed-out specialist falls back to its last good result"""
+    fallback_cache = ToolResultCache()
+    coordinator, _ = _coordinator({"food": 0.01}, fallback_cache=fallback_cache)
+    await _run(coordinator, ["food"], PlanningDeadline(1))
+
+    slow, _ = _coordinator({"food": 5}, fallback_cache=fallback_cache)
+    events = await _run(slow, ["food"], PlanningDeadline(0.1))
+
+    result = events["food"]["result"]
+    assert result["fallback"] == "cached"
+    assert result["recommendations"] == [{"name": "food-live"}]
+
+
+def test_plan_endpoint_rejects_bad_deadline():
+    """Test that a bad deadline_seconds is a 400, not a server error"""
+    from fastapi.testclient import TestClient
+    import main
+
+    main.app.dependency_overrides[main.get_current_user] = lambda: {
+        "user_id": "user-1"
+    }
+    try:
+        response = TestClient(main.app).post(
+            "/trips/ai-plan",
+            json={"destinations": ["北京"], "deadline_seconds": "soon"},
+        )
+    finally:
+        main.app.dependency_overrides.clear()
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "deadline_seconds must be a number"
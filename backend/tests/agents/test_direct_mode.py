@@ -0,0 +1,142 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+
+import json
+from datetime import date, timedelta
+
+import pytest
+from agentscope.message import Msg
+from mcp.server.fastmcp.exceptions import ToolError
+from mcp.types import CallToolResult, TextContent
+from app.agentscope_agents.agents.weather_agent import (
+    WEATHER_PIPELINE,
+    map_amap_forecast,
+)
+from app.agentscope_agents.coordinator import AgentCoordinator
+from app.agentscope_agents.direct_mode import DirectModeUnavailable
+from app.agentscope_agents.fake_amap_server import SyntheticAmap, create_server
+
+
+class InProcessClient:
+    """MCP client facade calling a FastMCP server in-process"""
+
+    def __init__(self, server):
+        self.server = server
+        self.calls = []
+
+    async def get_callable_function(self, name, wrap_tool_result=True):
+        async def call(**arguments):
+            self.calls.append(name)
+            try:
+                content, _ = await self.server.call_tool(name, arguments)
+            except ToolError as e:
+                return CallToolResult(
+                    content=[TextContent(type="text", text=str(e))], isError=True
+                )
+            return CallToolResult(content=list(content), isError=False)
+
+        return call
+
+
+class ScriptedAgent:
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.received = []
+
+    async def __call__(self, msg, structured_model=None):
+        self.received.append(msg.content)
+        return Msg("agent", self.replies.pop(0), "assistant")
+
+
+def weather_task(start: date, days: int, destinations=("北京",)):
+    return {
+        "action": "query",
+        "trip_data": {
+            "destinations": list(destinations),
+            "start_date": start.isoformat(),
+            "end_date": (start + timedelta(days=days - 1)).isoformat(),
+        },
+    }
+
+
+def test_forecast_maps_onto_weather_model():
+    """Test that only trip dates inside the forecast become records"""
+    today = date(2026, 5, 1)
+    forecast = SyntheticAmap().weather("北京", today=today)
+    target = {"city": "北京", "dates": ["2026-05-02", "2026-05-09"]}
+
+    records = map_amap_forecast(target, {"maps_weather": forecast}, {})
+
+    assert [record["date"] for record in records] == ["2026-05-02"]
+    record = records[0]
+    assert record["location"] == "北京"
+    assert record["temperature_min"] <= record["temperature_max"]
+    assert record["wind_speed"] == 19
+    assert record["tips"]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_queries_every_destination():
+    """Test one weather call per destination and validated records"""
+    client = InProcessClient(create_server(SyntheticAmap()))
+    task = weather_task(date.today(), 2, destinations=["北京", "上海"])
+
+    result = await WEATHER_PIPELINE.run(client, task)
+
+    assert client.calls == ["maps_weather", "maps_weather"]
+    assert {record["location"] for record in result["weather"]} == {"北京", "上海"}
+    assert len(result["weather"]) == 4
+
+
+@pytest.mark.asyncio
+async def test_pipeline_does_not_apply_without_data():
+    """Test that missing dates, far dates and tool errors are unavailable"""
+    client = InProcessClient(create_server(SyntheticAmap()))
+    failing = InProcessClient(create_server(SyntheticAmap(), error_rate=1.0))
+
+    with pytest.raises(DirectModeUnavailable):
+        await WEATHER_PIPELINE.run(client, {"trip_data": {"destinations": ["北京"]}})
+    with pytest.raises(DirectModeUnavailable):
+        await WEATHER_PIPELINE.run(
+            client, weather_task(date.today() + timedelta(60), 2)
+        )
+    with pytest.raises(DirectModeUnavailable):
+        await WEATHER_PIPELINE.run(failing, weather_task(date.today(), 2))
+
+
+@pytest.mark.asyncio
+async def test_coordinator_skips_llm_where_direct_mode_applies():
+    """Test that the agent only runs when the pipeline does not apply"""
+    record = {
+        "location": "北京",
+        "date": "2027-01-01",
+        "temperature_min": -8,
+        "temperature_max": 1,
+        "weather_condition": "晴",
+    }
+    reply = json.dumps({"weather": [record]}, ensure_ascii=False)
+    agent = ScriptedAgent([reply])
+    coordinator = AgentCoordinator({})
+    coordinator._agents = {"weather": agent}
+    coordinator._direct = {"weather": WEATHER_PIPELINE}
+    coordinator._tool_client = InProcessClient(create_server(SyntheticAmap()))
+    coordinator._is_initialized = True
+
+    result = await coordinator._run_agent("weather", weather_task(date.today(), 3))
+    assert len(result["weather"]) == 3
+    assert agent.received == []
+    assert "weather" in coordinator._direct_agents
+    assert coordinator._usage["weather"].llm_calls == 0
+
+    coordinator._direct_agents.clear()
+    far = weather_task(date.today() + timedelta(days=90), 1)
+    result = await coordinator._run_agent("weather", far)
+    assert result["weather"][0]["temperature_min"] == -8
+    assert len(agent.received) == 1
+    assert "weather" not in coordinator._direct_agents
@@ -0,0 +1,103 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+
+import json
+from datetime import date
+
+import pytest
+from mcp.server.fastmcp.exceptions import ToolError
+from config import settings
+from app.agentscope_agents import mcp_pool
+from app.agentscope_agents.fake_amap_server import SyntheticAmap, create_server
+from app.agentscope_agents.mcp_config import MCP_SERVERS, create_fake_amap_mcp_client
+
+
+def test_dataset_depends_only_on_seed_and_arguments():
+    """Test that separate server processes would return the same data"""
+    first, second = SyntheticAmap(seed=3), SyntheticAmap(seed=3)
+
+    assert first.text_search("酒店", "北京") == second.text_search("酒店", "北京")
+    assert first.geo("故宫", "北京") == second.geo("故宫", "北京")
+    assert SyntheticAmap(seed=4).geo("故宫", "北京") != first.geo("故宫", "北京")
+
+    poi = first.text_search("酒店", "北京")["pois"][0]
+    assert poi["typecode"] == "100100"
+    assert first.search_detail(poi["id"])["name"] == poi["name"]
+
+
+def test_routes_and_weather_are_plausible():
+    """Test route distances, durations and the forecast shape"""
+    amap = SyntheticAmap()
+    driving = amap.direction("driving", "北京南站", "天安门", "北京", "北京")
+    walking = amap.direction("walking", "北京南站", "天安门", "北京", "北京")
+    route = driving["route"]
+
+    straight = amap.distance(route["origin"], route["destination"], "0")
+    assert int(driving["route"]["paths"][0]["distance"]) > int(
+        straight["results"][0]["distance"]
+    )
+    assert int(walking["route"]["paths"][0]["duration"]) > int(
+        driving["route"]["paths"][0]["duration"]
+    )
+    assert amap.direction("transit", "北京南站", "天安门", "北京", "北京")["route"][
+        "transits"
+    ]
+
+    weather = amap.weather("110000", today=date(2026, 5, 1))
+    assert weather["city"] == "北京市"
+    assert [cast["date"] for cast in weather["forecasts"]][:2] == [
+        "2026-05-01",
+        "2026-05-02",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_server_injects_errors():
+    """Test that the configured error rate fails tool calls"""
+    healthy = create_server(SyntheticAmap())
+    failing = create_server(SyntheticAmap(), error_rate=1.0)
+
+    content, _ = await healthy.call_tool(
+        "maps_geo", {"address": "故宫", "city": "北京"}
+    )
+    assert json.loads(content[0].text)["return"][0]["city"] == "北京市"
+    with pytest.raises(ToolError):
+        await failing.call_tool("maps_weather", {"city": "北京"})
+
+
+def test_pool_uses_configured_server(monkeypatch):
+    """Test that the fake server needs no AMAP_API_KEY"""
+    monkeypatch.setattr(mcp_pool, "_amap_pool", None)
+    monkeypatch.delenv("AMAP_API_KEY", raising=False)
+
+    monkeypatch.setattr(settings, "amap_mcp_server", "amap")
+    assert mcp_pool.get_amap_mcp_pool() is None
+
+    monkeypatch.setattr(settings, "amap_mcp_server", "fake_amap")
+    pool = mcp_pool.get_amap_mcp_pool()
+    assert pool.client_factory is MCP_SERVERS["fake_amap"]["client_factory"]
+
+
+@pytest.mark.asyncio
+async def test_stdio_server_answers_tool_calls(monkeypatch):
+    """Test the full stdio path against a spawned server"""
+    monkeypatch.setattr(settings, "fake_amap_latency_median_ms", 1)
+    monkeypatch.setattr(settings, "fake_amap_latency_p95_ms", 2)
+    client = create_fake_amap_mcp_client()
+    await client.connect()
+    try:
+        names = {tool.name for tool in await client.list_tools()}
+        assert {"maps_geo", "maps_text_search", "maps_weather"} <= names
+
+        search = await client.get_callable_function("maps_text_search")
+        response = await search(keywords="美食", city="成都")
+        pois = json.loads(response.content[0]["text"])["pois"]
+        assert pois == SyntheticAmap().text_search("美食", "成都")["pois"]
+    finally:
+        await client.close()
@@ -0,0 +1,121 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+
+import random
+
+import pytest
+from agentscope.formatter import OpenAIChatFormatter
+from agentscope.message import Msg, TextBlock
+from agentscope.tool import Toolkit, ToolResponse
+from config import settings
+from app.agentscope_agents.agents.food_agent import FOOD_PROMPT, create_food_agent
+from app.agentscope_agents.coordinator import AgentCoordinator
+from app.agentscope_agents.fake_model import (
+    FakeChatModel,
+    FakeModelError,
+    FakeProfile,
+    LatencyProfile,
+)
+from app.agentscope_agents.model_registry import ModelClientRegistry
+from app.agentscope_agents.usage import record_tool_step
+
+FAST = FakeProfile(latency_median_ms=1, latency_p95_ms=2)
+
+
+def test_latency_matches_median_and_p95():
+    """Test that sampled latencies follow the configured percentiles"""
+    profile = LatencyProfile(median_ms=800, p95_ms=3000)
+    rng = random.Random(7)
+    samples = sorted(profile.sample(rng) for _ in range(5000))
+
+    assert samples[2500] == pytest.approx(0.8, rel=0.1)
+    assert samples[4750] == pytest.approx(3.0, rel=0.15)
+
+
+async def food_prompt(*turns):
+    return await OpenAIChatFormatter().format(
+        [Msg("system", FOOD_PROMPT, "system"), Msg("user", "北京", "user"), *turns]
+    )
+
+
+@pytest.mark.asyncio
+async def test_replays_offered_tool_calls_then_final_reply():
+    """Test that the role's script calls offered tools before answering"""
+    model = FakeChatModel("gpt-4o-mini", profile=FAST, seed=1)
+    tools = [{"type": "function", "function": {"name": "maps_text_search"}}]
+
+    first = await model(await food_prompt(), tools=tools)
+    assert first.content[0]["type"] == "tool_use"
+    assert first.content[0]["name"] == "maps_text_search"
+    assert first.usage.input_tokens > 0
+
+    answered = await food_prompt(Msg("FoodAgent", list(first.content), "assistant"))
+    final = await model(answered, tools=tools)
+    assert final.content[0]["type"] == "text"
+    assert "全聚德" in final.content[0]["text"]
+
+    # Without the tool the script goes straight to the answer
+    direct = await model(await food_prompt(), tools=[])
+    assert direct.content[0]["type"] == "text"
+    assert model.metrics() == {"food": {"calls": 3, "errors": 0}}
+
+
+@pytest.mark.asyncio
+async def test_injects_errors_per_role():
+    """Test that role profiles override the error rate"""
+    model = FakeChatModel(
+        profile=FAST,
+        role_profiles={
+            "food": FakeProfile(latency_median_ms=1, latency_p95_ms=2, error_rate=1)
+        },
+    )
+
+    with pytest.raises(FakeModelError):
+        await model(await food_prompt())
+    response = await model([{"role": "system", "content": "其他"}])
+    assert response.content[0]["text"] == "{}"
+
+
+def maps_text_search(keywords: str, city: str) -> ToolResponse:
+    """Search places"""
+    return ToolResponse(content=[TextBlock(type="text", text="全聚德 前门")])
+
+
+@pytest.mark.asyncio
+async def test_fake_backend_runs_agents_offline(monkeypatch):
+    """Test that the fake backend plugs into the registry and coordinator"""
+    registry = ModelClientRegistry()
+    monkeypatch.setattr(settings, "llm_backend", "fake")
+    monkeypatch.setattr(settings, "llm_routing_enabled", True)
+    monkeypatch.setattr(settings, "fake_llm_latency_median_ms", 1)
+    monkeypatch.setattr(settings, "fake_llm_latency_p95_ms", 2)
+    monkeypatch.setattr(
+        "app.agentscope_agents.model_registry.get_model_registry", lambda: registry
+    )
+    config = {"provider": "openai", "model": "gpt-4o-mini", "api_key": "none"}
+
+    model, formatter = registry.get(config)
+    assert isinstance(model.model, FakeChatModel)
+    assert isinstance(formatter, OpenAIChatFormatter)
+
+    toolkit = Toolkit()
+    toolkit.register_tool_function(maps_text_search)
+    agent = create_food_agent(config, toolkit)
+    agent.register_instance_hook("pre_acting", "record_tool_step", record_tool_step)
+    coordinator = AgentCoordinator({})
+    coordinator._agents = {"food": agent}
+    coordinator._is_initialized = True
+
+    result = await coordinator._run_agent("food", {"destination": "北京"})
+
+    usage = coordinator._usage["food"].to_dict()
+    assert result["restaurants"][0]["name"] == "全聚德"
+    assert usage["llm_calls"] == 2
+    assert usage["tool_sequence"] == ["maps_text_search"]
+    assert usage["cost_usd"] > 0
@@ -0,0 +1,115 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+
+import json
+
+import pytest
+from agentscope.formatter import OpenAIChatFormatter
+from agentscope.message import TextBlock, ToolUseBlock
+from agentscope.model import ChatModelBase, ChatResponse
+from agentscope.tool import Toolkit, ToolResponse
+from app.agentscope_agents import iteration_control
+from app.agentscope_agents.agents.base_agent import (
+    FINAL_ANSWER_HINT,
+    BoundedReActAgent,
+)
+from app.agentscope_agents.coordinator import AgentCoordinator
+from app.agentscope_agents.iteration_control import IterationController
+from app.agentscope_agents.usage import count_reasoning_step, record_tool_step
+
+
+def test_cap_follows_iteration_percentile():
+    """Test that caps adapt after enough samples and stay within bounds"""
+    controller = IterationController(min_samples=10, headroom=1.5, min_iters=3)
+
+    for _ in range(9):
+        controller.record("food", 4, ["maps_text_search"], capped=False)
+    assert controller.cap_for("food", default=20) == 20
+
+    controller.record("food", 4, ["maps_text_search"], capped=False)
+    assert controller.cap_for("food", default=20) == 6
+    assert controller.cap_for("food", default=5) == 5
+
+    for _ in range(10):
+        controller.record("weather", 1, [], capped=False)
+    assert controller.cap_for("weather", default=10) == 3
+
+
+def test_metrics_report_tool_sequences():
+    """Test that the most common tool-call sequences are reported"""
+    controller = IterationController()
+    controller.record("food", 3, ["maps_geo", "maps_around_search"], capped=False)
+    controller.record("food", 3, ["maps_geo", "maps_around_search"], capped=False)
+    controller.record("food", 5, ["maps_geo"], capped=True)
+
+    metrics = controller.metrics()["food"]
+
+    assert metrics["cap_hits"] == 1
+    assert metrics["top_tool_sequences"][0] == {
+        "tools": ["maps_geo", "maps_around_search"],
+        "runs": 2,
+    }
+
+
+def lookup() -> ToolResponse:
+    """Look something up"""
+    return ToolResponse(content=[TextBlock(type="text", text="故宫")])
+
+
+class LoopingModel(ChatModelBase):
+    """Calls the lookup tool forever unless asked for the final answer"""
+
+    def __init__(self):
+        super().__init__("looping", stream=False)
+
+    async def __call__(self, messages, **kwargs):
+        if FINAL_ANSWER_HINT in json.dumps(messages, ensure_ascii=False):
+            return ChatResponse(
+                content=[
+                    {"type": "text", "text": '{"attractions": [{"name": "故宫"}]}'}
+                ]
+            )
+        return ChatResponse(
+            content=[ToolUseBlock(type="tool_use", id="call", name="lookup", input={})]
+        )
+
+
+@pytest.mark.asyncio
+async def test_capped_agent_answers_with_what_it_has(monkeypatch):
+    """Test that an agent at its cap is forced to a final JSON answer"""
+    controller = IterationController()
+    monkeypatch.setattr(iteration_control, "_iteration_controller", controller)
+    toolkit = Toolkit()
+    toolkit.register_tool_function(lookup)
+    agent = BoundedReActAgent(
+        name="AttractionAgent",
+        sys_prompt="推荐景点",
+        model=LoopingModel(),
+        formatter=OpenAIChatFormatter(),
+        toolkit=toolkit,
+        max_iters=20,
+    )
+    coordinator = AgentCoordinator({})
+    coordinator._agents = {"attraction": agent}
+    coordinator._max_iters = {"attraction": 3}
+    coordinator._is_initialized = True
+    agent.register_instance_hook(
+        "pre_reasoning", "count_reasoning_step", count_reasoning_step
+    )
+    agent.register_instance_hook("pre_acting", "record_tool_step", record_tool_step)
+
+    result = await coordinator._run_agent("attraction", {})
+
+    usage = coordinator._usage["attraction"].to_dict()
+    assert result["attractions"] == [{"name": "故宫"}]
+    assert agent.max_iters == 3
+    assert usage["iterations"] == 3
+    assert usage["cap_hits"] == 1
+    assert usage["tool_sequence"] == ["lookup"] * 3
+    assert controller.metrics()["attraction"]["cap_hits"] == 1
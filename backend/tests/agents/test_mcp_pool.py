@@ -0,0 +1,176 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+
+import asyncio
+
+import pytest
+from agentscope.tool import Toolkit
+from mcp.types import CallToolResult, TextContent, Tool
+
+from app.agentscope_agents.mcp_pool import MCPSessionPool, PooledMCPClient
+
+
+class FakeSession:
+    def __init__(self, client):
+        self.client = client
+
+    async def send_ping(self):
+        if self.client.crashed:
+            raise ConnectionError("server exited")
+
+    async def call_tool(self, name, arguments=None):
+        if self.client.crashed:
+            raise ConnectionError("server exited")
+        return CallToolResult(
+            content=[TextContent(type="text", text=f"{name}:{arguments}")]
+        )
+
+
+class FakeMCPClient:
+    instances = []
+
+    def __init__(self):
+        self.crashed = False
+        self.closed = False
+        self.session = FakeSession(self)
+        FakeMCPClient.instances.append(self)
+
+    async def connect(self):
+        # stdio clients enter anyio cancel scopes that must be left by this task
+        self.connect_task = asyncio.current_task()
+
+    async def close(self):
+        if asyncio.current_task() is not self.connect_task:
+            raise RuntimeError("Attempted to exit cancel scope in a different task")
+        self.closed = True
+
+    async def list_tools(self):
+        return [Tool(name="maps_geo", inputSchema={"type": "object", "properties": {}})]
+
+
+@pytest.fixture(autouse=True)
+def reset_instances():
+    FakeMCPClient.instances = []
+
+
+@pytest.mark.asyncio
+async def test_pool_reuses_sessions():
+    """Test that repeated calls do not spawn new server processes"""
+    pool = MCPSessionPool(FakeMCPClient, max_sessions=2, min_sessions=1)
+    await pool.start()
+
+    for _ in range(5):
+        await pool.call_tool("maps_geo", {"address": "上海"})
+
+    assert len(FakeMCPClient.instances) == 1
+    assert pool.metrics()["leases"] == 5
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_caps_concurrent_sessions():
+    """Test that concurrent leases never exceed max_sessions"""
+    pool = MCPSessionPool(FakeMCPClient, max_sessions=2, min_sessions=0)
+    peak = 0
+
+    async def use():
+        nonlocal peak
+        async with pool.lease():
+            peak = max(peak, pool.metrics()["in_use"])
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*[use() for _ in range(6)])
+
+    assert peak == 2
+    assert len(FakeMCPClient.instances) == 2
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_discards_crashed_session():
+    """Test that a session whose server died is not handed out again"""
+    pool = MCPSessionPool(FakeMCPClient, max_sessions=1, min_sessions=1)
+    await pool.start()
+    FakeMCPClient.instances[0].crashed = True
+
+    with pytest.raises(ConnectionError):
+        await pool.call_tool("maps_geo", {})
+
+    result = await pool.call_tool("maps_geo", {})
+
+    assert FakeMCPClient.instances[0].closed
+    assert len(FakeMCPClient.instances) == 2
+    assert result.content[0].text.startswith("maps_geo")
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_crashed_session_is_replaced_in_the_background():
+    """Test that the failing call does not wait for the replacement server"""
+    pool = MCPSessionPool(FakeMCPClient, max_sessions=1, min_sessions=1)
+    await pool.start()
+    crashed = FakeMCPClient.instances[0]
+    crashed.crashed = True
+
+    with pytest.raises(ConnectionError):
+        await pool.call_tool("maps_geo", {})
+    assert pool.metrics()["spawned"] == 1
+
+    for _ in range(5):
+        await asyncio.sleep(0)
+    assert pool.metrics()["spawned"] == 2
+    assert pool.metrics()["idle"] == 1
+    assert crashed.closed and crashed.connect_task is not asyncio.current_task()
+
+    await pool.call_tool("maps_geo", {})
+    assert len(FakeMCPClient.instances) == 2
+    await pool.close()
+    assert all(client.closed for client in FakeMCPClient.instances)
+
+
+@pytest.mark.asyncio
+async def test_health_check_reaps_idle_and_respawns_dead():
+    """Test idle reaping above min_sessions and respawn of dead sessions"""
+    pool = MCPSessionPool(
+        FakeMCPClient, max_sessions=3, min_sessions=1, idle_timeout=0
+    )
+
+    async def use():
+        async with pool.lease():
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(use(), use(), use())
+    assert pool.metrics()["live"] == 3
+
+    await pool.check_health()
+    assert pool.metrics()["live"] == 1
+    assert pool.metrics()["reaped"] == 2
+
+    survivor = [c for c in FakeMCPClient.instances if not c.closed][0]
+    survivor.crashed = True
+    await pool.check_health()
+
+    assert survivor.closed
+    assert pool.metrics()["live"] == 1
+    assert pool.metrics()["respawned"] == 1
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_pooled_client_registers_with_toolkit():
+    """Test that pooled MCP tools can be registered in an agent Toolkit"""
+    pool = MCPSessionPool(FakeMCPClient, max_sessions=1)
+    toolkit = Toolkit()
+
+    await toolkit.register_mcp_client(PooledMCPClient("amap", pool))
+
+    assert "maps_geo" in toolkit.tools
+    response = await toolkit.tools["maps_geo"].original_func(address="上海")
+    assert "maps_geo" in response.content[0]["text"]
+    await pool.close()
@@ -0,0 +1,99 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+
+import pytest
+from agentscope.formatter import DashScopeChatFormatter
+from agentscope.model import DashScopeChatModel, OpenAIChatModel
+from app.agentscope_agents.agents.food_agent import create_food_agent
+from app.agentscope_agents.agents.transport_agent import create_transport_agent
+from config import settings
+from app.agentscope_agents.model_registry import (
+    ModelClientRegistry,
+    get_model_registry,
+    resolve_model_key,
+)
+
+OPENAI = {"base_url": "https://api.openai.com/v1", "model": "gpt-4", "api_key": "sk-a"}
+
+
+def test_same_config_shares_one_model():
+    """Test that identical configs get the same model instance"""
+    registry = ModelClientRegistry()
+
+    first, formatter = registry.get(OPENAI)
+    second, other_formatter = registry.get(dict(OPENAI))
+
+    assert first is second
+    assert formatter is not other_formatter
+    assert registry.metrics()["models"] == 1
+    assert registry.metrics()["hits"] == 1
+
+
+def test_different_key_or_model_gets_new_client():
+    """Test that api_key and model are part of the registry key"""
+    registry = ModelClientRegistry()
+
+    base, _ = registry.get(OPENAI)
+    other_key, _ = registry.get(dict(OPENAI, api_key="sk-b"))
+    other_model, _ = registry.get(dict(OPENAI, model="gpt-4o"))
+
+    assert len({id(base), id(other_key), id(other_model)}) == 3
+
+
+def test_openai_clients_share_pooled_http_client():
+    """Test that OpenAI-compatible models reuse the keep-alive HTTP client"""
+    registry = ModelClientRegistry(max_connections=7)
+
+    default, _ = registry.get(OPENAI)
+    custom, _ = registry.get(
+        dict(OPENAI, base_url="https://llm.example.com/v1", model="deepseek-chat")
+    )
+
+    assert isinstance(default.model, OpenAIChatModel)
+    assert default.model.client._client is registry.http_client
+    assert custom.model.client._client is registry.http_client
+    assert str(custom.model.client.base_url).startswith("https://llm.example.com/v1")
+
+
+def test_provider_detection():
+    """Test provider detection for configs without an explicit provider"""
+    assert resolve_model_key(OPENAI)[0] == "openai"
+    assert resolve_model_key({"model": "qwen-max", "api_key": "k"})[0] == "tongyi"
+    assert (
+        resolve_model_key({"base_url": "https://api.anthropic.com", "api_key": "k"})[0]
+        == "anthropic"
+    )
+    assert resolve_model_key(dict(OPENAI, provider="tongyi"))[0] == "tongyi"
+
+    model, formatter = ModelClientRegistry().get({"model": "qwen-max", "api_key": "k"})
+    assert isinstance(model.model, DashScopeChatModel)
+    assert isinstance(formatter, DashScopeChatFormatter)
+
+
+def test_agent_factories_share_models(monkeypatch):
+    """Test that agents built from one config share a model client"""
+    monkeypatch.setattr(settings, "llm_routing_enabled", False)
+    transport = create_transport_agent(OPENAI)
+    food = create_food_agent(OPENAI)
+
+    assert transport.model is food.model
+    assert transport.model is get_model_registry().get(OPENAI)[0]
+
+
+@pytest.mark.asyncio
+async def test_aclose_drops_models_and_connections():
+    """Test that closing the registry releases the HTTP pool"""
+    registry = ModelClientRegistry()
+    registry.get(OPENAI)
+    http_client = registry.http_client
+
+    await registry.aclose()
+
+    assert http_client.is_closed
+    assert registry.metrics()["models"] == 0
@@ -0,0 +1,130 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+
+import asyncio
+
+import pytest
+from app.agentscope_agents import pool as pool_module
+from app.agentscope_agents.pool import CoordinatorPool
+
+
+class FakeCoordinator:
+    built = 0
+
+    def __init__(self, model_configs, result_cache=None, fallback_cache=None):
+        FakeCoordinator.built += 1
+        self.model_configs = model_configs
+        self.memory = []
+        self.resets = 0
+
+    async def initialize(self, mcp_clients=None):
+        self.mcp_clients = mcp_clients
+
+    async def reset(self):
+        self.resets += 1
+        self.memory.clear()
+
+
+@pytest.fixture
+def fake_coordinator(monkeypatch):
+    FakeCoordinator.built = 0
+    monkeypatch.setattr(pool_module, "AgentCoordinator", FakeCoordinator)
+    return FakeCoordinator
+
+
+@pytest.mark.asyncio
+async def test_pool_reuses_warm_coordinators(fake_coordinator):
+    """Test that leases reuse coordinators built at start-up"""
+    pool = CoordinatorPool({}, size=2)
+    await pool.start()
+
+    for _ in range(5):
+        async with pool.lease() as coordinator:
+            coordinator.memory.append("user data")
+
+    assert fake_coordinator.built == 2
+    assert pool.metrics()["leases"] == 5
+    assert pool.metrics()["idle"] == 2
+
+
+@pytest.mark.asyncio
+async def test_pool_resets_coordinator_on_return(fake_coordinator):
+    """Test that per-request state is cleared when a lease ends"""
+    pool = CoordinatorPool({}, size=1)
+
+    async with pool.lease() as coordinator:
+        coordinator.memory.append("user data")
+        assert pool.metrics()["in_use"] == 1
+
+    assert coordinator.memory == []
+    assert coordinator.resets == 1
+    assert pool.metrics()["in_use"] == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_drops_coordinator_it_cannot_reset(fake_coordinator, monkeypatch):
+    """Test that an un-reset coordinator is never leased again and its slot is rebuilt"""
+    pool = CoordinatorPool({}, size=1, lease_timeout=0.1)
+    await pool.start()
+    build = pool._build
+
+    async def broken_reset():
+        raise RuntimeError("reset failed")
+
+    async def broken_build():
+        raise RuntimeError("model client unavailable")
+
+    async with pool.lease() as coordinator:
+        coordinator.memory.append("user data")
+        coordinator.reset = broken_reset
+        monkeypatch.setattr(pool, "_build", broken_build)
+
+    assert pool.metrics()["idle"] == 0
+    assert pool.metrics()["missing"] == 1
+
+    with pytest.raises(RuntimeError):
+        async with pool.lease():
+            pass
+    assert pool.metrics()["missing"] == 1
+
+    monkeypatch.setattr(pool, "_build", build)
+    async with pool.lease() as leased:
+        assert leased is not coordinator
+        assert leased.memory == []
+    assert pool.metrics()["missing"] == 0
+    assert pool.metrics()["idle"] == 1
+
+
+@pytest.mark.asyncio
+async def test_pool_lease_waits_and_times_out(fake_coordinator):
+    """Test that leases queue when the pool is exhausted"""
+    pool = CoordinatorPool({}, size=1, lease_timeout=0.05)
+
+    async with pool.lease():
+        with pytest.raises(TimeoutError):
+            async with pool.lease():
+                pass
+
+    metrics = pool.metrics()
+    assert metrics["lease_timeouts"] == 1
+    assert metrics["waiting"] == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_records_lease_wait(fake_coordinator):
+    """Test that lease-wait time is measured while the pool is busy"""
+    pool = CoordinatorPool({}, size=1)
+
+    async def hold():
+        async with pool.lease():
+            await asyncio.sleep(0.05)
+
+    await asyncio.gather(hold(), hold())
+
+    assert pool.metrics()["max_wait_ms"] >= 40
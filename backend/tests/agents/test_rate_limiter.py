@@ -0,0 +1,105 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+
+import asyncio
+import time
+
+import pytest
+from agentscope.model import ChatModelBase
+from app.agentscope_agents.rate_limiter import (
+    ProviderRateLimiter,
+    RateLimitedChatModel,
+    TokenBucket,
+)
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class FakeModel(ChatModelBase):
+    def __init__(self, error=None):
+        super().__init__("fake", stream=False)
+        self.calls = 0
+        self.error = error
+
+    async def __call__(self, messages, **kwargs):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return {"messages": messages, **kwargs}
+
+
+def test_bucket_delay_matches_refill_rate():
+    """Test that an empty bucket reports the time needed to refill"""
+    bucket = TokenBucket(60)
+    bucket.consume(60)
+
+    assert bucket.delay_for(1) == pytest.approx(1, abs=0.05)
+    assert bucket.delay_for(1000) == pytest.approx(60, abs=0.5)
+
+
+@pytest.mark.asyncio
+async def test_over_limit_calls_queue_instead_of_failing():
+    """Test that calls beyond the RPM budget wait for capacity"""
+    limiter = ProviderRateLimiter("openai", rpm=600)  # one request per 0.1s
+    limiter.requests.consume(600)
+
+    started = time.monotonic()
+    await asyncio.gather(*(limiter.acquire() for _ in range(3)))
+    elapsed = time.monotonic() - started
+
+    assert 0.25 < elapsed < 1
+    metrics = limiter.metrics()
+    assert metrics["admitted"] == 3
+    assert metrics["delayed"] == 3
+    assert metrics["queue_depth"] == 0
+    assert metrics["max_wait_ms"] >= 250
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_limits_large_prompts():
+    """Test that the TPM bucket holds back calls until tokens refill"""
+    limiter = ProviderRateLimiter("openai", tpm=6000)  # 100 tokens per second
+    await limiter.acquire(5990)
+
+    task = asyncio.create_task(limiter.acquire(20))
+    await asyncio.sleep(0.05)
+    assert limiter.metrics()["queue_depth"] == 1
+
+    await asyncio.wait_for(task, 1)
+    assert limiter.metrics()["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_unlimited_provider_admits_immediately():
+    """Test that a provider without limits never queues"""
+    limiter = ProviderRateLimiter("tongyi")
+    await asyncio.gather(*(limiter.acquire(10**6) for _ in range(50)))
+
+    assert limiter.metrics()["admitted"] == 50
+    assert limiter.metrics()["delayed"] == 0
+
+
+@pytest.mark.asyncio
+async def test_model_wrapper_admits_calls_and_backs_off_on_429():
+    """Test that the wrapper goes through the limiter and drains it on 429"""
+    limiter = ProviderRateLimiter("openai", rpm=60)
+    model = RateLimitedChatModel(FakeModel(), limiter)
+
+    result = await model([{"role": "user", "content": "hi"}], tool_choice="auto")
+    assert result["tool_choice"] == "auto"
+    assert model.model_name == "fake"
+
+    throttled = RateLimitedChatModel(FakeModel(error=RateLimitError()), limiter)
+    with pytest.raises(RateLimitError):
+        await throttled([])
+
+    assert limiter.metrics()["throttled"] == 1
+    assert limiter.requests.delay_for(1) > 0.5
@@ -0,0 +1,134 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+
+from types import SimpleNamespace
+
+import pytest
+from app.agentscope_agents.coordinator import AgentCoordinator
+from app.agentscope_agents.deadline import fallback_cache_args
+from app.agentscope_agents.result_cache import (
+    canonicalize_trip_data,
+    recommendation_cache_args,
+)
+from app.agentscope_agents.tool_cache import ToolResultCache
+
+TRIP = {
+    "title": "上海周末游",
+    "destinations": ["上海"],
+    "start_date": "2026-03-02",
+    "end_date": "2026-03-04",
+    "travelers": 2,
+    "budget": {"total": 5200},
+    "preferences": {},
+}
+
+
+def test_canonical_trip_data_buckets_dates_and_budget():
+    """Test that near-identical trips share a canonical form"""
+    other = dict(
+        TRIP, title="另一个标题", start_date="2026-03-03", end_date="2026-03-05"
+    )
+    other["budget"] = {"total": 5800}
+
+    assert canonicalize_trip_data(TRIP, 7, 1000) == canonicalize_trip_data(
+        other, 7, 1000
+    )
+    assert canonicalize_trip_data(TRIP) != canonicalize_trip_data(other)
+
+
+def test_cache_args_change_with_prompt_and_model():
+    """Test that prompt or model changes invalidate cached results"""
+    task = {"action": "recommend", "trip_data": TRIP}
+    base = recommendation_cache_args("food", "prompt", "gpt-4", task)
+
+    assert base != recommendation_cache_args("food", "prompt v2", "gpt-4", task)
+    assert base != recommendation_cache_args("food", "prompt", "qwen-max", task)
+
+
+def test_dated_agents_are_keyed_on_exact_dates():
+    """Test that forecasts and day plans are never shared across trip dates"""
+    later = dict(TRIP, start_date="2026-03-03", end_date="2026-03-05")
+
+    def key(agent, trip):
+        task = {"action": "query", "trip_data": trip}
+        return recommendation_cache_args(agent, "prompt", "gpt-4", task, 7, 1000)
+
+    assert key("food", TRIP) == key("food", later)
+    assert key("weather", TRIP) != key("weather", later)
+    assert key("planner", TRIP) != key("planner", later)
+
+
+def test_budgeted_agents_are_keyed_on_exact_budget():
+    """Test that budget analyses and itineraries are never shared across budgets"""
+    richer = dict(TRIP, budget={"total": 5999})
+
+    def key(agent, task):
+        return recommendation_cache_args(agent, "prompt", "gpt-4", task, 7, 1000)
+
+    def query(trip):
+        return {"action": "query", "trip_data": trip}
+
+    assert key("food", query(TRIP)) == key("food", query(richer))
+    assert key("planner", query(TRIP)) != key("planner", query(richer))
+    assert key("budget", {"budget": {"total": 5200}}) != key(
+        "budget", {"budget": {"total": 5999}}
+    )
+
+
+@pytest.mark.asyncio
+async def test_coordinator_serves_repeat_requests_from_cache(monkeypatch):
+    """Test that an equivalent request skips the LLM and is flagged as cached"""
+    calls = []
+
+    async def fake_execute(agent, task_data, task_name, structured_model=None):
+        calls.append(task_name)
+        return {"restaurants": ["南翔馒头店"]}
+
+    coordinator = AgentCoordinator({}, result_cache=ToolResultCache())
+    coordinator._agents["food"] = SimpleNamespace(
+        sys_prompt="美食", model=SimpleNamespace(model_name="gpt-4")
+    )
+    monkeypatch.setattr(coordinator, "_execute_agent", fake_execute)
+
+    task = {"action": "recommend", "trip_data": TRIP}
+    first = await coordinator._run_agent("food", task)
+    second = await coordinator._run_agent("food", task)
+
+    assert calls == ["food"]
+    assert first == second
+    assert coordinator._cached_agents == {"food"}
+
+
+@pytest.mark.asyncio
+async def test_invalid_replies_are_not_cached(monkeypatch):
+    """Test that a reply that failed validation is retried, not replayed"""
+    calls = []
+
+    async def fake_execute(agent, task_data, task_name, structured_model=None):
+        calls.append(task_name)
+        return {"content": "推荐全聚德", "validation_errors": ["no Food records"]}
+
+    coordinator = AgentCoordinator(
+        {}, result_cache=ToolResultCache(), fallback_cache=ToolResultCache()
+    )
+    coordinator._agents["food"] = SimpleNamespace(
+        sys_prompt="美食", model=SimpleNamespace(model_name="gpt-4")
+    )
+    monkeypatch.setattr(coordinator, "_execute_agent", fake_execute)
+
+    task = {"action": "recommend", "trip_data": TRIP}
+    await coordinator._run_agent("food", task)
+    await coordinator._run_agent("food", task)
+
+    assert calls == ["food", "food"]
+    assert coordinator._cached_agents == set()
+    assert (
+        await coordinator.fallback_cache.get("food", fallback_cache_args("food", task))
+        is None
+    )
@@ -0,0 +1,158 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+
+import asyncio
+import time
+
+import pytest
+from agentscope.model import ChatModelBase
+from config import settings
+from app.agentscope_agents.model_registry import ModelClientRegistry, routing_configs
+from app.agentscope_agents.router import ProviderRouter, RoutedChatModel
+
+
+class FakeModel(ChatModelBase):
+    def __init__(self, name, delay=0.0, error=None):
+        super().__init__(name, stream=False)
+        self.delay = delay
+        self.error = error
+        self.cancelled = False
+
+    async def __call__(self, *args, **kwargs):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error:
+            raise self.error
+        return self.model_name
+
+
+def _router(**kwargs):
+    kwargs.setdefault("min_hedge_delay", 0.05)
+    kwargs.setdefault("min_samples", 2)
+    return ProviderRouter(**kwargs)
+
+
+def test_rank_prefers_fast_healthy_providers():
+    """Test that slow or failing providers are tried later"""
+    router = _router()
+    for _ in range(3):
+        router.stats("openai").record(2.0, True)
+        router.stats("tongyi").record(0.5, True)
+        router.stats("anthropic").record(0.1, False)
+
+    assert router.rank(["openai", "anthropic", "tongyi"]) == [
+        "tongyi",
+        "openai",
+        "anthropic",
+    ]
+    assert router.metrics()["providers"]["anthropic"]["healthy"] is False
+
+
+def test_hedge_delay_follows_latency_percentile():
+    """Test that the hedge threshold tracks the provider's tail latency"""
+    router = _router(hedge_percentile=0.9)
+    for latency in [0.1] * 9 + [1.0]:
+        router.stats("openai").record(latency, True)
+
+    assert router.hedge_delay("openai") == 1.0
+    assert router.hedge_delay("unknown") == 0.05
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_to_second_provider():
+    """Test that a call slower than the threshold is duplicated and the fast one wins"""
+    router = _router()
+    slow = FakeModel("openai", delay=5)
+    model = RoutedChatModel({"openai": slow, "tongyi": FakeModel("tongyi")}, router)
+
+    started = time.monotonic()
+    assert await model([]) == "tongyi"
+    assert time.monotonic() - started < 1
+    assert slow.cancelled
+    assert router.metrics()["hedges"] == 1
+    assert router.metrics()["hedge_wins"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_call_fails_over_immediately():
+    """Test that an error on one provider retries on the next"""
+    router = _router(min_hedge_delay=10)
+    model = RoutedChatModel(
+        {
+            "openai": FakeModel("openai", error=RuntimeError("503")),
+            "anthropic": FakeModel("anthropic"),
+        },
+        router,
+    )
+
+    assert await asyncio.wait_for(model([]), 1) == "anthropic"
+    assert router.metrics()["failovers"] == 1
+    assert router.stats("openai").error_rate() == 1.0
+
+
+@pytest.mark.asyncio
+async def test_error_raised_when_every_provider_fails():
+    """Test that the last error surfaces when no provider succeeds"""
+    model = RoutedChatModel(
+        {
+            "openai": FakeModel("openai", error=RuntimeError("first")),
+            "tongyi": FakeModel("tongyi", error=RuntimeError("second")),
+        },
+        _router(),
+    )
+
+    with pytest.raises(RuntimeError, match="second"):
+        await model([])
+
+
+def test_routing_configs_use_openai_compatible_endpoints(monkeypatch):
+    """Test that every provider with a key is routed over its compatible endpoint"""
+    monkeypatch.setattr(settings, "openai_api_key", "sk-openai")
+    monkeypatch.setattr(settings, "anthropic_api_key", "sk-anthropic")
+    monkeypatch.setattr(settings, "tongyi_api_key", "")
+
+    configs = routing_configs(
+        {
+            "base_url": "https://api.anthropic.com",
+            "model": settings.anthropic_model,
+            "api_key": "k",
+        }
+    )
+
+    assert list(configs) == ["anthropic", "openai"]
+    assert configs["anthropic"]["base_url"] == settings.anthropic_compatible_base_url
+    assert configs["openai"]["model"] == settings.openai_model
+    assert all(config["api"] == "openai" for config in configs.values())
+
+    registry = ModelClientRegistry()
+    routed, _ = registry.get_routed(configs, _router())
+    assert registry.get_routed(configs, _router())[0] is routed
+    assert set(routed.models) == {"anthropic", "openai"}
+
+
+def test_routing_configs_keep_the_agent_tier(monkeypatch):
+    """Test that hedges and failovers go to the other providers' same-tier model"""
+    monkeypatch.setattr(settings, "openai_api_key", "sk-openai")
+    monkeypatch.setattr(settings, "anthropic_api_key", "sk-anthropic")
+    monkeypatch.setattr(settings, "tongyi_api_key", "sk-tongyi")
+
+    fast = routing_configs({"provider": "openai", "model": "gpt-4o-mini"})
+    assert fast["anthropic"]["model"] == settings.model_tiers["fast"]["anthropic"]
+    assert fast["tongyi"]["model"] == "qwen-turbo"
+
+    strong = routing_configs(
+        {"provider": "tongyi", "model": "custom", "tier": "strong"}
+    )
+    assert strong["openai"]["model"] == "gpt-4o"
+
+    # A model outside every tier is never hedged onto another provider's model
+    assert list(routing_configs({"provider": "openai", "model": "o1"})) == ["openai"]
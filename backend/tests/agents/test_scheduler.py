@@ -0,0 +1,121 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+
+import asyncio
+import time
+
+import pytest
+from app.agentscope_agents.scheduler import (
+    AgentGraph,
+    AgentGraphExecutor,
+    AgentNode,
+    build_planning_graph,
+)
+
+
+def _payload(trip_data, results):
+    return {"trip_data": trip_data, "inputs": dict(results)}
+
+
+def test_graph_rejects_unknown_dependency():
+    """Test that a dependency on a missing node is rejected"""
+    with pytest.raises(ValueError):
+        AgentGraph([AgentNode("budget", _payload, depends_on=["transport"])])
+
+
+def test_graph_rejects_cycles():
+    """Test that cyclic graphs are rejected"""
+    with pytest.raises(ValueError):
+        AgentGraph(
+            [
+                AgentNode("a", _payload, depends_on=["b"]),
+                AgentNode("b", _payload, depends_on=["a"]),
+            ]
+        )
+
+
+def test_planning_graph_dependencies():
+    """Test that only budget and planner wait for other agents"""
+    graph = build_planning_graph()
+
+    assert len(graph.nodes) == 7
+    ready = {node.name for node in graph.ready_nodes([], [])}
+    assert ready == {"transport", "accommodation", "attraction", "food", "weather"}
+    assert "budget" in graph.nodes["planner"].depends_on
+
+
+@pytest.mark.asyncio
+async def test_executor_runs_independent_agents_concurrently():
+    """Test that wall time follows the critical path, not the sum of agents"""
+    delays = {"slow": 0.2, "fast": 0.05, "dependent": 0.05}
+    graph = AgentGraph(
+        [
+            AgentNode("slow", _payload),
+            AgentNode("fast", _payload),
+            AgentNode("dependent", _payload, depends_on=["slow", "fast"]),
+        ]
+    )
+
+    async def runner(name, payload):
+        await asyncio.sleep(delays[name])
+        return {"name": name, "inputs": sorted(payload["inputs"])}
+
+    started = time.monotonic()
+    events = [event async for event in AgentGraphExecutor(graph, runner).run({})]
+    elapsed = time.monotonic() - started
+
+    completed = [e["agent"] for e in events if e["event"] == "completed"]
+    assert completed == ["fast", "slow", "dependent"]
+    assert events[-1]["result"]["inputs"] == ["fast", "slow"]
+    assert elapsed < sum(delays.values())
+
+
+@pytest.mark.asyncio
+async def test_executor_records_runner_failures():
+    """Test that a failing agent yields an error result instead of aborting"""
+    graph = AgentGraph(
+        [
+            AgentNode("broken", _payload),
+            AgentNode("after", _payload, depends_on=["broken"]),
+        ]
+    )
+
+    async def runner(name, payload):
+        if name == "broken":
+            raise RuntimeError("boom")
+        return payload["inputs"]
+
+    events = [event async for event in AgentGraphExecutor(graph, runner).run({})]
+    completed = {e["agent"]: e["result"] for e in events if e["event"] == "completed"}
+
+    assert completed["broken"] == {"error": "boom"}
+    assert completed["after"] == {"broken": {"error": "boom"}}
+
+
+@pytest.mark.asyncio
+async def test_executor_cancels_running_agents_on_close():
+    """Test that closing the event stream cancels agents still running"""
+    cancelled = []
+    graph = AgentGraph([AgentNode("quick", _payload), AgentNode("stuck", _payload)])
+
+    async def runner(name, payload):
+        try:
+            await asyncio.sleep(0 if name == "quick" else 10)
+        except asyncio.CancelledError:
+            cancelled.append(name)
+            raise
+        return {}
+
+    stream = AgentGraphExecutor(graph, runner).run({})
+    async for event in stream:
+        if event["event"] == "completed":
+            break
+    await stream.aclose()
+
+    assert cancelled == ["stuck"]
@@ -0,0 +1,162 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+
+import asyncio
+
+import pytest
+from app.agentscope_agents.singleflight import SingleFlight, planning_flight_key
+
+
+def _trip(title="Trip"):
+    return {
+        "title": title,
+        "destinations": ["北京"],
+        "start_date": "2026-05-01",
+        "end_date": "2026-05-03",
+        "budget": {"total": 5000},
+        "travelers": 2,
+        "preferences": {},
+    }
+
+
+def test_flight_key_ignores_title():
+    """Test that requests differing only in title share a key"""
+    assert planning_flight_key(_trip("A")) == planning_flight_key(_trip("B"))
+    other = dict(_trip(), destinations=["上海"])
+    assert planning_flight_key(other) != planning_flight_key(_trip())
+
+
+@pytest.mark.asyncio
+async def test_concurrent_subscribers_share_one_run():
+    """Test that identical concurrent requests run the source once"""
+    flights = SingleFlight()
+    runs = []
+    release = asyncio.Event()
+
+    async def source():
+        runs.append(1)
+        yield "first"
+        await release.wait()
+        yield "second"
+
+    async def collect():
+        return [event async for event in flights.subscribe("key", source)]
+
+    tasks = [asyncio.create_task(collect()) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert runs == [1]
+    assert results == [["first", "second"]] * 3
+    assert flights.metrics()["requests_coalesced"] == 2
+    assert flights.metrics()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_late_joiner_receives_replayed_events():
+    """Test that a subscriber joining mid-run gets the events it missed"""
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def source():
+        yield 1
+        yield 2
+        await release.wait()
+        yield 3
+
+    first = asyncio.create_task(_collect(flights.subscribe("key", source)))
+    await asyncio.sleep(0.01)
+    late = asyncio.create_task(_collect(flights.subscribe("key", source)))
+    await asyncio.sleep(0.01)
+    release.set()
+
+    assert await first == [1, 2, 3]
+    assert await late == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_source_failure_reaches_every_subscriber():
+    """Test that an exception in the shared run is raised in each subscriber"""
+    flights = SingleFlight()
+
+    async def source():
+        yield "partial"
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(
+        _collect(flights.subscribe("key", source)),
+        _collect(flights.subscribe("key", source)),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_run_cancelled_when_all_subscribers_leave():
+    """Test that the shared run stops once nobody is listening"""
+    flights = SingleFlight()
+    cancelled = asyncio.Event()
+
+    async def source():
+        yield "started"
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        yield "never"
+
+    stream = flights.subscribe("key", source)
+    assert await stream.__anext__() == "started"
+    await stream.aclose()
+
+    await asyncio.wait_for(cancelled.wait(), 1)
+    await asyncio.sleep(0)
+    assert flights.metrics()["in_flight"] == 0
+
+
+async def _collect(stream):
+    return [event async for event in stream]
+
+
+@pytest.mark.asyncio
+async def test_tighter_deadline_does_not_join_a_later_run():
+    """Test that a subscriber never waits on a run due after its own deadline"""
+    flights = SingleFlight()
+    runs = []
+    release = asyncio.Event()
+
+    async def source():
+        runs.append(1)
+        yield "first"
+        await release.wait()
+        yield "second"
+
+    async def fast_source():
+        runs.append(2)
+        yield "fast"
+
+    loose = asyncio.create_task(
+        _collect(flights.subscribe("key", source, expires_at=100.0))
+    )
+    await asyncio.sleep(0.01)
+    looser = asyncio.create_task(
+        _collect(flights.subscribe("key", source, expires_at=200.0))
+    )
+    tight = await _collect(flights.subscribe("key", fast_source, expires_at=50.0))
+    release.set()
+
+    assert tight == ["fast"]
+    assert await loose == await looser == ["first", "second"]
+    assert runs == [1, 2]
+    assert flights.metrics()["requests_coalesced"] == 1
+    assert flights.metrics()["deadline_bypasses"] == 1
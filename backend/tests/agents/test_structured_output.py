@@ -0,0 +1,121 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+
+import pytest
+from agentscope.message import Msg
+from app.agentscope_agents.coordinator import AgentCoordinator
+from app.agentscope_agents.structured_output import (
+    ExtractionError,
+    extract_json,
+    parse_agent_output,
+)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        '{"name": "故宫", "tags": ["历史"]}',
+        '```json\n{"name": "故宫", "tags": ["历史"]}\n```',
+        '推荐如下：\n{"name": "故宫", "tags": ["历史"]}\n希望对你有帮助',
+        '{"name": "故宫", "tags": ["历史",],}',
+        '{"name": "故宫", "tags": ["历史"',
+    ],
+)
+def test_extracts_fenced_wrapped_and_broken_json(text):
+    """Test that common formatting defects are recovered without a re-ask"""
+    assert extract_json(text) == {"name": "故宫", "tags": ["历史"]}
+
+
+def test_repairs_python_literals_and_raw_newlines():
+    """Test that literals and newlines inside strings are repaired"""
+    text = '{"open": True, "closed": None, "tips": "早点去\n人少", "note": "True"}'
+
+    assert extract_json(text) == {
+        "open": True,
+        "closed": None,
+        "tips": "早点去\n人少",
+        "note": "True",
+    }
+
+
+def test_reply_without_json_is_an_error():
+    """Test that prose without any JSON value is rejected"""
+    with pytest.raises(ExtractionError):
+        extract_json("抱歉，我无法查询到相关信息。")
+
+
+def test_field_errors_are_reported_without_reask():
+    """Test that records with bad fields are usable but reported"""
+    output = parse_agent_output(
+        "attraction",
+        '{"attractions": [{"name": "故宫", "rating": 9, "location": {"name": "故宫"}}]}',
+    )
+
+    assert not output.invalid
+    assert output.errors == [
+        "Attraction[0].rating: Input should be less than or equal to 5"
+    ]
+
+
+def test_reply_without_section_records_is_invalid():
+    """Test that JSON holding none of the section's records asks again"""
+    output = parse_agent_output("food", '{"分析": "北京美食很多"}')
+
+    assert output.invalid
+    assert output.errors[0].startswith("no Food records found")
+
+
+def test_budget_and_planner_replies_are_validated():
+    """Test that budget and planner results go through their models too"""
+    budget = parse_agent_output(
+        "budget", '{"budget": {"total": 6000, "food_spent": -1}}'
+    )
+    assert not budget.invalid
+    assert budget.errors == [
+        "TripBudget[0].food_spent: Input should be greater than or equal to 0"
+    ]
+
+    planner = parse_agent_output("planner", '{"summary": "ok"}')
+    assert planner.invalid
+    assert planner.errors[0].startswith("no ItineraryItem records found")
+
+    planner = parse_agent_output(
+        "planner",
+        '{"days": [{"day": 1, "itinerary": [{"day": 1, "time": "09:00", '
+        '"type": "attraction", "activity": "游览故宫", "price": 60}]}]}',
+    )
+    assert not planner.invalid and planner.errors == []
+
+
+class ScriptedAgent:
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.received = []
+
+    async def __call__(self, msg, structured_model=None):
+        self.received.append(msg.content)
+        return Msg("agent", self.replies.pop(0), "assistant")
+
+
+@pytest.mark.asyncio
+async def test_coordinator_reasks_only_unusable_replies():
+    """Test that one follow-up is sent for an unusable reply"""
+    coordinator = AgentCoordinator({})
+    fenced = ScriptedAgent(['```json\n{"restaurants": [{"name": "全聚德"}]}\n```'])
+    prose = ScriptedAgent(["推荐全聚德", '{"restaurants": [{"name": "全聚德"}]}'])
+
+    result = await coordinator._execute_agent(fenced, {}, "food")
+    assert result["restaurants"] == [{"name": "全聚德"}]
+    assert "Food[0].location: Field required" in result["validation_errors"]
+    assert len(fenced.received) == 1
+
+    result = await coordinator._execute_agent(prose, {}, "food")
+    assert result["restaurants"] == [{"name": "全聚德"}]
+    assert len(prose.received) == 2
+    assert "无法使用" in prose.received[1]
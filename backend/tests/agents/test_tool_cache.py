@@ -0,0 +1,120 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+
+import asyncio
+
+import pytest
+from mcp.types import CallToolResult, TextContent, Tool
+
+from app.agentscope_agents.mcp_pool import PooledMCPToolFunction
+from app.agentscope_agents.tool_cache import ToolResultCache, make_cache_key
+
+
+class InMemoryBackend:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, tool_name, value, ttl):
+        self.data[key] = value
+
+
+class CountingPool:
+    def __init__(self):
+        self.calls = 0
+
+    async def lease(self):
+        pass
+
+    async def call_tool(self, name, arguments):
+        self.calls += 1
+        return CallToolResult(content=[TextContent(type="text", text="121.47,31.23")])
+
+
+def test_cache_key_normalizes_arguments():
+    """Test that argument order and whitespace do not change the key"""
+    key = make_cache_key("maps_geo", {"address": "上海  外滩", "city": "上海"})
+
+    assert key == make_cache_key("maps_geo", {"city": "上海", "address": " 上海 外滩"})
+    assert key != make_cache_key(
+        "maps_text_search", {"address": "上海 外滩", "city": "上海"}
+    )
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_and_miss_counters():
+    """Test that repeated lookups are served from memory"""
+    cache = ToolResultCache()
+
+    assert await cache.get("maps_geo", {"address": "上海"}) is None
+    await cache.set("maps_geo", {"address": "上海"}, {"location": "121.47,31.23"})
+    assert await cache.get("maps_geo", {"address": "上海"}) == {
+        "location": "121.47,31.23"
+    }
+
+    metrics = cache.metrics()
+    assert metrics["hits"] == 1
+    assert metrics["misses"] == 1
+    assert metrics["per_tool"]["maps_geo"] == {"hits": 1, "misses": 1}
+
+
+@pytest.mark.asyncio
+async def test_cache_respects_per_tool_ttl():
+    """Test that entries expire after their tool's TTL"""
+    cache = ToolResultCache(default_ttl=60, ttls={"maps_weather": 0.01})
+
+    await cache.set("maps_weather", {"city": "上海"}, {"weather": "晴"})
+    await cache.set("maps_geo", {"address": "上海"}, {"location": "121.47,31.23"})
+    await asyncio.sleep(0.02)
+
+    assert await cache.get("maps_weather", {"city": "上海"}) is None
+    assert await cache.get("maps_geo", {"address": "上海"}) is not None
+
+
+@pytest.mark.asyncio
+async def test_cache_evicts_least_recently_used():
+    """Test that the memory tier stays within max_entries"""
+    cache = ToolResultCache(max_entries=2)
+
+    await cache.set("maps_geo", {"address": "a"}, 1)
+    await cache.set("maps_geo", {"address": "b"}, 2)
+    await cache.get("maps_geo", {"address": "a"})
+    await cache.set("maps_geo", {"address": "c"}, 3)
+
+    assert await cache.get("maps_geo", {"address": "b"}) is None
+    assert await cache.get("maps_geo", {"address": "a"}) == 1
+    assert cache.metrics()["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_falls_through_to_backend():
+    """Test that memory misses are served by the second tier"""
+    backend = InMemoryBackend()
+    await ToolResultCache(backend=backend).set("maps_geo", {"address": "上海"}, 42)
+
+    cache = ToolResultCache(backend=backend)
+
+    assert await cache.get("maps_geo", {"address": "上海"}) == 42
+    assert cache.metrics()["backend_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_pooled_tool_function_uses_cache():
+    """Test that cached tool calls skip the MCP round-trip"""
+    pool = CountingPool()
+    tool = Tool(name="maps_geo", inputSchema={"type": "object", "properties": {}})
+    func = PooledMCPToolFunction("amap", tool, pool, cache=ToolResultCache())
+
+    first = await func(address="上海")
+    second = await func(address="上海")
+
+    assert pool.calls == 1
+    assert first.content == second.content
@@ -0,0 +1,137 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+
+import asyncio
+
+import pytest
+from agentscope.model import ChatModelBase, ChatResponse
+from agentscope.model._model_usage import ChatUsage
+from app.agentscope_agents.coordinator import AgentCoordinator
+from app.agentscope_agents.pricing import model_cost
+from app.agentscope_agents.rate_limiter import (
+    ProviderRateLimiter,
+    RateLimitedChatModel,
+)
+from app.agentscope_agents.scheduler import AgentGraph, AgentNode
+from app.agentscope_agents.usage import (
+    AgentUsage,
+    record_tool_call,
+    summarize_usage,
+    track_usage,
+)
+
+
+def _response(input_tokens, output_tokens):
+    return ChatResponse(
+        content=[{"type": "text", "text": "{}"}],
+        usage=ChatUsage(
+            input_tokens=input_tokens, output_tokens=output_tokens, time=0.0
+        ),
+    )
+
+
+class FakeModel(ChatModelBase):
+    def __init__(self, name="gpt-4o", stream=False):
+        super().__init__(name, stream=stream)
+
+    async def __call__(self, messages, **kwargs):
+        if not self.stream:
+            return _response(100, 20)
+
+        async def chunks():
+            for output_tokens in (5, 10, 20):
+                yield _response(100, output_tokens)
+
+        return chunks()
+
+
+def _metered(model):
+    return RateLimitedChatModel(model, ProviderRateLimiter("openai"))
+
+
+@pytest.mark.asyncio
+async def test_llm_calls_are_recorded_into_current_usage():
+    """Test that tokens and cost of a call go to the tracked agent only"""
+    model = _metered(FakeModel())
+    usage = AgentUsage()
+
+    with track_usage(usage):
+        await model([])
+        await model([])
+    await model([])
+
+    assert usage.llm_calls == 2
+    assert usage.input_tokens == 200
+    assert usage.output_tokens == 40
+    assert usage.cost == pytest.approx(model_cost("gpt-4o", 200, 40))
+
+
+@pytest.mark.asyncio
+async def test_streamed_call_is_recorded_once_consumed():
+    """Test that streaming responses record the usage of their last chunk"""
+    model = _metered(FakeModel(stream=True))
+    usage = AgentUsage()
+
+    with track_usage(usage):
+        stream = await model([])
+        assert usage.llm_calls == 0
+        async for _ in stream:
+            pass
+
+    assert usage.llm_calls == 1
+    assert usage.output_tokens == 20
+
+
+@pytest.mark.asyncio
+async def test_graph_events_carry_per_agent_usage():
+    """Test that concurrent agents are accounted separately"""
+    model = _metered(FakeModel())
+    coordinator = AgentCoordinator({})
+    coordinator._agents = {"food": object(), "transport": object()}
+    coordinator._is_initialized = True
+
+    async def execute(agent, task_data, name, structured_model=None):
+        for _ in range(2 if name == "food" else 1):
+            await model([])
+            record_tool_call(0.01, ok=name == "food")
+        await asyncio.sleep(0.01)
+        return {"recommendations": []}
+
+    coordinator._execute_agent = execute
+    graph = AgentGraph(
+        [AgentNode(name, lambda trip, results: {}) for name in ["food", "transport"]]
+    )
+    events = {
+        event["agent"]: event
+        async for event in coordinator.run_graph({}, graph)
+        if event["event"] == "completed"
+    }
+
+    assert events["food"]["usage"]["llm_calls"] == 2
+    assert events["food"]["usage"]["tool_calls"] == 2
+    assert events["transport"]["usage"]["input_tokens"] == 100
+    assert events["transport"]["usage"]["tool_errors"] == 1
+    assert events["transport"]["usage"]["wall_time_ms"] >= 10
+
+
+def test_summary_totals_agent_usage():
+    """Test that the run summary sums every agent's counters"""
+    food, transport = AgentUsage(), AgentUsage()
+    food.record_llm("gpt-4o", 100, 20, 0.5)
+    transport.record_llm("unknown-model", 50, 10, 0.25)
+
+    summary = summarize_usage(
+        {"food": food.to_dict(), "transport": transport.to_dict()}, wall_time=1.0
+    )
+
+    assert summary["total"]["total_tokens"] == 180
+    assert summary["total"]["llm_time_ms"] == 750
+    assert summary["total"]["unpriced_calls"] == 1
+    assert summary["total"]["cost_usd"] == round(model_cost("gpt-4o", 100, 20), 6)
+    assert summary["wall_time_ms"] == 1000
@@ -17,6 +17,7 @@ async def test_coordinator_initialization_workflow():
         "accommodation": {"model": "gpt-4", "api_key": "sk-test"},
         "attraction": {"model": "gpt-4", "api_key": "sk-test"},
         "food": {"model": "gpt-4", "api_key": "sk-test"},
+        "weather": {"model": "gpt-4", "api_key": "sk-test"},
         "budget": {"model": "gpt-4", "api_key": "sk-test"},
         "planner": {"model": "gpt-4", "api_key": "sk-test"},
     }
@@ -26,11 +27,12 @@ async def test_coordinator_initialization_workflow():
     await coordinator.initialize(mcp_clients={})
 
     assert coordinator._is_initialized
-    assert len(coordinator._agents) == 6
+    assert len(coordinator._agents) == 7
     assert "transport" in coordinator._agents
     assert "accommodation" in coordinator._agents
     assert "attraction" in coordinator._agents
     assert "food" in coordinator._agents
+    assert "weather" in coordinator._agents
     assert "budget" in coordinator._agents
     assert "planner" in coordinator._agents
 
@@ -45,6 +47,7 @@ async def test_coordinator_plan_trip_structure():
         "accommodation": {"model": "gpt-4", "api_key": "sk-test"},
         "attraction": {"model": "gpt-4", "api_key": "sk-test"},
         "food": {"model": "gpt-4", "api_key": "sk-test"},
+        "weather": {"model": "gpt-4", "api_key": "sk-test"},
         "budget": {"model": "gpt-4", "api_key": "sk-test"},
         "planner": {"model": "gpt-4", "api_key": "sk-test"},
     }
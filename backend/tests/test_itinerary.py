@@ -0,0 +1,110 @@
+"""Test itinerary item storage and the legacy itinerary view"""
+
+import pytest
+from app.db_models import Trip
+from app.itinerary import (
+    build_items,
+    item_to_dict,
+    legacy_itineraries,
+    parse_itinerary,
+    normalize_time,
+    reorder_day,
+    split_itinerary,
+    update_item,
+)
+
+ITINERARY = [
+    {"day": 1, "time": "09:00", "type": "attraction", "title": "故宫", "cost": 60},
+    {"day": 1, "time": "12:00", "type": "food", "title": "四季民福"},
+    {"day": 1, "time": "15:00", "type": "attraction", "title": "景山公园"},
+    {"day": 2, "time": "09:00", "type": "attraction", "title": "颐和园"},
+]
+
+
+class ItemsSession:
+    """Session returning fixed rows from scalars()"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def scalars(self, query):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+def test_only_item_lists_are_split_into_rows():
+    """Test that day-organized legacy itineraries stay a JSON blob"""
+    assert len(parse_itinerary(ITINERARY)) == 4
+    assert parse_itinerary([{"day": 1, "date": "2026-05-01", "activities": []}]) is None
+    assert parse_itinerary({"days": []}) is None
+
+    rows = build_items("trip-1", parse_itinerary(ITINERARY))
+    assert [row.position for row in rows] == [0, 1, 2, 3]
+    assert {row.trip_id for row in rows} == {"trip-1"}
+    assert item_to_dict(rows[0]) == {"id": rows[0].id, **ITINERARY[0]}
+
+
+def test_times_are_zero_padded_so_they_sort_chronologically():
+    """Test that "9:00" is stored as "09:00" and sorts before "10:00" """
+    assert normalize_time("9:00") == "09:00"
+    assert normalize_time(" 7:30:15 ") == "07:30:15"
+    assert normalize_time("上午") == "上午"
+    assert normalize_time("25:00") == "25:00"
+
+    items = [dict(ITINERARY[0], time="10:00"), dict(ITINERARY[1], time="9:00")]
+    itinerary, rows = split_itinerary("trip-1", items)
+    assert itinerary == []
+    assert sorted(row.time for row in rows) == ["09:00", "10:00"]
+
+    (row,) = rows[:1]
+    update_item(row, {"time": "8:05"})
+    assert row.time == "08:05"
+
+    legacy = [{"day": 1, "date": "2026-05-01", "activities": []}]
+    assert split_itinerary("trip-1", legacy) == (legacy, [])
+
+
+def test_patch_validates_the_whole_item():
+    """Test partial updates, invalid values and unknown fields"""
+    (row,) = build_items("trip-1", parse_itinerary(ITINERARY[:1]))
+
+    update_item(row, {"time": "10:00", "notes": "提前预约"})
+    assert (row.time, row.notes, row.title) == ("10:00", "提前预约", "故宫")
+
+    with pytest.raises(ValueError):
+        update_item(row, {"cost": -1})
+    with pytest.raises(ValueError):
+        update_item(row, {"trip_id": "trip-2"})
+    assert row.cost == 60 and row.trip_id == "trip-1"
+
+
+@pytest.mark.asyncio
+async def test_reorder_keeps_time_slots():
+    """Test that reordered items take over the day's time slots"""
+    rows = build_items("trip-1", parse_itinerary(ITINERARY))
+    museum, lunch, park, _ = rows
+
+    items = await reorder_day(
+        ItemsSession(rows), "trip-1", 1, [park.id, museum.id, lunch.id]
+    )
+    assert [item.title for item in items] == ["景山公园", "故宫", "四季民福"]
+    assert [item.time for item in items] == ["09:00", "12:00", "15:00"]
+    assert [item.position for item in items] == [0, 1, 2]
+
+    with pytest.raises(ValueError):
+        await reorder_day(ItemsSession(rows), "trip-1", 1, [park.id, museum.id])
+
+
+@pytest.mark.asyncio
+async def test_legacy_view_assembles_items_per_trip():
+    """Test item-backed trips and trips still holding a JSON itinerary"""
+    rows = build_items("trip-1", parse_itinerary(ITINERARY[:2]))
+    legacy = [{"day": 1, "date": "2026-05-01", "activities": []}]
+    trips = [Trip(id="trip-1", itinerary=[]), Trip(id="trip-2", itinerary=legacy)]
+
+    itineraries = await legacy_itineraries(ItemsSession(rows), trips)
+
+    assert [item["title"] for item in itineraries["trip-1"]] == ["故宫", "四季民福"]
+    assert itineraries["trip-2"] == legacy
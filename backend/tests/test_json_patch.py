@@ -0,0 +1,141 @@
+"""Test merge patch, JSON Patch and partial trip updates"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from app.db_models import Trip
+from app.json_patch import (
+    REMOVED,
+    PatchError,
+    PatchTestFailed,
+    apply_json_patch,
+    diff_paths,
+    merge_patch,
+)
+from app.trip_patch import (
+    JSON_PATCH,
+    MERGE_PATCH,
+    apply_patch,
+    column_values,
+    patch_touches,
+    trip_document,
+)
+
+
+@pytest.mark.parametrize(
+    "target, patch, expected",
+    [
+        ({"a": "b"}, {"a": "c"}, {"a": "c"}),
+        ({"a": "b"}, {"b": "c"}, {"a": "b", "b": "c"}),
+        ({"a": "b"}, {"a": None}, {}),
+        ({"a": "b", "b": "c"}, {"a": None}, {"b": "c"}),
+        ({"a": ["b"]}, {"a": "c"}, {"a": "c"}),
+        ({"a": "c"}, {"a": ["b"]}, {"a": ["b"]}),
+        ({"a": {"b": "c"}}, {"a": {"b": "d", "c": None}}, {"a": {"b": "d"}}),
+        ({"a": [{"b": "c"}]}, {"a": [1]}, {"a": [1]}),
+        (["a", "b"], ["c", "d"], ["c", "d"]),
+        ({"a": "b"}, ["c"], ["c"]),
+        ({"e": None}, {"a": 1}, {"e": None, "a": 1}),
+        ([1, 2], {"a": "b", "c": None}, {"a": "b"}),
+        ({}, {"a": {"bb": {"ccc": None}}}, {"a": {"bb": {}}}),
+    ],
+)
+def test_merge_patch_rfc7386_examples(target, patch, expected):
+    assert merge_patch(target, patch) == expected
+
+
+def test_json_patch_operations():
+    """Test the RFC 6902 operations and their error cases"""
+    doc = {"foo": ["bar", "baz"], "qux": {"baz": 1}}
+
+    assert apply_json_patch(doc, [{"op": "add", "path": "/foo/1", "value": "x"}]) == {
+        "foo": ["bar", "x", "baz"],
+        "qux": {"baz": 1},
+    }
+    assert apply_json_patch(
+        doc,
+        [
+            {"op": "test", "path": "/qux/baz", "value": 1},
+            {"op": "move", "from": "/qux/baz", "path": "/foo/-"},
+            {"op": "copy", "from": "/foo/0", "path": "/a~1b"},
+            {"op": "replace", "path": "/foo/0", "value": "q"},
+            {"op": "remove", "path": "/foo/1"},
+        ],
+    ) == {"foo": ["q", 1], "qux": {}, "a/b": "bar"}
+
+    with pytest.raises(PatchTestFailed):
+        apply_json_patch(doc, [{"op": "test", "path": "/qux/baz", "value": True}])
+    with pytest.raises(PatchError):
+        apply_json_patch(doc, [{"op": "remove", "path": "/missing"}])
+    with pytest.raises(PatchError):
+        apply_json_patch(doc, [{"op": "add", "path": "/foo/3", "value": 1}])
+    with pytest.raises(PatchError):
+        apply_json_patch(doc, [{"op": "move", "from": "/qux", "path": "/qux/x"}])
+    assert doc == {"foo": ["bar", "baz"], "qux": {"baz": 1}}
+
+
+def test_patches_copy_only_the_changed_path():
+    """Test that untouched subtrees are shared and diffs stay local"""
+    doc = {"budget": {"total": 5000, "items": {"food": 800}}, "tags": ["a"]}
+
+    merged = merge_patch(doc, {"budget": {"items": {"food": 900}}})
+    patched = apply_json_patch(doc, [{"op": "remove", "path": "/budget/total"}])
+
+    assert merged["tags"] is doc["tags"]
+    assert patched["budget"]["items"] is doc["budget"]["items"]
+    assert doc["budget"] == {"total": 5000, "items": {"food": 800}}
+
+    assert diff_paths(doc, merged) == [(("budget", "items", "food"), 900)]
+    assert diff_paths(doc, patched) == [(("budget", "total"), REMOVED)]
+
+
+def make_trip():
+    return Trip(
+        id="trip-1",
+        title="北京三日游",
+        destinations=["北京"],
+        start_date=datetime(2026, 5, 1),
+        end_date=datetime(2026, 5, 3),
+        travelers=2,
+        status="draft",
+        budget={"total": 5000, "currency": "CNY"},
+        preferences={"pace": "relaxed"},
+        itinerary=[],
+        is_public=False,
+    )
+
+
+def test_trip_patch_writes_only_changed_columns():
+    """Test column values, jsonb path updates and rejected patches"""
+    trip = make_trip()
+    old = trip_document(trip)
+    assert "itinerary" not in old
+    assert not patch_touches(MERGE_PATCH, {"title": "x"}, "itinerary")
+    assert patch_touches(
+        JSON_PATCH, [{"op": "remove", "path": "/itinerary/0"}], "itinerary"
+    )
+
+    new = apply_patch(
+        old,
+        MERGE_PATCH,
+        {"budget": {"total": 6000, "currency": None}, "end_date": "2026-05-04"},
+    )
+    values = column_values(old, new, partial_json=True)
+    assert set(values) == {"budget", "end_date"}
+    assert values["end_date"] == datetime(2026, 5, 4)
+    sql = str(values["budget"].compile(dialect=postgresql.dialect()))
+    assert "jsonb_set" in sql and "#-" in sql
+
+    assert column_values(old, new, partial_json=False)["budget"] == {"total": 6000}
+    assert (
+        column_values(old, apply_patch(old, MERGE_PATCH, {"title": trip.title}), True)
+        == {}
+    )
+
+    with pytest.raises(PatchError):
+        apply_patch(old, MERGE_PATCH, {"title": None})
+    with pytest.raises(PatchError):
+        apply_patch(old, JSON_PATCH, [{"op": "add", "path": "/owner", "value": "x"}])
+    with pytest.raises(PatchError):
+        column_values(old, apply_patch(old, MERGE_PATCH, {"start_date": "soon"}), True)
@@ -0,0 +1,147 @@
+"""Test incremental persistence of planning runs"""
+
+from datetime import datetime
+import asyncio
+
+import anyio
+import pytest
+from app.db_models import PlanningStep, Trip
+from app.models import SessionStatus
+from app.planning_runs import PlanningRunStore
+
+
+class RecordingSession:
+    """AsyncSession stand-in recording what each transaction writes"""
+
+    def __init__(self, log):
+        self.log = log
+        self.added = []
+        self.statements = []
+        self.committed = False
+
+    async def __aenter__(self):
+        self.log["open"] += 1
+        self.log["max_open"] = max(self.log["max_open"], self.log["open"])
+        self.log["sessions"].append(self)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.log["open"] -= 1
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    def add_all(self, objs):
+        self.added.extend(objs)
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+
+    async def commit(self):
+        self.committed = True
+
+
+class SlowSession(RecordingSession):
+    """Session whose statements take a few event-loop turns"""
+
+    async def execute(self, statement):
+        await asyncio.sleep(0.01)
+        self.statements.append(statement)
+
+
+@pytest.fixture
+def store_log():
+    log = {"open": 0, "max_open": 0, "sessions": []}
+    return PlanningRunStore(lambda: RecordingSession(log)), log
+
+
+def make_trip():
+    return Trip(
+        id="trip-1",
+        user_id="user-1",
+        title="北京三日游",
+        destinations=["北京"],
+        start_date=datetime(2026, 5, 1),
+        end_date=datetime(2026, 5, 3),
+        status="planning",
+        itinerary=[],
+    )
+
+
+@pytest.mark.asyncio
+async def test_every_write_is_a_short_transaction(store_log):
+    """Test one committed session per write and none held between writes"""
+    store, log = store_log
+    trip = make_trip()
+
+    run = await store.start(trip, {"destinations": ["北京"]})
+    assert log["open"] == 0
+    await store.record_step(run.id, "weather", {"weather": []}, usage={"llm_calls": 0})
+    await store.record_step(run.id, "food", {"restaurants": []}, cached=True)
+    trip.itinerary = [{"day": 1}]
+    await store.finish(run, trip, SessionStatus.completed)
+
+    sessions = log["sessions"]
+    assert len(sessions) == 4
+    assert all(session.committed for session in sessions)
+    assert log["max_open"] == 1 and log["open"] == 0
+
+    assert sessions[0].added == [trip, run]
+    assert run.trip_id == "trip-1" and run.user_id == "user-1"
+    assert run.status == SessionStatus.completed.value
+    assert run.finished_at is not None
+
+
+@pytest.mark.asyncio
+async def test_steps_and_final_state_are_written(store_log):
+    """Test step rows and the final trip/run updates"""
+    store, log = store_log
+    trip = make_trip()
+    run = await store.start(trip, {})
+
+    await store.record_step(run.id, "budget", {"total": 100}, degraded=True)
+    trip.status = "cancelled"
+    await store.finish(run, trip, SessionStatus.cancelled)
+
+    (step,) = log["sessions"][1].added
+    assert isinstance(step, PlanningStep)
+    assert (step.run_id, step.agent_type, step.degraded) == (run.id, "budget", True)
+
+    item_delete, trip_update, run_update = log["sessions"][2].statements
+    assert item_delete.table.name == "itinerary_items"
+    assert trip_update.table.name == "trips"
+    assert trip_update.compile().params["status"] == "cancelled"
+    assert run_update.table.name == "planning_runs"
+    assert run_update.compile().params["status"] == "cancelled"
+
+
+@pytest.mark.asyncio
+async def test_finish_completes_while_the_task_is_being_cancelled():
+    """Test that repeated cancellation (client disconnect) cannot abort finish"""
+    log = {"open": 0, "max_open": 0, "sessions": []}
+    store = PlanningRunStore(lambda: SlowSession(log))
+    trip = make_trip()
+    run = await store.start(trip, {})
+    planning = anyio.Event()
+
+    async def plan():
+        try:
+            planning.set()
+            await anyio.sleep(10)
+        except asyncio.CancelledError:
+            trip.status = "cancelled"
+            await store.finish(run, trip, SessionStatus.cancelled)
+            raise
+
+    # Starlette cancels the response task group's scope on disconnect; anyio
+    # keeps cancelling the task until it leaves the scope
+    async with anyio.create_task_group() as group:
+        group.start_soon(plan)
+        await planning.wait()
+        group.cancel_scope.cancel()
+
+    finish = log["sessions"][-1]
+    assert finish.committed
+    assert len(finish.statements) == 3
+    assert run.status == SessionStatus.cancelled.value
+    assert run.finished_at is not None
@@ -0,0 +1,114 @@
+"""Test keyset pagination and projection of the trip list"""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from app.db_models import Trip
+from app.trip_queries import (
+    DEFAULT_LIST_FIELDS,
+    decode_cursor,
+    encode_cursor,
+    list_trips_page,
+    parse_fields,
+    trips_page_query,
+)
+
+
+def compile_sql(query):
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+def make_trip(index):
+    return Trip(
+        id=f"trip-{index}",
+        user_id="user-1",
+        title=f"Trip {index}",
+        destinations=["北京"],
+        start_date=datetime(2026, 5, 1),
+        end_date=datetime(2026, 5, 3),
+        status="draft",
+        created_at=datetime(2026, 1, 1) + timedelta(hours=index),
+    )
+
+
+class ScalarsSession:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    async def scalars(self, query):
+        self.queries.append(query)
+        return self
+
+    def all(self):
+        return self.rows
+
+
+def test_fields_projection():
+    """Test default fields, explicit projections and unknown fields"""
+    assert "itinerary" not in DEFAULT_LIST_FIELDS
+    assert "preferences" not in DEFAULT_LIST_FIELDS
+    assert parse_fields(None) == DEFAULT_LIST_FIELDS
+    assert parse_fields("title, itinerary") == ("id", "title", "itinerary")
+
+    with pytest.raises(ValueError):
+        parse_fields("title,password_hash")
+
+
+def test_heavy_columns_are_not_selected():
+    """Test that the default projection skips the JSON columns in SQL"""
+    sql = compile_sql(trips_page_query("user-1", DEFAULT_LIST_FIELDS, 20))
+
+    assert "trips.itinerary" not in sql
+    assert "trips.preferences" not in sql
+    assert "trips.title" in sql
+    assert "ORDER BY trips.created_at DESC, trips.id DESC" in sql
+
+    sql = compile_sql(trips_page_query("user-1", ("id", "itinerary"), 20))
+    assert "trips.itinerary" in sql
+    assert "trips.title" not in sql
+
+
+def test_cursor_and_filters_are_pushed_into_sql():
+    """Test the keyset condition, status and date filters"""
+    cursor = encode_cursor(make_trip(3))
+    assert decode_cursor(cursor) == (datetime(2026, 1, 1, 3), "trip-3")
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+    sql = compile_sql(
+        trips_page_query(
+            "user-1",
+            DEFAULT_LIST_FIELDS,
+            20,
+            cursor=cursor,
+            statuses=["draft", "planning"],
+            date_from=date(2026, 5, 1),
+            date_to=date(2026, 5, 31),
+        )
+    )
+    assert "(trips.created_at, trips.id) < (" in sql
+    assert "trips.status IN" in sql
+    assert "trips.end_date >=" in sql
+    assert "trips.start_date <" in sql
+
+
+@pytest.mark.asyncio
+async def test_next_cursor_points_after_the_page():
+    """Test that one extra row decides whether there is a next page"""
+    trips = [make_trip(i) for i in (5, 4, 3)]
+
+    page, next_cursor = await list_trips_page(
+        ScalarsSession(trips), "user-1", ("id", "title"), 2
+    )
+    assert page == [
+        {"id": "trip-5", "title": "Trip 5"},
+        {"id": "trip-4", "title": "Trip 4"},
+    ]
+    assert decode_cursor(next_cursor)[1] == "trip-4"
+
+    page, next_cursor = await list_trips_page(
+        ScalarsSession(trips[:2]), "user-1", ("id",), 2
+    )
+    assert len(page) == 2 and next_cursor is None
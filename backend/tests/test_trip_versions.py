@@ -0,0 +1,224 @@
+"""Test ETags and If-Match on trip updates"""
+
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.pool import StaticPool
+import main
+from app.database import Base
+from app.db_models import ItineraryItem, Trip
+
+
+class TripSession:
+    """AsyncSession stand-in holding one trip"""
+
+    bind = None
+
+    def __init__(self, trip, updated_rows=1):
+        self.trip = trip
+        self.updated_rows = updated_rows
+        self.statements = []
+        self.commits = 0
+
+    async def scalar(self, query):
+        return self.trip
+
+    async def scalars(self, query):
+        return self
+
+    def all(self):
+        return []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return type("Result", (), {"rowcount": self.updated_rows})()
+
+    async def commit(self):
+        if self.updated_rows == 0:
+            raise StaleDataError("concurrent update")
+        self.commits += 1
+        if not self.statements:
+            # ORM flush of the modified trip (version_id_col)
+            self.trip.version += 1
+
+
+@pytest.fixture
+def client_for():
+    def make(session):
+        main.app.dependency_overrides[main.get_db] = lambda: session
+        main.app.dependency_overrides[main.get_current_user] = lambda: {
+            "user_id": "user-1"
+        }
+        return TestClient(main.app)
+
+    yield make
+    main.app.dependency_overrides.clear()
+
+
+def make_trip(version=3):
+    return Trip(
+        id="trip-1",
+        user_id="user-1",
+        title="北京三日游",
+        destinations=["北京"],
+        start_date=datetime(2026, 5, 1),
+        end_date=datetime(2026, 5, 3),
+        status="draft",
+        budget={"total": 5000},
+        preferences={},
+        itinerary=[],
+        is_public=False,
+        version=version,
+    )
+
+
+def test_get_returns_etag_and_not_modified(client_for):
+    client = client_for(TripSession(make_trip()))
+
+    response = client.get("/trips/trip-1")
+    assert response.headers["ETag"] == '"3"'
+    assert response.json()["version"] == 3
+
+    response = client.get("/trips/trip-1", headers={"If-None-Match": '"3"'})
+    assert response.status_code == 304
+
+
+def test_put_requires_matching_version(client_for):
+    session = TripSession(make_trip())
+    client = client_for(session)
+
+    response = client.put(
+        "/trips/trip-1", json={"title": "新标题"}, headers={"If-Match": '"2"'}
+    )
+    assert response.status_code == 412
+    assert session.commits == 0
+
+    response = client.put(
+        "/trips/trip-1", json={"title": "新标题"}, headers={"If-Match": '"3"'}
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"4"'
+
+
+def test_patch_detects_stale_versions(client_for):
+    client = client_for(TripSession(make_trip()))
+    headers = {"Content-Type": "application/merge-patch+json", "If-Match": '"3"'}
+
+    response = client.patch("/trips/trip-1", json={"title": "x"}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"4"'
+
+    # The same If-Match again is now stale
+    response = client.patch("/trips/trip-1", json={"title": "y"}, headers=headers)
+    assert response.status_code == 412
+
+    # Another writer bumped the version between the read and the UPDATE
+    client = client_for(TripSession(make_trip(), updated_rows=0))
+    response = client.patch("/trips/trip-1", json={"title": "z"}, headers=headers)
+    assert response.status_code == 412
+
+
+class SQLiteSession:
+    """
+    The AsyncSession calls the trip endpoints make, run on a synchronous
+    SQLite Session so SQLAlchemy's own version_id_col check does the flush.
+
+    concurrent_edit bumps the trip's version in the database just before the
+    next commit, as another device saving the trip in between would.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.bind = session.bind
+        self.concurrent_edit = None
+
+    async def scalar(self, query):
+        return self.session.scalar(query)
+
+    async def scalars(self, query):
+        return self.session.scalars(query)
+
+    async def execute(self, statement):
+        return self.session.execute(statement)
+
+    async def flush(self):
+        self.session.flush()
+
+    async def delete(self, instance):
+        self.session.delete(instance)
+
+    def add(self, instance):
+        self.session.add(instance)
+
+    def add_all(self, instances):
+        self.session.add_all(instances)
+
+    async def commit(self):
+        if self.concurrent_edit is not None:
+            self.session.execute(
+                update(Trip.__table__)
+                .where(Trip.__table__.c.id == self.concurrent_edit)
+                .values(version=Trip.__table__.c.version + 1)
+            )
+            self.concurrent_edit = None
+        try:
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+
+@pytest.fixture
+def sqlite_session():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    with Session(engine, expire_on_commit=False) as session:
+        session.add(make_trip(version=1))
+        session.add(
+            ItineraryItem(
+                id="item-1",
+                trip_id="trip-1",
+                day=1,
+                time="09:00",
+                type="attraction",
+                title="故宫",
+            )
+        )
+        session.commit()
+        yield SQLiteSession(session)
+    engine.dispose()
+
+
+@pytest.mark.parametrize(
+    "method, path, body",
+    [
+        (
+            "POST",
+            "/trips/trip-1/itinerary/items",
+            {"day": 1, "time": "14:00", "type": "attraction", "title": "景山"},
+        ),
+        ("PATCH", "/trips/trip-1/itinerary/items/item-1", {"title": "故宫博物院"}),
+        ("DELETE", "/trips/trip-1/itinerary/items/item-1", None),
+        ("POST", "/trips/trip-1/itinerary/reorder", {"day": 1, "item_ids": ["item-1"]}),
+        ("PUT", "/trips/trip-1", {"title": "新标题"}),
+        ("DELETE", "/trips/trip-1", None),
+    ],
+)
+def test_concurrent_edit_is_rejected_by_the_orm(
+    client_for, sqlite_session, method, path, body
+):
+    """Test that a write losing the version race returns 412, not 500"""
+    client = client_for(sqlite_session)
+
+    sqlite_session.concurrent_edit = "trip-1"
+    response = client.request(method, path, json=body)
+    assert response.status_code == 412
+
+    response = client.request(method, path, json=body)
+    assert response.status_code == 200